@@ -0,0 +1,70 @@
+'''Measures the bulk write throughput of `addVisits` by number of workers.
+
+The table is a local stand-in for DynamoDB that stores the items in memory and
+sleeps for a fixed latency on every request, so the benchmark shows how the
+round trips overlap rather than how fast a real table is.
+
+Usage
+-----
+  python benchmarks/bench_batch.py [ --visits 20000 ] [ --latency 0.02 ]
+    [ --workers 1 2 4 8 16 ]
+'''
+import os
+import sys
+import time
+import argparse
+import threading
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from bench_rollup import makeVisits # pylint: disable=wrong-import-position
+from dynamo.data import DynamoClient # pylint: disable=wrong-import-position
+
+class LatencyTable:
+  '''An in-memory DynamoDB stand-in that sleeps on every batch write.'''
+  def __init__( self, latency ):
+    self.latency = latency
+    self.items = {}
+    self.requests = 0
+    self._lock = threading.Lock()
+
+  def batch_write_item( self, RequestItems ):
+    time.sleep( self.latency )
+    with self._lock:
+      self.requests += 1
+      for requests in RequestItems.values():
+        for request in requests:
+          item = request['PutRequest']['Item']
+          self.items[( item['PK']['S'], item['SK']['S'] )] = item
+    return { 'UnprocessedItems': {} }
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument( '--visits', type = int, default = 20000 )
+  parser.add_argument(
+    '--latency', type = float, default = 0.02,
+    help = 'The number of seconds every request takes.'
+  )
+  parser.add_argument(
+    '--workers', type = int, nargs = '+', default = [ 1, 2, 4, 8, 16 ]
+  )
+  args = parser.parse_args()
+  visits = makeVisits( args.visits )
+  print(
+    f'{ "workers":>8} { "requests":>9} { "seconds":>8} { "items/s":>10}'
+  )
+  for workers in args.workers:
+    client = DynamoClient( 'bench', workers = workers )
+    client.client = LatencyTable( args.latency )
+    start = time.perf_counter()
+    result = client.addVisits( visits )
+    seconds = time.perf_counter() - start
+    if 'error' in result:
+      raise RuntimeError( result['error'] )
+    print(
+      f'{ workers:>8} { client.client.requests:>9} { seconds:>8.2f} ' +
+      f'{ len( client.client.items ) / seconds:>10.0f}'
+    )
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,125 @@
+'''Compares the compiled item decoders with the `itemTo` parsers by type.
+
+Every type of item is parsed with the parser that calls the object's
+constructor and with the decoder compiled from its schema. The columns are the
+items parsed per second and how many times faster the decoder is.
+
+Usage
+-----
+  python benchmarks/bench_decode.py [ --items 20000 ]
+'''
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Visit, Visitor, Session, Location, Browser # pylint: disable=wrong-import-position
+from dynamo.entities import DECODERS, decodeLightVisit # pylint: disable=wrong-import-position
+from dynamo.entities import itemToVisit, itemToLightVisit, itemToVisitor # pylint: disable=wrong-import-position
+from dynamo.entities import itemToSession, itemToLocation, itemToBrowser # pylint: disable=wrong-import-position
+from dynamo.entities import itemToPage, itemToDay, itemToWeek # pylint: disable=wrong-import-position
+from dynamo.entities import itemToMonth, itemToYear # pylint: disable=wrong-import-position
+from dynamo.data.rollup import rollupVisits # pylint: disable=wrong-import-position
+
+SLUGS = [ '/', '/blog', '/resume', '/blog/cicd', '/blog/react', None ]
+AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) ' + \
+  'AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0.2 Safari/605.1.15'
+
+def makeVisits( number ):
+  '''Creates random visits with a few scroll events each.'''
+  random.seed( 0 )
+  start = datetime.datetime( 2020, 11, 15 )
+  visits = []
+  for index in range( number ):
+    date = start + datetime.timedelta(
+      seconds = random.randrange( 86400 * 90 )
+    )
+    visits.append( Visit(
+      f'visitor-{ index % 5000 }', date, 0, 'Tyler Norlund', '/', date,
+      {
+        f'{ date.isoformat() }.{ event }Z': { 'x': 0, 'y': event * 40 }
+        for event in range( 10 )
+      },
+      random.choice( [ None, random.random() * 120 ] ),
+      None, random.choice( SLUGS ), None, random.choice( SLUGS )
+    ) )
+  return visits
+
+def makeItems( number ):
+  '''Creates the items of every type with their parser and decoder.'''
+  visits = makeVisits( number )
+  visitItems = [ visit.toItem() for visit in visits ]
+  rollups = rollupVisits( visits )
+  return [
+    ( 'visit', itemToVisit, DECODERS['visit'], visitItems ),
+    ( 'light visit', itemToLightVisit, decodeLightVisit, [
+      {
+        name: value for name, value in item.items()
+        if name in ( 'PK', 'SK', 'Slug', 'TimeOnPage', 'PreviousSlug' )
+      }
+      for item in visitItems
+    ] ),
+    ( 'visitor', itemToVisitor, DECODERS['visitor'], [
+      Visitor( visit.id, 1 ).toItem() for visit in visits
+    ] ),
+    ( 'session', itemToSession, DECODERS['session'], [
+      Session( visit.date, visit.id, 10.0, 60.0 ).toItem() for visit in visits
+    ] ),
+    ( 'location', itemToLocation, DECODERS['location'], [
+      Location(
+        visit.id, '0.0.0.0', 'US', 'California', 'Stockton', 37.9577,
+        -121.29078, '95201', '-08:00', [ 'example.com' ],
+        { 'asn': 7922, 'name': 'Comcast' }, 'ISP', False, False, False
+      ).toItem()
+      for visit in visits
+    ] ),
+    ( 'browser', itemToBrowser, DECODERS['browser'], [
+      Browser( visit.id, AGENT, 1280, 800, visit.date ).toItem()
+      for visit in visits
+    ] ),
+    *[
+      ( name, parser, DECODERS[name], [
+        rollup.toItem() for rollup in rollups[key]
+      ] )
+      for name, key, parser in (
+        ( 'day', 'days', itemToDay ), ( 'week', 'weeks', itemToWeek ),
+        ( 'month', 'months', itemToMonth ), ( 'year', 'years', itemToYear )
+      )
+    ],
+    ( 'page', itemToPage, DECODERS['page'], [ rollups['page'].toItem() ] )
+  ]
+
+def itemsPerSecond( parser, items, minimum = 0.2 ):
+  '''Returns the number of items parsed per second.'''
+  number = 0
+  start = time.perf_counter()
+  while True:
+    for item in items:
+      parser( item )
+    number += len( items )
+    seconds = time.perf_counter() - start
+    if seconds >= minimum:
+      return number / seconds
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument( '--items', type = int, default = 20000 )
+  args = parser.parse_args()
+  print(
+    f'{ "type":>11} { "items":>6} { "itemTo/s":>10} { "decode/s":>10} ' +
+    f'{ "speedup":>8}'
+  )
+  for name, itemParser, decoder, items in makeItems( args.items ):
+    parsed = itemsPerSecond( itemParser, items )
+    decoded = itemsPerSecond( decoder, items )
+    print(
+      f'{ name:>11} { len( items ):>6} { parsed:>10.0f} { decoded:>10.0f} ' +
+      f'{ decoded / parsed:>7.1f}x'
+    )
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,146 @@
+'''Compares `encodeItems` with encoding every visit with `toItem`.
+
+The legacy encoder is the `objectToItemAtr` every `toItem` used before the
+attributes were dispatched on their type: a chain of `isinstance` checks and a
+regular expression match per string in a list. The columns are the seconds it
+takes to encode the visits and drop them, the best of a few runs, like
+`addVisits` does when it writes them in batches.
+
+Usage
+-----
+  python benchmarks/bench_encode.py [ --sizes 10000 100000 ] [ --events 10 ]
+'''
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import datetime
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Visit, encodeItems # pylint: disable=wrong-import-position
+
+SLUGS = [ '/', '/blog', '/resume', '/blog/cicd', '/blog/react', None ]
+
+def makeVisits( number, events ):
+  '''Creates random visits in sessions of 10 visits.'''
+  random.seed( 0 )
+  start = datetime.datetime( 2020, 11, 15 )
+  visits = []
+  for index in range( number ):
+    date = start + datetime.timedelta(
+      seconds = random.randrange( 86400 * 90 )
+    )
+    sessionStart = visits[index - index % 10].date if index % 10 else date
+    visits.append( Visit(
+      f'visitor-{ index // 10 }', date, 0, 'Tyler Norlund', '/', sessionStart,
+      {
+        f'{ date.isoformat() }.{ event }Z': {
+          'x': 0, 'y': random.randrange( 4000 )
+        }
+        for event in range( events )
+      },
+      random.choice( [ None, random.random() * 120 ] ),
+      None, random.choice( SLUGS ), None, random.choice( SLUGS )
+    ) )
+  return visits
+
+def _legacyAttribute( obj ):
+  '''Formats an attribute the way `objectToItemAtr` used to.'''
+  if isinstance( obj, str ):
+    return { 'NULL': True } if obj in ( 'None', '' ) else { 'S': obj }
+  if isinstance( obj, ( float, int ) ):
+    return { 'N': str( obj ) }
+  if isinstance( obj, dict ):
+    return { 'M': {
+      key: _legacyAttribute( value ) for key, value in obj.items()
+    } }
+  if isinstance( obj, list ) and \
+    all( re.match( r'[\d\D]+', string ) for string in obj ):
+    return { 'SS': [ str( string ) for string in obj ] }
+  if obj is None:
+    return { 'NULL': True }
+  raise Exception( 'Could not parse attribute: ', obj )
+
+def _legacyFormatDate( date ):
+  '''Formats a datetime the way `formatDate` used to.'''
+  return date.strftime( '%Y-%m-%dT%H:%M:%S.' ) \
+    + date.strftime( '%f' )[:3] + 'Z'
+
+def _legacyToItem( visit ):
+  '''Encodes a visit the way `Visit.toItem` used to.'''
+  return {
+    'PK': { 'S': f'VISITOR#{ visit.id }' },
+    'SK': {
+      'S': f'VISIT#{ _legacyFormatDate( visit.date ) }#{ visit.slug }'
+    },
+    'GSI1PK': { 'S': f'PAGE#{ visit.slug }' },
+    'GSI1SK': { 'S': f'VISIT#{ _legacyFormatDate( visit.date ) }' },
+    'GSI2PK': { 'S': f'''SESSION#{
+      visit.id
+    }#{ _legacyFormatDate( visit.sessionStart ) }''' },
+    'GSI2SK': { 'S': f'VISIT#{ _legacyFormatDate( visit.date ) }' },
+    'Type': { 'S': 'visit' },
+    'User': { 'N': f'{ visit.user }' },
+    'Title': { 'S': visit.title },
+    'Slug': { 'S': visit.slug },
+    'ScrollEvents': _legacyAttribute( visit.scrollEvents ),
+    'PreviousTitle': _legacyAttribute( visit.prevTitle ),
+    'PreviousSlug': _legacyAttribute( visit.prevSlug ),
+    'NextTitle': _legacyAttribute( visit.nextTitle ),
+    'NextSlug': _legacyAttribute( visit.nextSlug ),
+    'TimeOnPage': _legacyAttribute( visit.timeOnPage )
+  }
+
+def drain( items ):
+  '''Makes every item and drops it.'''
+  for _ in items:
+    pass
+
+def bestSeconds( function, repeats = 3 ):
+  '''Returns the fewest seconds a function took over a few runs.'''
+  seconds = []
+  for _ in range( repeats ):
+    start = time.perf_counter()
+    function()
+    seconds.append( time.perf_counter() - start )
+  return min( seconds )
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument(
+    '--sizes', type = int, nargs = '+', default = [ 10000, 100000 ]
+  )
+  parser.add_argument(
+    '--events', type = int, default = 10,
+    help = 'The number of scroll events of every visit.'
+  )
+  args = parser.parse_args()
+  print(
+    f'{ "visits":>7} { "legacy (s)":>11} { "toItem (s)":>11} ' +
+    f'{ "encode (s)":>11} { "speedup":>8}'
+  )
+  for size in args.sizes:
+    visits = makeVisits( size, args.events )
+    if list( encodeItems( visits[:1000] ) ) != [
+      _legacyToItem( visit ) for visit in visits[:1000]
+    ]:
+      raise RuntimeError( 'The encoders do not agree' )
+    legacy = bestSeconds( lambda visits = visits: drain(
+      _legacyToItem( visit ) for visit in visits
+    ) )
+    toItem = bestSeconds(
+      lambda visits = visits: drain( visit.toItem() for visit in visits )
+    )
+    encode = bestSeconds(
+      lambda visits = visits: drain( encodeItems( visits ) )
+    )
+    print(
+      f'{ size:>7} { legacy:>11.2f} { toItem:>11.2f} { encode:>11.2f} ' +
+      f'{ legacy / encode:>7.1f}x'
+    )
+
+if __name__ == '__main__':
+  main()
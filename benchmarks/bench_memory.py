@@ -0,0 +1,136 @@
+'''Compares the memory of visits read from the table before and after slots.
+
+The visits are written as items to a file of JSON pages and read back a page
+at a time, so every item has its own copy of every string like it does when
+it is read from DynamoDB. Only the reads are traced.
+
+Before, every visit was a `__dict__` object holding its own copies of the
+visitor ID, titles, and slugs. Now they are slotted objects whose repeated
+strings are interned. Both keep the same scroll tracks, so only the objects
+and their strings are compared. The columns are the bytes still allocated per
+visit after every visit is loaded and how many times smaller the slotted
+visits are.
+
+Usage
+-----
+  python benchmarks/bench_memory.py [ --visits 1000000 ] [ --events 10 ]
+'''
+import os
+import sys
+import json
+import random
+import tempfile
+import argparse
+import datetime
+import tracemalloc
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Visit, DECODERS, formatDate, itemAtrToScrollEvents # pylint: disable=wrong-import-position
+
+SLUGS = [ '/', '/blog', '/resume', '/blog/cicd', '/blog/react', None ]
+# The number of items read from every page.
+PAGE_SIZE = 1000
+# The time between scroll events.
+STEP = datetime.timedelta( milliseconds = 17 )
+
+class _DictVisit: # pylint: disable=too-few-public-methods
+  '''A visit with a `__dict__`, like every visit was before it was slotted.'''
+
+def _legacyDecode( item ):
+  '''Parses a visit item the way the decoder did before it interned.'''
+  visit = _DictVisit()
+  date = datetime.datetime.fromisoformat(
+    item['SK']['S'].split( '#' )[1][:-1]
+  )
+  visit.__dict__.update( {
+    'date': date,
+    'id': item['PK']['S'].split( '#' )[1],
+    'user': int( item['User']['N'] ),
+    'title': item['Title']['S'],
+    'slug': item['Slug']['S'],
+    'sessionStart': datetime.datetime.fromisoformat(
+      item['GSI2PK']['S'].split( '#' )[2][:-1]
+    ),
+    'scrollEvents': itemAtrToScrollEvents( item['ScrollEvents'], date ),
+    'prevTitle': item['PreviousTitle'].get( 'S' ),
+    'prevSlug': item['PreviousSlug'].get( 'S' ),
+    'nextTitle': item['NextTitle'].get( 'S' ),
+    'nextSlug': item['NextSlug'].get( 'S' ),
+    'timeOnPage': None if 'NULL' in item['TimeOnPage']
+      else float( item['TimeOnPage']['N'] )
+  } )
+  return visit
+
+def writePages( file, number, events ):
+  '''Writes the JSON of the pages of random visits in sessions of 10.'''
+  random.seed( 0 )
+  start = datetime.datetime( 2020, 11, 15 )
+  for first in range( 0, number, PAGE_SIZE ):
+    items = []
+    for index in range( first, min( first + PAGE_SIZE, number ) ):
+      date = start + datetime.timedelta(
+        seconds = random.randrange( 86400 * 90 ),
+        milliseconds = random.randrange( 1000 )
+      )
+      items.append( Visit(
+        f'visitor-{ index // 10 }', date, 0, 'Tyler Norlund', '/', date,
+        {
+          formatDate( date + event * STEP ): { 'x': 0, 'y': 40 * event }
+          for event in range( events )
+        },
+        random.choice( [ None, random.random() * 120 ] ),
+        None, random.choice( SLUGS ), None, random.choice( SLUGS )
+      ).toItem() )
+    for item in items:
+      if 'B' in item['ScrollEvents']:
+        item['ScrollEvents'] = {
+          'B': item['ScrollEvents']['B'].decode( 'latin-1' )
+        }
+    file.write( json.dumps( items ) + '\n' )
+
+def load( decoder, file ):
+  '''Returns the visits decoded from every page.'''
+  file.seek( 0 )
+  visits = []
+  for page in file:
+    for item in json.loads( page ):
+      if 'B' in item['ScrollEvents']:
+        item['ScrollEvents'] = {
+          'B': item['ScrollEvents']['B'].encode( 'latin-1' )
+        }
+      visits.append( decoder( item ) )
+  return visits
+
+def bytesAllocated( decoder, file ):
+  '''Returns the bytes still allocated by the visits loaded.'''
+  tracemalloc.start()
+  visits = load( decoder, file )
+  size, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del visits
+  return size
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument( '--visits', type = int, default = 1000000 )
+  parser.add_argument(
+    '--events', type = int, default = 10,
+    help = 'The number of scroll events of every visit.'
+  )
+  args = parser.parse_args()
+  with tempfile.TemporaryFile( 'w+' ) as file:
+    writePages( file, args.visits, args.events )
+    before = bytesAllocated( _legacyDecode, file )
+    after = bytesAllocated( DECODERS['visit'], file )
+  print(
+    f'{ "visits":>8} { "before (B)":>11} { "after (B)":>10} ' +
+    f'{ "smaller":>8}'
+  )
+  print(
+    f'{ args.visits:>8} { before / args.visits:>11.0f} ' +
+    f'{ after / args.visits:>10.0f} { before / after:>7.2f}x'
+  )
+
+if __name__ == '__main__':
+  main()
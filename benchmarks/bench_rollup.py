@@ -0,0 +1,95 @@
+'''Compares the columnar rollup engine with the per-bucket rollup.
+
+The per-bucket rollup is the comprehension `DynamoClient.updatePage` used
+before the engine: every bucket re-formats the date of every visit.
+
+Usage
+-----
+  python benchmarks/bench_rollup.py [ --sizes 10000 100000 1000000 ]
+'''
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import numpy as np
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Visit # pylint: disable=wrong-import-position
+from dynamo.data.rollup import rollupVisits # pylint: disable=wrong-import-position
+from dynamo.data.util import pagesToDict # pylint: disable=wrong-import-position
+
+SLUGS = [ '/', '/blog', '/resume', '/blog/cicd', '/blog/react', None ]
+
+def makeVisits( number, days = 90, visitors = 5000 ):
+  '''Creates random visits to a single page spread over a number of days.'''
+  random.seed( 0 )
+  start = datetime.datetime( 2020, 11, 15 )
+  return [
+    Visit(
+      f'visitor-{ random.randrange( visitors ) }',
+      start + datetime.timedelta( seconds = random.randrange( days * 86400 ) ),
+      0, 'Tyler Norlund', '/', start, {},
+      random.choice( [ None, random.random() * 120 ] ),
+      None, random.choice( SLUGS ), None, random.choice( SLUGS )
+    )
+    for _ in range( number )
+  ]
+
+def _legacyGroup( visits, dateFormat ):
+  '''Rolls up one granularity the way `updatePage` used to.'''
+  groups = []
+  for group in [
+    [ visit for visit in visits if visit.date.strftime( dateFormat ) == key ]
+    for key in { visit.date.strftime( dateFormat ) for visit in visits }
+  ]:
+    toPages = [ visit.nextSlug for visit in group ]
+    fromPages = [ visit.prevSlug for visit in group ]
+    pageTimes = [
+      visit.timeOnPage for visit in group
+      if isinstance( visit.timeOnPage, float )
+    ]
+    groups.append( (
+      len( { visit.id for visit in group } ),
+      np.mean( pageTimes ) if pageTimes else None,
+      toPages.count( None ) / len( toPages ),
+      pagesToDict( fromPages ),
+      pagesToDict( toPages )
+    ) )
+  return groups
+
+def legacyRollup( visits ):
+  '''Rolls up every granularity the way `updatePage` used to.'''
+  return [
+    _legacyGroup( visits, dateFormat )
+    for dateFormat in ( '%Y-%m-%d', '%Y-%U', '%Y-%m', '%Y' )
+  ] + [ _legacyGroup( visits, '' ) ]
+
+def timeIt( function, *args ):
+  '''Returns the number of seconds a function takes to run.'''
+  start = time.perf_counter()
+  function( *args )
+  return time.perf_counter() - start
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument(
+    '--sizes', type = int, nargs = '+', default = [ 10000, 100000, 1000000 ]
+  )
+  parser.add_argument(
+    '--legacy-limit', type = int, default = 1000000,
+    help = 'Skip the per-bucket rollup above this many visits.'
+  )
+  args = parser.parse_args()
+  print( f'{ "visits":>10} { "per-bucket (s)":>15} { "engine (s)":>11}' )
+  for size in args.sizes:
+    visits = makeVisits( size )
+    engine = timeIt( rollupVisits, visits )
+    legacy = timeIt( legacyRollup, visits ) \
+      if size <= args.legacy_limit else float( 'nan' )
+    print( f'{ size:>10} { legacy:>15.3f} { engine:>11.3f}' )
+
+if __name__ == '__main__':
+  main()
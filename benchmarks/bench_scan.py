@@ -0,0 +1,109 @@
+'''Measures the listing throughput of `listVisitors` by number of segments.
+
+The table is a local stand-in for DynamoDB that stores the items in memory,
+returns a fixed number of items per page, and sleeps for a fixed latency on
+every request, so the benchmark shows how the segments overlap rather than how
+fast a real table is.
+
+Usage
+-----
+  python benchmarks/bench_scan.py [ --visitors 20000 ] [ --latency 0.02 ]
+    [ --page 1000 ] [ --segments 1 2 4 8 16 ]
+'''
+import os
+import sys
+import time
+import zlib
+import argparse
+import threading
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Visitor, Location # pylint: disable=wrong-import-position
+from dynamo.data import DynamoClient # pylint: disable=wrong-import-position
+
+class ScanTable:
+  '''An in-memory DynamoDB stand-in that sleeps on every scan.'''
+  def __init__( self, items, latency, pageSize ):
+    self.items = items
+    self.latency = latency
+    self.pageSize = pageSize
+    self.requests = 0
+    self._segments = {}
+    self._lock = threading.Lock()
+
+  def _segment( self, segment, totalSegments ):
+    '''Returns the items of a segment split by their partition key's hash.'''
+    with self._lock:
+      if totalSegments not in self._segments.keys():
+        self._segments[totalSegments] = [ [] for _ in range( totalSegments ) ]
+        for item in self.items:
+          self._segments[totalSegments][
+            zlib.crc32( item['PK']['S'].encode() ) % totalSegments
+          ].append( item )
+      return self._segments[totalSegments][segment]
+
+  def scan( self, **request ):
+    time.sleep( self.latency )
+    with self._lock:
+      self.requests += 1
+    items = self._segment(
+      request.get( 'Segment', 0 ), request.get( 'TotalSegments', 1 )
+    )
+    start = request.get( 'ExclusiveStartKey', { 'index': 0 } )['index']
+    page = items[start:start + self.pageSize]
+    itemType = request['ExpressionAttributeValues'][':type']['S']
+    result = {
+      'Items': [ item for item in page if item['Type']['S'] == itemType ]
+    }
+    if start + self.pageSize < len( items ):
+      result['LastEvaluatedKey'] = { 'index': start + self.pageSize }
+    return result
+
+def makeItems( numberVisitors ):
+  '''Creates the items of visitors and their locations.'''
+  items = []
+  for index in range( numberVisitors ):
+    visitorId = f'visitor-{ index }'
+    items.append( Visitor( visitorId, 1 ).toItem() )
+    items.append( Location(
+      visitorId, '0.0.0.0', 'US', 'California', 'Stockton', 37.9577,
+      -121.29078, '95201', '-08:00', [ 'example.com' ], {}, 'ISP', False,
+      False, False
+    ).toItem() )
+  return items
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument( '--visitors', type = int, default = 20000 )
+  parser.add_argument(
+    '--latency', type = float, default = 0.02,
+    help = 'The number of seconds every request takes.'
+  )
+  parser.add_argument(
+    '--page', type = int, default = 1000,
+    help = 'The number of items scanned by every request.'
+  )
+  parser.add_argument(
+    '--segments', type = int, nargs = '+', default = [ 1, 2, 4, 8, 16 ]
+  )
+  args = parser.parse_args()
+  items = makeItems( args.visitors )
+  print(
+    f'{ "segments":>8} { "requests":>9} { "seconds":>8} { "visitors/s":>11}'
+  )
+  for segments in args.segments:
+    client = DynamoClient( 'bench' )
+    client.client = ScanTable( items, args.latency, args.page )
+    start = time.perf_counter()
+    result = client.listVisitors( segments = segments )
+    seconds = time.perf_counter() - start
+    if isinstance( result, dict ):
+      raise RuntimeError( result['error'] )
+    print(
+      f'{ segments:>8} { client.client.requests:>9} { seconds:>8.2f} ' +
+      f'{ len( result ) / seconds:>11.0f}'
+    )
+
+if __name__ == '__main__':
+  main()
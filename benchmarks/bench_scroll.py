@@ -0,0 +1,109 @@
+'''Compares the binary scroll events with the map they were stored as.
+
+Every visit scrolls down the page in events a few milliseconds apart, like the
+browser reports them. The columns are the bytes of the attribute as DynamoDB
+JSON, with the binary attribute base64 encoded the way it is sent, and the
+microseconds it takes to encode and decode the attribute of one visit, the
+best of a few runs, including the JSON.
+
+Usage
+-----
+  python benchmarks/bench_scroll.py [ --events 10 100 1000 5000 ]
+'''
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import datetime
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import formatDate, objectToItemAtr # pylint: disable=wrong-import-position
+from dynamo.entities import scrollEventsToItemAtr, itemAtrToScrollEvents # pylint: disable=wrong-import-position
+
+def makeScrollEvents( number ):
+  '''Creates the scroll events of a visit that scrolls down the page.'''
+  random.seed( 0 )
+  start = datetime.datetime( 2021, 2, 10, 11, 27, 43, 262000 )
+  date, y, events = start, 0, {}
+  for _ in range( number ):
+    date += datetime.timedelta( milliseconds = random.randrange( 8, 400 ) )
+    y = max( 0, y + random.randrange( -40, 120 ) )
+    events[formatDate( date )] = { 'x': 0, 'y': y }
+  return start, events
+
+def toJSON( atr ):
+  '''Returns the attribute as the DynamoDB JSON sent over the wire.'''
+  if 'B' in atr:
+    return json.dumps( { 'B': base64.b64encode( atr['B'] ).decode() } )
+  return json.dumps( atr )
+
+def fromJSON( text ):
+  '''Parses the attribute from the DynamoDB JSON sent over the wire.'''
+  atr = json.loads( text )
+  if 'B' in atr:
+    return { 'B': base64.b64decode( atr['B'] ) }
+  return atr
+
+def bestMicroseconds( function, repeats = 5 ):
+  '''Returns the fewest microseconds a function took over a few runs.'''
+  number, seconds = 1, 0
+  while seconds < 0.05:
+    start = time.perf_counter()
+    for _ in range( number ):
+      function()
+    seconds = time.perf_counter() - start
+    number *= 2
+  number //= 2
+  best = seconds
+  for _ in range( repeats ):
+    start = time.perf_counter()
+    for _ in range( number ):
+      function()
+    best = min( best, time.perf_counter() - start )
+  return best / number * 1e6
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument(
+    '--events', type = int, nargs = '+', default = [ 10, 100, 1000, 5000 ]
+  )
+  args = parser.parse_args()
+  print(
+    f'{ "events":>7} { "map (B)":>9} { "binary (B)":>11} ' +
+    f'{ "map enc":>8} { "bin enc":>8} { "map dec":>8} { "bin dec":>8}'
+  )
+  for number in args.events:
+    start, events = makeScrollEvents( number )
+    legacy = toJSON( objectToItemAtr( events ) )
+    binary = toJSON( scrollEventsToItemAtr( events, start ) )
+    if itemAtrToScrollEvents( fromJSON( binary ), start ) != events or \
+      itemAtrToScrollEvents( fromJSON( legacy ), start ) != events:
+      raise RuntimeError( 'The scroll events do not agree' )
+    times = [
+      bestMicroseconds(
+        lambda events = events: toJSON( objectToItemAtr( events ) )
+      ),
+      bestMicroseconds(
+        lambda events = events, start = start:
+          toJSON( scrollEventsToItemAtr( events, start ) )
+      ),
+      bestMicroseconds(
+        lambda legacy = legacy, start = start:
+          itemAtrToScrollEvents( fromJSON( legacy ), start )
+      ),
+      bestMicroseconds(
+        lambda binary = binary, start = start:
+          itemAtrToScrollEvents( fromJSON( binary ), start )
+      )
+    ]
+    print(
+      f'{ number:>7} { len( legacy ):>9} { len( binary ):>11} ' +
+      ' '.join( f'{ value:>8.0f}' for value in times )
+    )
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,67 @@
+'''Compares the visitor sketches with exact set-based visitor counts.
+
+Every cardinality is counted with a set of IDs and with a sketch. The error is
+relative to the exact count. The merge columns count a month's visitors from
+30 daily sketches and from 30 daily sets.
+
+Usage
+-----
+  python benchmarks/bench_sketch.py [ --sizes 1000 10000 100000 1000000 ]
+'''
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import VisitorSketch, hashIds, groupSketches # pylint: disable=wrong-import-position
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument(
+    '--sizes', type = int, nargs = '+',
+    default = [ 1000, 10000, 100000, 1000000 ]
+  )
+  args = parser.parse_args()
+  print(
+    f'{ "visitors":>9} { "error %":>8} { "set (s)":>8} { "sketch (s)":>10} ' +
+    f'{ "set merge":>10} { "sketch merge":>13} { "bytes":>6}'
+  )
+  random.seed( 0 )
+  for size in args.sizes:
+    ids = [ f'visitor-{ index }' for index in range( size ) ]
+    # Every visitor visits twice on random days.
+    visits = ids + ids
+    days = np.array( [ random.randrange( 30 ) for _ in visits ] )
+    start = time.perf_counter()
+    daySets = [ set() for _ in range( 30 ) ]
+    for visitorId, day in zip( visits, days.tolist() ):
+      daySets[day].add( visitorId )
+    setTime = time.perf_counter() - start
+    start = time.perf_counter()
+    # The rollup engine hashes every unique ID once.
+    hashes = hashIds( ids )
+    daySketches = groupSketches(
+      np.concatenate( [ hashes, hashes ] ), days, 30
+    )
+    sketchTime = time.perf_counter() - start
+    start = time.perf_counter()
+    exact = len( set().union( *daySets ) )
+    setMerge = time.perf_counter() - start
+    start = time.perf_counter()
+    month = VisitorSketch()
+    for sketch in daySketches:
+      month.merge( sketch )
+    estimate = month.count()
+    sketchMerge = time.perf_counter() - start
+    print(
+      f'{ size:>9} { 100 * ( estimate - exact ) / exact:>8.2f} ' +
+      f'{ setTime:>8.3f} { sketchTime:>10.3f} { setMerge:>10.4f} ' +
+      f'{ sketchMerge:>13.4f} { len( month.toBytes() ):>6}'
+    )
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,67 @@
+'''Compares the memory of scroll events as dictionaries and as scroll tracks.
+
+Every visit scrolls down the page in events a few milliseconds apart, like the
+browser reports them. The columns are the bytes allocated per visit to hold
+its scroll events as a dictionary of dictionaries and as a `ScrollTrack`, and
+how many times smaller the track is.
+
+Usage
+-----
+  python benchmarks/bench_track.py [ --visits 1000 ] [ --events 10 100 1000 ]
+'''
+import os
+import sys
+import random
+import argparse
+import datetime
+import tracemalloc
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import formatDate, toScrollTrack # pylint: disable=wrong-import-position
+
+def makeScrollEvents( number ):
+  '''Creates the scroll events of a visit that scrolls down the page.'''
+  date, y, events = datetime.datetime( 2021, 2, 10, 11, 27, 43, 262000 ), 0, {}
+  for _ in range( number ):
+    date += datetime.timedelta( milliseconds = random.randrange( 8, 400 ) )
+    y = max( 0, y + random.randrange( -40, 120 ) )
+    events[formatDate( date )] = { 'x': 0, 'y': y }
+  return events
+
+def bytesAllocated( function ):
+  '''Returns the bytes still allocated by the objects a function returns.'''
+  tracemalloc.start()
+  result = function()
+  size, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del result
+  return size
+
+def main():
+  parser = argparse.ArgumentParser( description = __doc__ )
+  parser.add_argument( '--visits', type = int, default = 1000 )
+  parser.add_argument(
+    '--events', type = int, nargs = '+', default = [ 10, 100, 1000 ]
+  )
+  args = parser.parse_args()
+  print(
+    f'{ "events":>7} { "dict (B)":>10} { "track (B)":>10} { "smaller":>8}'
+  )
+  for number in args.events:
+    random.seed( 0 )
+    dicts = bytesAllocated( lambda number = number: [
+      makeScrollEvents( number ) for _ in range( args.visits )
+    ] )
+    random.seed( 0 )
+    tracks = bytesAllocated( lambda number = number: [
+      toScrollTrack( makeScrollEvents( number ) )
+      for _ in range( args.visits )
+    ] )
+    print(
+      f'{ number:>7} { dicts / args.visits:>10.0f} ' +
+      f'{ tracks / args.visits:>10.0f} { dicts / tracks:>7.1f}x'
+    )
+
+if __name__ == '__main__':
+  main()
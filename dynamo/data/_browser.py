@@ -4,7 +4,8 @@ from botocore.exceptions import ClientError
 sys.path.append(
   os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
 )
-from dynamo.entities import Browser # pylint: disable=wrong-import-position
+from dynamo.entities import Browser, encodeItems # pylint: disable=wrong-import-position
+from dynamo.data.batch import BatchWriteException # pylint: disable=wrong-import-position
 
 class _Browser():
   def addBrowser( self, browser ):
@@ -28,6 +29,7 @@ class _Browser():
         Item = browser.toItem(),
         ConditionExpression = 'attribute_not_exists(PK)'
       )
+      self._invalidate( browser )
       return { 'browser': browser }
     except ClientError as e:
       print( f'ERROR addBrowser: { e }')
@@ -58,6 +60,7 @@ class _Browser():
         Key = browser.key(),
         ConditionExpression = 'attribute_exists(PK)'
       )
+      self._invalidate( browser )
       return { 'browser': browser }
     except ClientError as e:
       print( f'ERROR removeBrowser: { e }' )
@@ -83,14 +86,12 @@ class _Browser():
     if any( not isinstance( browser, Browser ) for browser in browsers ):
       raise ValueError( 'Must pass Browser objects' )
     try:
-      self.client.batch_write_item(
-        RequestItems = {
-          self.tableName: [
-            { 'PutRequest': { 'Item': browser.toItem() } }
-            for browser in browsers
-          ] },
-      )
+      with self.batchWriter() as writer:
+        for item in encodeItems( browsers ):
+          writer.put( item )
       return { 'browsers': browsers }
-    except ClientError as e:
+    except ( ClientError, BatchWriteException ) as e:
       print( f'ERROR addBrowsers: { e }')
       return { 'error': 'Could not add new browsers to table' }
+    finally:
+      self._invalidate( *browsers )
@@ -4,8 +4,8 @@ from botocore.exceptions import ClientError
 sys.path.append(
   os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
 )
-from dynamo.entities import Location, itemToLocation # pylint: disable=wrong-import-position
-from dynamo.data.util import chunkList # pylint: disable=wrong-import-position
+from dynamo.entities import Location, DECODERS, encodeItems # pylint: disable=wrong-import-position
+from dynamo.data.batch import BatchWriteException # pylint: disable=wrong-import-position
 
 class _Location:
   def addLocation( self, location ):
@@ -29,6 +29,7 @@ class _Location:
         Item = location.toItem(),
         ConditionExpression = 'attribute_not_exists(PK)'
       )
+      self._invalidate( location )
       return { 'location': location }
     except ClientError as e:
       print( f'ERROR addLocation: { e }')
@@ -57,27 +58,15 @@ class _Location:
     if any( not isinstance( location, Location ) for location in locations ):
       raise ValueError( 'Must pass Location objects' )
     try:
-      if len( locations ) > 25:
-        for sub_locations in chunkList( locations, 25 ):
-          self.client.batch_write_item(
-            RequestItems = {
-              self.tableName: [
-                { 'PutRequest': { 'Item': location.toItem() } }
-                for location in sub_locations
-              ] },
-          )
-      else:
-        self.client.batch_write_item(
-          RequestItems = {
-            self.tableName: [
-              { 'PutRequest': { 'Item': location.toItem() } }
-              for location in locations
-            ] },
-        )
+      with self.batchWriter() as writer:
+        for item in encodeItems( locations ):
+          writer.put( item )
       return { 'locations': locations }
-    except ClientError as e:
+    except ( ClientError, BatchWriteException ) as e:
       print( f'ERROR addLocations: { e }')
       return { 'error': 'Could not add locations to table' }
+    finally:
+      self._invalidate( *locations )
 
   def removeLocation( self, location ):
     '''Removes a location from the table.
@@ -100,6 +89,7 @@ class _Location:
         Key = location.key(),
         ConditionExpression = 'attribute_exists(PK)'
       )
+      self._invalidate( location )
       return { 'location': location }
     except ClientError as e:
       print( f'ERROR removeLocation: { e }' )
@@ -107,48 +97,51 @@ class _Location:
         return { 'error': f'Location not in table { location }' }
       return { 'error': 'Could not remove location from table' }
 
-  def listLocations( self ):
+  def listLocations( self, segments = 1 ):
     '''Lists all locations in the table.
 
+    Parameters
+    ----------
+    segments : int, optional
+      The number of segments of the table scanned at the same time when there
+      is no type index. (default is 1)
+
     Returns
     -------
     locations : list[ Location ]
       The list of locations from the table.
     '''
-    # Use a list to store the locations returned from the table.
-    locations = []
     try:
-      result = self.client.scan(
-        TableName = self.tableName,
-        ScanFilter = {
-          'Type': {
-            'AttributeValueList': [ { 'S': 'location' } ],
-            'ComparisonOperator': 'EQ'
-          }
-        }
-      )
-      for item in result['Items']:
-        locations.append( itemToLocation( item ) )
-      # DynamoDB is limited in 1MB of query results. Continue to query from the
-      # 'LastEvaluatedKey' when this condition is met.
-      if 'LastEvaluatedKey' in result.keys():
-        still_querying = True
-        while still_querying:
-          result = self.client.scan(
-            TableName = self.tableName,
-            ScanFilter = {
-              'Type': {
-                'AttributeValueList': [ { 'S': 'location' } ],
-                'ComparisonOperator': 'EQ'
-              }
-            },
-            ExclusiveStartKey = result['LastEvaluatedKey']
-          )
-          for item in result['Items']:
-            locations.append( itemToLocation( item ) )
-          if 'LastEvaluatedKey' not in result.keys():
-            still_querying = False
-      return locations
+      return list( self.iterLocations( True, segments ) )
     except ClientError as e:
       print( f'ERROR listLocations: { e }' )
       return { 'error': 'Could not get visits from table' }
+
+  def iterLocations( self, prefetch = False, segments = 1 ):
+    '''Iterates over all locations in the table page by page.
+
+    When the client has a type index, the locations are queried from it.
+    Otherwise, the segments of the table are scanned at the same time and the
+    locations are returned in the order they arrive.
+
+    Parameters
+    ----------
+    prefetch : bool, optional
+      Whether to request the next page while the current one is used. (default
+      is False)
+    segments : int, optional
+      The number of segments of the table scanned at the same time when there
+      is no type index. (default is 1)
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception while iterating.
+
+    Returns
+    -------
+      An iterable that iterates over the locations.
+    '''
+    return self._iterType(
+      'location', DECODERS['location'], prefetch, segments
+    )
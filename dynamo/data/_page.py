@@ -0,0 +1,524 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from botocore.exceptions import ClientError
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Visit, Page, Year, VisitorSketch # pylint: disable=wrong-import-position
+from dynamo.entities import Day, Week, Month # pylint: disable=wrong-import-position
+from dynamo.entities import DECODERS, itemToAggregate # pylint: disable=wrong-import-position
+from dynamo.data.rollup import bucketCodes, GRANULARITIES # pylint: disable=wrong-import-position
+from dynamo.data.projection import projectionArguments # pylint: disable=wrong-import-position
+from dynamo.data.util import paginate, MAX_QUERIES # pylint: disable=wrong-import-position
+from dynamo.data.util import queryItems, sortKeyRange # pylint: disable=wrong-import-position
+
+# The GSI1 sort key prefixes of a page's analytics in key order.
+PAGE_PREFIXES = ( '#DAY#', '#MONTH#', '#PAGE', '#WEEK#', '#YEAR#' )
+# The types of items in a page's partition other than its visits.
+PAGE_TYPES = ( 'page', 'day', 'week', 'month', 'year' )
+
+class _Page():
+  def _queryPageItems(
+    self, page, sortKeyCondition, values, profile = 'full'
+  ):
+    '''Queries the items of a page with a condition on their GSI1 sort keys.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page the items belong to.
+    sortKeyCondition : str
+      The condition on the sort key, which is named '#gsi1sk'.
+    values : dict
+      The values used in the condition.
+    profile : str, optional
+      The projection profile of the items. (default is 'full')
+
+    Returns
+    -------
+    items : list[ dict ]
+      The raw DynamoDB items.
+    '''
+    return [
+      item
+      for result in paginate(
+        self.client, 'query',
+        self._pageQuery( page, sortKeyCondition, values, profile ), True
+      )
+      for item in result['Items']
+    ]
+
+  def _pageQuery( self, page, sortKeyCondition, values, profile = 'full' ):
+    '''Returns the query of a page's items with a condition on their GSI1 sort
+    keys.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page the items belong to.
+    sortKeyCondition : str
+      The condition on the sort key, which is named '#gsi1sk'.
+    values : dict
+      The values used in the condition.
+    profile : str, optional
+      The projection profile of the items. (default is 'full')
+    '''
+    projection, _ = projectionArguments(
+      profile, { '#gsi1': 'GSI1PK', '#gsi1sk': 'GSI1SK' }
+    )
+    return {
+      'TableName': self.tableName,
+      'IndexName': 'GSI1',
+      'KeyConditionExpression': f'#gsi1 = :gsi1 AND { sortKeyCondition }',
+      **projection,
+      'ExpressionAttributeValues': { ':gsi1': page.gsi1pk(), **values },
+      'ScanIndexForward': True
+    }
+
+  def getPageSummary( self, page, granularity, start = None, end = None ):
+    '''Gets a page's rollups of one granularity between two dates.
+
+    Only the rollups of the granularity are read, so the cost depends on the
+    number of days, weeks, months, or years requested instead of the page's
+    visits.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page to get the rollups of.
+    granularity : str
+      Either 'day', 'week', 'month', 'year', or 'page'.
+    start : datetime.datetime, optional
+      A date in the first rollup. This is not used for the page. (default is
+      None)
+    end : datetime.datetime, optional
+      A date in the last rollup. This is not used for the page. (default is
+      None)
+
+    Returns
+    -------
+    result : dict
+      The result of getting the rollups from the table. This contains either
+      the error that occurred, the page, or the days, weeks, months, or years
+      in key order.
+    '''
+    if not isinstance( page, ( Page, Visit ) ):
+      raise ValueError( 'Must pass a Page object' )
+    if granularity not in GRANULARITIES:
+      raise ValueError( f'Unknown granularity { granularity }' )
+    try:
+      if granularity == 'page':
+        result = self.client.get_item(
+          TableName = self.tableName,
+          Key = { 'PK': page.gsi1pk(), 'SK': { 'S': '#PAGE' } }
+        )
+        if 'Item' not in result.keys():
+          return { 'error': 'Page not in table' }
+        return { 'page': DECODERS['page']( result['Item'] ) }
+      parser = DECODERS[granularity]
+      items = self._queryPageItems(
+        page, '#gsi1sk BETWEEN :start AND :end',
+        _bucketKeyRange( granularity, start, end )
+      )
+      return { f'{ granularity }s': [ parser( item ) for item in items ] }
+    except ClientError as e:
+      print( f'ERROR getPageSummary: { e }' )
+      return { 'error': 'Could not get page from table' }
+
+  def countPageVisits( self, page, start = None, end = None ):
+    '''Counts a page's visits between two dates.
+
+    The visits are counted by DynamoDB, so none of them are returned.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page to count the visits of.
+    start : datetime.datetime, optional
+      The earliest date of the visits. (default is None)
+    end : datetime.datetime, optional
+      The latest date of the visits. (default is None)
+
+    Returns
+    -------
+    result : dict
+      The result of counting the visits. This contains either the error that
+      occurred or the 'numberVisits'.
+    '''
+    if not isinstance( page, ( Page, Visit ) ):
+      raise ValueError( 'Must pass a Page object' )
+    try:
+      return { 'numberVisits': sum(
+        result['Count']
+        for result in paginate( self.client, 'query', {
+          **self._pageQuery(
+            page, '#gsi1sk BETWEEN :start AND :end',
+            sortKeyRange( 'VISIT#', start, end )
+          ),
+          'Select': 'COUNT'
+        }, True )
+      ) }
+    except ClientError as e:
+      print( f'ERROR countPageVisits: { e }' )
+      return { 'error': 'Could not get visits from table' }
+
+  def countVisitors( self, page, start, end ):
+    '''Estimates the number of unique visitors of a page between two days.
+
+    The visitor sketches of the days in the range are merged, so no visits
+    are read.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page to count the visitors of.
+    start : datetime.datetime
+      The first day of the range.
+    end : datetime.datetime
+      The last day of the range.
+
+    Returns
+    -------
+    result : dict
+      The result of counting the visitors. This contains either the error that
+      occurred or the 'numberVisitors'.
+    '''
+    if not isinstance( page, ( Page, Visit ) ):
+      raise ValueError( 'Must pass a Page object' )
+    try:
+      items = self._queryPageItems(
+        page, '#gsi1sk BETWEEN :start AND :end', {
+          ':start': { 'S': f'#DAY#{ start.strftime( "%Y-%m-%d" ) }' },
+          ':end': { 'S': f'#DAY#{ end.strftime( "%Y-%m-%d" ) }' }
+        }
+      )
+    except ClientError as e:
+      print( f'ERROR countVisitors: { e }' )
+      return { 'error': 'Could not get page from table' }
+    sketch = VisitorSketch()
+    for item in items:
+      aggregate = itemToAggregate( item )
+      if aggregate is None:
+        return { 'error': 'Page must be rebuilt to count its visitors' }
+      sketch.merge( aggregate.visitors )
+    return { 'numberVisitors': sketch.count() }
+
+  def getPageVisits(
+    self, page, start = None, end = None, limit = None, descending = False,
+    profile = 'full'
+  ):
+    '''Gets a page's visits between two dates.
+
+    Only the visits in the range are read, so the cost does not grow with the
+    page's history.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page to get the visits of.
+    start : datetime.datetime, optional
+      The earliest date of the visits. (default is None)
+    end : datetime.datetime, optional
+      The latest date of the visits. (default is None)
+    limit : int, optional
+      The most visits returned. (default is None)
+    descending : bool, optional
+      Whether the latest visits are returned first. (default is False)
+    profile : str, optional
+      The projection profile of the visits. (default is 'full')
+
+    Returns
+    -------
+    result : dict
+      The result of getting the visits from the table. This contains either
+      the error that occurred or the visits ordered by their date.
+    '''
+    if not isinstance( page, ( Page, Visit ) ):
+      raise ValueError( 'Must pass a Page object' )
+    _, decoder = projectionArguments( profile )
+    try:
+      items = queryItems( self.client, {
+        **self._pageQuery(
+          page, '#gsi1sk BETWEEN :start AND :end',
+          sortKeyRange( 'VISIT#', start, end ), profile
+        ),
+        'ScanIndexForward': not descending
+      }, limit )
+      return { 'visits': [ decoder( item ) for item in items ] }
+    except ClientError as e:
+      print( f'ERROR getPageVisits: { e }' )
+      return { 'error': 'Could not get visits from table' }
+
+  def getPageDetails( self, page, profile = 'full' ):
+    '''Gets a page and its days, weeks, months, and years of analytics.
+
+    The projection profile only applies to the page's visits. The 'full'
+    profile reads every attribute, 'visits-light' reads everything but the
+    scroll events, and 'rollup-inputs' reads only what the rollups use.
+
+    Parameters
+    ----------
+    page : Page
+      The page to request the details of.
+    profile : str, optional
+      The projection profile of the visits. (default is 'full')
+
+    Raises
+    ------
+    Exception
+      When the items returned by the query are not either a visit, session,
+      page, day, week, month, or year.
+    KeyError
+      When the items returned are not structured as expected
+    ClientError
+      When the DynamoDB client raises an exception.
+
+    Returns
+    -------
+    result : dict
+      The result of requesting the page from the table. This contains either the
+      error that occurred or the page's analytics.
+    '''
+    if not isinstance( page, ( Page, Visit ) ):
+      raise ValueError( 'Must pass a Page object' )
+    return self._cachedRead(
+      page.gsi1pk()['S'], ( 'page', profile ),
+      lambda: self._readPageDetails( page, profile )
+    )
+
+  def _readPageDetails( self, page, profile ):
+    '''Reads a page and its analytics from the table.
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception.
+    '''
+    _, decoder = projectionArguments( profile )
+    try:
+      with ThreadPoolExecutor( max_workers = MAX_QUERIES ) as executor:
+        first = executor.submit( self._pageVisitBound, page, True )
+        last = executor.submit( self._pageVisitBound, page, False )
+        # Query the analytics while the months of visits are found.
+        queries = [
+          executor.submit(
+            self._queryPageItems, page, 'begins_with( #gsi1sk, :prefix )',
+            { ':prefix': { 'S': prefix } }
+          )
+          for prefix in PAGE_PREFIXES
+        ]
+        queries += [
+          executor.submit(
+            self._queryPageItems, page, '#gsi1sk BETWEEN :start AND :end',
+            { ':start': { 'S': start }, ':end': { 'S': end } }, profile
+          )
+          for start, end in _visitRanges( first.result(), last.result() )
+        ]
+        # The ranges are in key order, so the items are in the same order as
+        # a single query of the partition.
+        items = [ item for query in queries for item in query.result() ]
+      # Return the error when there are no items returned from the table.
+      if len( items ) == 0:
+        return { 'error': 'Page not in table' }
+      # Use a dictionary to store the items returned from the table
+      data = {
+        'visits': [], 'days': [], 'weeks': [], 'months': [], 'years': []
+      }
+      return _parsePageDetails( data, { 'Items': items }, decoder )
+    except ClientError as e:
+      print( f'ERROR getPageDetails: { e }')
+      return { 'error': 'Could not get page from table' }
+
+  def iterPageDetails( self, page, profile = 'full', prefetch = False ):
+    '''Iterates over a page, its analytics, and its visits page by page.
+
+    The ranges of the page's partition are queried one after the other in key
+    order, so the days, months, page, weeks, and years are returned before
+    the visits. The items are parsed as every page of a query is returned, so
+    only one page, or two when prefetching, is held at once.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page to request the details of.
+    profile : str, optional
+      The projection profile of the visits. (default is 'full')
+    prefetch : bool, optional
+      Whether to request the next page while the current one is used. (default
+      is False)
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception while iterating.
+
+    Returns
+    -------
+      An iterable that iterates over the page's days, months, page, weeks,
+      years, and visits.
+    '''
+    if not isinstance( page, ( Page, Visit ) ):
+      raise ValueError( 'Must pass a Page object' )
+    _, decoder = projectionArguments( profile )
+    # Only the visits are projected.
+    requests = [
+      self._pageQuery(
+        page, 'begins_with( #gsi1sk, :prefix )',
+        { ':prefix': { 'S': prefix } },
+        profile if prefix == 'VISIT#' else 'full'
+      )
+      for prefix in PAGE_PREFIXES + ( 'VISIT#', )
+    ]
+    return (
+      entity
+      for request in requests
+      for result in paginate( self.client, 'query', request, prefetch )
+      for entity in _parsePageItems( result['Items'], decoder )
+    )
+
+  def _pageVisitBound( self, page, first ):
+    '''Returns the GSI1 sort key of a page's first or last visit.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page the visits belong to.
+    first : bool
+      Whether to return the first visit's sort key instead of the last.
+
+    Returns
+    -------
+    sortKey : str | None
+      The sort key of the visit. When the page has no visits, there is no sort
+      key.
+    '''
+    result = self.client.query(
+      TableName = self.tableName,
+      IndexName = 'GSI1',
+      KeyConditionExpression = \
+        '#gsi1 = :gsi1 AND begins_with( #gsi1sk, :visit )',
+      ExpressionAttributeNames = { '#gsi1': 'GSI1PK', '#gsi1sk': 'GSI1SK' },
+      ExpressionAttributeValues = {
+        ':gsi1': page.gsi1pk(), ':visit': { 'S': 'VISIT#' }
+      },
+      ScanIndexForward = first,
+      Limit = 1
+    )
+    if len( result['Items'] ) == 0:
+      return None
+    return result['Items'][0]['GSI1SK']['S']
+
+def _bucketKeyRange( granularity, start = None, end = None ):
+  '''Returns the sort keys of the rollups of a granularity between two dates.
+
+  Parameters
+  ----------
+  granularity : str
+    Either 'day', 'week', 'month', or 'year'.
+  start : datetime.datetime, optional
+    A date in the first rollup. (default is None)
+  end : datetime.datetime, optional
+    A date in the last rollup. (default is None)
+
+  Returns
+  -------
+  values : dict
+    The ':start' and ':end' values of a 'BETWEEN :start AND :end' condition.
+  '''
+  if start is not None and end is not None and start > end:
+    raise ValueError( 'Must end the range after it starts' )
+  prefix = f'#{ granularity.upper() }#'
+  dates = [ date for date in ( start, end ) if date is not None ]
+  codes, labels = bucketCodes(
+    np.array( dates, dtype = 'datetime64[ms]' ), granularity
+  )
+  labels = [ labels[code] for code in codes ]
+  return {
+    ':start': { 'S': prefix + ( labels[0] if start is not None else '' ) },
+    # The labels start with digits, which sort before '~'.
+    ':end': { 'S': prefix + ( labels[-1] if end is not None else '~' ) }
+  }
+
+def _visitRanges( first, last ):
+  '''Splits the GSI1 sort keys of a page's visits by month.
+
+  Parameters
+  ----------
+  first : str | None
+    The sort key of the page's first visit.
+  last : str | None
+    The sort key of the page's last visit.
+
+  Returns
+  -------
+  ranges : list[ tuple ]
+    The inclusive start and end sort keys of every month in key order. The
+    first and last ranges are open so that visits added after the first and
+    last visits were found are still queried.
+  '''
+  if first is None or last is None:
+    return []
+  year, month = int( first[6:10] ), int( first[11:13] )
+  boundaries = []
+  while f'{ year }-{ str( month ).zfill( 2 ) }' < last[6:13]:
+    month += 1
+    if month > 12:
+      year, month = year + 1, 1
+    boundaries.append( f'VISIT#{ year }-{ str( month ).zfill( 2 ) }' )
+  # No visit's sort key is only a month, so the ranges do not overlap.
+  return list( zip( [ 'VISIT#' ] + boundaries, boundaries + [ 'VISIT$' ] ) )
+
+def _parsePageDetails( data, result, decoder = DECODERS['visit'] ):
+  '''Parses the DynamoDB items to their respective objects.
+
+  Parameters
+  ----------
+  data : dict
+    The parsed data as a dictionary.
+  result : dict
+    The result of the DynamoDB query.
+  decoder : function, optional
+    The function that parses the visits. (default is decodeVisit)
+
+  Returns
+  data : dict
+    The original parsed data combined with the new parsed data.
+  '''
+  for entity in _parsePageItems( result['Items'], decoder ):
+    if isinstance( entity, Visit ):
+      data['visits'].append( entity )
+    elif isinstance( entity, Page ):
+      data['page'] = entity
+    elif isinstance( entity, Day ):
+      data['days'].append( entity )
+    elif isinstance( entity, Week ):
+      data['weeks'].append( entity )
+    elif isinstance( entity, Month ):
+      data['months'].append( entity )
+    elif isinstance( entity, Year ):
+      data['years'].append( entity )
+  return data
+
+def _parsePageItems( items, decoder = DECODERS['visit'] ):
+  '''Parses the DynamoDB items to their respective objects.
+
+  Parameters
+  ----------
+  items : list[ dict ]
+    The raw DynamoDB items of a page.
+  decoder : function, optional
+    The function that parses the visits. (default is decodeVisit)
+
+  Returns
+  -------
+    An iterable that iterates over the parsed objects.
+  '''
+  decoders = {
+    **{ itemType: DECODERS[itemType] for itemType in PAGE_TYPES },
+    'visit': decoder
+  }
+  for item in items:
+    if item['Type']['S'] in decoders:
+      yield decoders[item['Type']['S']]( item )
@@ -0,0 +1,623 @@
+import os
+import sys
+import hashlib
+import datetime
+import numpy as np
+from botocore.exceptions import ClientError
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Visit, Page, Year, Aggregate # pylint: disable=wrong-import-position
+from dynamo.entities import formatDate, itemToAggregate # pylint: disable=wrong-import-position
+from dynamo.entities import DECODERS, decodeLightVisit # pylint: disable=wrong-import-position
+from dynamo.data.rollup import rollupVisits, bucketCodes, bucketRange # pylint: disable=wrong-import-position
+from dynamo.data.util import backoff, MAX_MERGES # pylint: disable=wrong-import-position
+
+class _PageRollups():
+  def addYear( self, visits ):
+    '''Adds a year item to the table.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The list of visits from a specific year for the specific page.
+
+    Returns
+    -------
+    result : dict
+      The result of adding the year to the table. This could be the error that
+      occurs or the year object added to the table.
+    '''
+    _validateVisits( visits )
+    years = rollupVisits( visits, ( 'year', ) )['years']
+    if len( years ) != 1:
+      raise ValueError( 'List of visits must be from the same year' )
+    return self._putRollup( years[0], 'year' )
+
+  def addMonth( self, visits ):
+    '''Adds a month item to the table.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The list of visits from a specific month for the specific page.
+
+    Returns
+    -------
+    result : dict
+      The result of adding the month to the table. This could be the error that
+      occurs or the month object added to the table.
+    '''
+    _validateVisits( visits )
+    months = rollupVisits( visits, ( 'month', ) )['months']
+    if len( months ) != 1:
+      raise ValueError( 'List of visits must be from the same year and month' )
+    return self._putRollup( months[0], 'month' )
+
+  def addWeek( self, visits ):
+    '''Adds a week item to the table.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The list of visits from a specific week for the specific page.
+
+    Returns
+    -------
+    result : dict
+      The result of adding the week to the table. This could be the error that
+      occurs or the week object added to the table.
+    '''
+    _validateVisits( visits )
+    weeks = rollupVisits( visits, ( 'week', ) )['weeks']
+    if len( weeks ) != 1:
+      raise ValueError( 'List of visits must be from the same year and week' )
+    return self._putRollup( weeks[0], 'week' )
+
+  def addDay( self, visits ):
+    '''Adds a day item to the table.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The list of visits from a specific day for the specific page.
+
+    Returns
+    -------
+    result : dict
+      The result of adding the day to the table. This could be the error that
+      occurs or the day object added to the table.
+    '''
+    _validateVisits( visits )
+    days = rollupVisits( visits, ( 'day', ) )['days']
+    if len( days ) != 1:
+      raise ValueError(
+        'List of visits must be from the same year, month, and day'
+      )
+    return self._putRollup( days[0], 'day' )
+
+  def addPage( self, visits ):
+    '''Adds the page item to the table.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The list of all visits for the specific page.
+
+    Returns
+    -------
+    result : dict
+      The result of adding the page to the table. This could be the error that
+      occurs or the page object added to the table.
+    '''
+    _validateVisits( visits )
+    page = rollupVisits( visits, ( 'page', ) )['page']
+    return self._putRollup( page, 'page' )
+
+  def _putRollup( self, rollup, rollupType ):
+    '''Puts a page, day, week, month, or year item in the table.
+
+    Parameters
+    ----------
+    rollup : Page | Day | Week | Month | Year
+      The rolled up analytics to put in the table.
+    rollupType : str
+      The name of the rollup's type.
+
+    Returns
+    -------
+    result : dict
+      The result of adding the rollup to the table. This could be the error
+      that occurs or the rollup object added to the table.
+    '''
+    try:
+      self.client.put_item( TableName = self.tableName, Item = rollup.toItem() )
+      self._invalidate( rollup )
+      return { rollupType: rollup }
+    except ClientError as e:
+      print( f'ERROR add{ rollupType.capitalize() }: { e }' )
+      return { 'error': f'Could not add new { rollupType } to table' }
+
+  def updatePage( self, visits, touchedOnly = False ):
+    '''Adds the page, and its days/weeks/months/years to the table.
+
+    The visits are rolled up with a single pass per granularity before the
+    items are written to the table.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The specific page's visits that are processed to the page, days, weeks,
+      months, and years items.
+    touchedOnly : bool, optional
+      Whether the visits are only the page's new visits. When they are, only
+      the days, weeks, months, and years the new visits fall in are
+      recalculated, along with the page. (default is False)
+
+    Returns
+    -------
+    results : dict
+      The result of adding the new page, days, weeks, months, and years. This
+      could be either the error that occurs or the new page, days, weeks,
+      months, and years.
+    '''
+    if not isinstance( visits, list ):
+      raise ValueError( 'Must pass a list of Visit objects' )
+    if not all(
+      isinstance( visit, Visit ) for visit in visits
+    ):
+      raise ValueError( 'List of visits must be of Visit type' )
+    _validateVisits( visits )
+    if touchedOnly:
+      return self._updateTouchedBuckets( visits )
+    rollups = rollupVisits( visits )
+    for rollupType in ( 'day', 'week', 'month', 'year' ):
+      for rollup in rollups[f'{ rollupType }s']:
+        result = self._putRollup( rollup, rollupType )
+        if 'error' in result.keys():
+          return { 'error': result['error'] }
+    result = self._putRollup( rollups['page'], 'page' )
+    if 'error' in result.keys():
+      return { 'error': result['error'] }
+    return rollups
+
+  def _updateTouchedBuckets( self, visits ):
+    '''Recalculates the days, weeks, months, and years new visits fall in.
+
+    Only the visits of the touched days, weeks, and months are queried from
+    the table. The touched years and the page are merged from the mergeable
+    analytics of their months and years. Pages written without mergeable
+    analytics are rebuilt from all of their visits instead.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The specific page's new visits.
+
+    Returns
+    -------
+    results : dict
+      The result of adding the touched days, weeks, months, and years and the
+      page. This could be either the error that occurs or the new page, days,
+      weeks, months, and years.
+    '''
+    page = visits[0]
+    dates = np.array(
+      [ visit.date for visit in visits ], dtype = 'datetime64[ms]'
+    )
+    touched = {
+      granularity: set( bucketCodes( dates, granularity )[1] )
+      for granularity in ( 'day', 'week', 'month', 'year' )
+    }
+    # Combine the overlapping weeks and months into the ranges of visits to
+    # query.
+    ranges = []
+    for start, end in sorted(
+      bucketRange( granularity, label )
+      for granularity in ( 'week', 'month' ) for label in touched[granularity]
+    ):
+      if len( ranges ) > 0 and \
+        start - ranges[-1][1] <= datetime.timedelta( milliseconds = 1 ):
+        ranges[-1] = ( ranges[-1][0], max( ranges[-1][1], end ) )
+      else:
+        ranges.append( ( start, end ) )
+    try:
+      # Use the visits' keys to combine the new visits with the ones in the
+      # table.
+      bucket_visits = { ( visit.id, visit.date ): visit for visit in visits }
+      for start, end in ranges:
+        for item in self._queryPageItems(
+          page, '#gsi1sk BETWEEN :start AND :end', {
+            ':start': { 'S': f'VISIT#{ formatDate( start ) }' },
+            ':end': { 'S': f'VISIT#{ formatDate( end ) }' }
+          }, 'rollup-inputs'
+        ):
+          visit = decodeLightVisit( item )
+          bucket_visits.setdefault( ( visit.id, visit.date ), visit )
+      rollups = rollupVisits(
+        list( bucket_visits.values() ), ( 'day', 'week', 'month' )
+      )
+      results = {
+        f'{ granularity }s': [
+          rollup for rollup in rollups[f'{ granularity }s']
+          if rollup.key()['SK']['S'].split( '#' )[2] in touched[granularity]
+        ]
+        for granularity in ( 'day', 'week', 'month' )
+      }
+      merged = self._mergeTouchedYears(
+        page, touched['year'], results['months']
+      )
+      if merged is None:
+        return self.rebuildPage( page )
+      results['years'], results['page'] = merged
+    except ClientError as e:
+      print( f'ERROR updatePage: { e }' )
+      return { 'error': 'Could not get page from table' }
+    for rollupType in ( 'day', 'week', 'month', 'year' ):
+      for rollup in results[f'{ rollupType }s']:
+        result = self._putRollup( rollup, rollupType )
+        if 'error' in result.keys():
+          return { 'error': result['error'] }
+    result = self._putRollup( results['page'], 'page' )
+    if 'error' in result.keys():
+      return { 'error': result['error'] }
+    return results
+
+  def _mergeTouchedYears( self, page, years, months ):
+    '''Merges the touched years from their months and the page from its years.
+
+    Parameters
+    ----------
+    page : Visit
+      One of the page's visits.
+    years : set[ str ]
+      The touched years.
+    months : list[ Month ]
+      The recalculated months of the touched years.
+
+    Returns
+    -------
+    result : tuple[ list[ Year ], Page ] | None
+      The touched years and the page. When an item does not have mergeable
+      analytics, there are none.
+    '''
+    rollups = []
+    for year in sorted( years ):
+      aggregate = self._mergeAggregates( page, f'#MONTH#{ year }-', months )
+      if aggregate is None:
+        return None
+      rollups.append( Year(
+        page.slug, page.title, year, *aggregate.analytics(), aggregate
+      ) )
+    aggregate = self._mergeAggregates( page, '#YEAR#', rollups )
+    if aggregate is None:
+      return None
+    return rollups, Page(
+      page.slug, page.title, *aggregate.analytics(), aggregate
+    )
+
+  def _mergeAggregates( self, page, prefix, rollups ):
+    '''Merges the mergeable analytics of a page's items.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page the items belong to.
+    prefix : str
+      The beginning of the sort keys of the items to merge.
+    rollups : list[ Day | Week | Month | Year ]
+      The recalculated rollups that replace their items in the table.
+
+    Returns
+    -------
+    aggregate : Aggregate | None
+      The merged analytics. When an item does not have mergeable analytics,
+      there are none.
+    '''
+    aggregates = {
+      item['GSI1SK']['S']: itemToAggregate( item )
+      for item in self._queryPageItems(
+        page, 'begins_with( #gsi1sk, :prefix )', {
+          ':prefix': { 'S': prefix }
+        }
+      )
+    }
+    for rollup in rollups:
+      aggregates[rollup.key()['SK']['S']] = rollup.aggregate
+    if any( aggregate is None for aggregate in aggregates.values() ):
+      return None
+    merged = Aggregate()
+    for aggregate in aggregates.values():
+      merged.merge( aggregate )
+    return merged
+
+  def incrementPage( self, visits ):
+    '''Adds new visits to the page, and its days/weeks/months/years.
+
+    The mergeable analytics of the new visits are added to the items already
+    in the table with conditional updates, so the page's older visits are
+    never read. Pages written without mergeable analytics are rebuilt from all
+    of their visits instead.
+
+    Every item remembers the last batch of visits added to it, so adding the
+    same visits again, like when a stream batch is retried, does not count
+    them twice. Only the last batch is remembered, so visits added again after
+    another batch was added to the item are counted twice.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The specific page's new visits.
+
+    Returns
+    -------
+    results : dict
+      The result of updating the page, days, weeks, months, and years. This
+      could be either the error that occurs or the updated page, days, weeks,
+      months, and years.
+    '''
+    if not isinstance( visits, list ):
+      raise ValueError( 'Must pass a list of Visit objects' )
+    if not all(
+      isinstance( visit, Visit ) for visit in visits
+    ):
+      raise ValueError( 'List of visits must be of Visit type' )
+    _validateVisits( visits )
+    rollups = rollupVisits( visits )
+    batch = _batchKey( visits )
+    results = { 'days': [], 'weeks': [], 'months': [], 'years': [] }
+    try:
+      for rollupType in ( 'day', 'week', 'month', 'year', 'page' ):
+        for rollup in rollups[f'{ rollupType }s'] \
+          if rollupType != 'page' else [ rollups['page'] ]:
+          result = self._incrementRollup( rollup, rollupType, batch )
+          if 'error' in result.keys():
+            return { 'error': result['error'] }
+          if 'rebuild' in result.keys():
+            return self.rebuildPage( rollups['page'] )
+          if rollupType == 'page':
+            results['page'] = result['page']
+          else:
+            results[f'{ rollupType }s'].append( result[rollupType] )
+      return results
+    finally:
+      self._invalidate( rollups['page'] )
+
+  def _incrementRollup( self, rollup, rollupType, batch ):
+    '''Adds the mergeable analytics of a rollup to its item in the table.
+
+    The item is read, merged with the rollup, and written only when no other
+    update has changed its sketches since. Otherwise it is read and merged
+    again after a jittered backoff, up to `MAX_MERGES` times. The counters and
+    sketches are written together along with the batch's key, so a batch
+    that is processed again is not added twice.
+
+    Parameters
+    ----------
+    rollup : Page | Day | Week | Month | Year
+      The rolled up analytics of the new visits.
+    rollupType : str
+      The name of the rollup's type.
+    batch : str
+      The key of the batch of visits the rollup was made from.
+
+    Returns
+    -------
+    result : dict
+      The result of updating the rollup. This could be the error that occurs,
+      whether the item must be rebuilt, or the updated rollup object.
+    '''
+    parser = DECODERS[rollupType]
+    for retries in range( MAX_MERGES ):
+      if retries > 0:
+        backoff( retries )
+      try:
+        result = self.client.get_item(
+          TableName = self.tableName, Key = rollup.key(), ConsistentRead = True
+        )
+        if 'Item' not in result.keys():
+          self.client.put_item(
+            TableName = self.tableName,
+            Item = { **rollup.toItem(), 'LastBatch': { 'S': batch } },
+            ConditionExpression = 'attribute_not_exists(PK)'
+          )
+          return { rollupType: rollup }
+        # Items without mergeable analytics can only be recalculated from all
+        # of the page's visits.
+        if 'VisitCount' not in result['Item'].keys():
+          return { 'rebuild': True }
+        if result['Item'].get( 'LastBatch' ) == { 'S': batch }:
+          return { rollupType: parser( result['Item'] ) }
+        merged = self._mergeSketches( result['Item'], rollup, parser, batch )
+        self._refreshRollup( merged )
+        return { rollupType: merged }
+      except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+          print( f'ERROR incrementPage: { e }' )
+          return { 'error': f'Could not update { rollupType } in table' }
+    # The item kept changing, so it is recalculated from the page's visits.
+    return { 'rebuild': True }
+
+  def _mergeSketches( self, item, rollup, parser, batch ):
+    '''Merges the analytics of new visits into the analytics of an item.
+
+    The visitor sketch and the from and to page sketches can not be added to
+    in an update expression, so the merged sketches are only written when the
+    item's sketches and last batch have not changed since they were read. The
+    counters are added in the same update, so they never disagree with the
+    sketches. Only some of the visits are known, so the number of unique
+    visitors is estimated from the merged sketch.
+
+    Parameters
+    ----------
+    item : dict
+      The raw DynamoDB item.
+    rollup : Page | Day | Week | Month | Year
+      The rolled up analytics of the new visits.
+    parser : function
+      The function that parses the item into its rollup.
+    batch : str
+      The key of the batch of visits the rollup was made from.
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception, or the item changed since
+      it was read.
+
+    Returns
+    -------
+    rollup : Page | Day | Week | Month | Year
+      The rollup parsed from the updated item.
+    '''
+    aggregate = rollup.aggregate
+    merged = parser( item ).aggregate
+    merged.visitors.merge( aggregate.visitors )
+    merged.fromCount.merge( aggregate.fromCount )
+    merged.toCount.merge( aggregate.toCount )
+    mergedItem = { **merged.toItem(), 'LastBatch': { 'S': batch } }
+    newItem = aggregate.toItem()
+    # Items written before the sketches hold the visitors in a string set and
+    # the pages in maps.
+    stored = ( 'LastBatch', 'VisitorSketch', 'FromSketch', 'ToSketch' )
+    conditions = []
+    values = {
+      ':title': { 'S': rollup.title }, ':visits': newItem['VisitCount'],
+      ':timeSum': newItem['TimeSum'], ':timeCount': newItem['TimeCount'],
+      ':churn': newItem['ChurnCount'],
+      ':numberVisitors': { 'N': str( merged.numberVisitors() ) }
+    }
+    for index, name in enumerate( stored ):
+      if name in item.keys():
+        conditions.append( f'#s{ index } = :stored{ index }' )
+        values[f':stored{ index }'] = item[name]
+      else:
+        conditions.append( f'attribute_not_exists(#s{ index })' )
+      values[f':s{ index }'] = mergedItem[name]
+    result = self.client.update_item(
+      TableName = self.tableName,
+      Key = rollup.key(),
+      ConditionExpression = ' AND '.join( conditions ),
+      UpdateExpression = 'SET #title = :title, ' + \
+        '#numberVisitors = :numberVisitors, ' + \
+        '#s0 = :s0, #s1 = :s1, #s2 = :s2, #s3 = :s3 ' + \
+        'ADD #visits :visits, #timeSum :timeSum, ' + \
+        '#timeCount :timeCount, #churn :churn ' + \
+        'REMOVE #visitors, #fromCount, #toCount',
+      ExpressionAttributeNames = {
+        '#title': 'Title', '#visits': 'VisitCount', '#timeSum': 'TimeSum',
+        '#timeCount': 'TimeCount', '#churn': 'ChurnCount',
+        '#numberVisitors': 'NumberVisitors',
+        '#s0': stored[0], '#s1': stored[1], '#s2': stored[2],
+        '#s3': stored[3], '#visitors': 'Visitors', '#fromCount': 'FromCount',
+        '#toCount': 'ToCount'
+      },
+      ExpressionAttributeValues = values,
+      ReturnValues = 'ALL_NEW'
+    )
+    return parser( result['Attributes'] )
+
+  def _refreshRollup( self, rollup ):
+    '''Sets the ratios of an item to the ones of its mergeable analytics.
+
+    The ratios are only set when no other update has changed the item since,
+    otherwise the latest update sets them.
+
+    Parameters
+    ----------
+    rollup : Page | Day | Week | Month | Year
+      The rollup parsed from the updated item.
+    '''
+    item = rollup.toItem()
+    try:
+      self.client.update_item(
+        TableName = self.tableName,
+        Key = rollup.key(),
+        ConditionExpression = '#visits = :visits',
+        UpdateExpression = 'SET #numberVisitors = :numberVisitors, ' + \
+          '#averageTime = :averageTime, #percentChurn = :percentChurn, ' + \
+          '#fromPage = :fromPage, #toPage = :toPage',
+        ExpressionAttributeNames = {
+          '#visits': 'VisitCount', '#numberVisitors': 'NumberVisitors',
+          '#averageTime': 'AverageTime', '#percentChurn': 'PercentChurn',
+          '#fromPage': 'FromPage', '#toPage': 'ToPage'
+        },
+        ExpressionAttributeValues = {
+          ':visits': item['VisitCount'],
+          ':numberVisitors': item['NumberVisitors'],
+          ':averageTime': item['AverageTime'],
+          ':percentChurn': item['PercentChurn'],
+          ':fromPage': item['FromPage'],
+          ':toPage': item['ToPage']
+        }
+      )
+    except ClientError as e:
+      if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+        print( f'ERROR incrementPage: { e }' )
+
+  def rebuildPage( self, page ):
+    '''Recalculates the page, and its days/weeks/months/years from all of
+    its visits.
+
+    Parameters
+    ----------
+    page : Page | Visit
+      The page to rebuild.
+
+    Returns
+    -------
+    results : dict
+      The result of adding the new page, days, weeks, months, and years. This
+      could be either the error that occurs or the new page, days, weeks,
+      months, and years.
+    '''
+    if not isinstance( page, ( Page, Visit ) ):
+      raise ValueError( 'Must pass a Page object' )
+    # The cached details could be older than the table's.
+    page_details = self._readPageDetails( page, 'rollup-inputs' )
+    if 'error' in page_details.keys():
+      return { 'error': page_details['error'] }
+    return self.updatePage( page_details['visits'] )
+
+def _validateVisits( visits ):
+  '''Validates that the visits are from a single page.
+
+  Parameters
+  ----------
+  visits : list[ Visit ]
+    The visits to be rolled up.
+
+  Raises
+  ------
+  ValueError
+    When the visits are not a list or are from more than one page.
+  '''
+  if not isinstance( visits, list ):
+    raise ValueError( 'Must pass a list' )
+  if len( {visit.slug for visit in visits } ) != 1:
+    raise ValueError( 'List of visits must have the same slug' )
+  if len( {visit.title for visit in visits } ) != 1:
+    raise ValueError( 'List of visits must have the same title' )
+
+def _batchKey( visits ):
+  '''Returns the key of a batch of visits.
+
+  The key only depends on which visits are in the batch, so it is the same
+  when the batch is processed again.
+
+  Parameters
+  ----------
+  visits : list[ Visit ]
+    The visits added to the page's analytics together.
+
+  Returns
+  -------
+  key : str
+    The hex digest of the visits' primary keys.
+  '''
+  digest = hashlib.sha256()
+  for key in sorted(
+    visit.key()['PK']['S'] + visit.key()['SK']['S'] for visit in visits
+  ):
+    digest.update( key.encode() + b'\n' )
+  return digest.hexdigest()
@@ -5,8 +5,9 @@ from botocore.exceptions import ClientError
 sys.path.append(
   os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
 )
-from dynamo.entities import Session, Visit # pylint: disable=wrong-import-position
-from dynamo.entities import itemToVisit, itemToSession # pylint: disable=wrong-import-position
+from dynamo.entities import Session, Visit, Visitor # pylint: disable=wrong-import-position
+from dynamo.entities import DECODERS # pylint: disable=wrong-import-position
+from dynamo.data.util import paginate, queryItems, sortKeyRange # pylint: disable=wrong-import-position
 
 class _Session():
   def addSession( self, session ):
@@ -30,6 +31,7 @@ class _Session():
         Item = session.toItem(),
         ConditionExpression = 'attribute_not_exists(PK)'
       )
+      self._invalidate( session )
       return { 'session': session }
     except ClientError as e:
       print( f'ERROR addsession: { e }')
@@ -60,6 +62,7 @@ class _Session():
         Key = session.key(),
         ConditionExpression = 'attribute_exists(PK)'
       )
+      self._invalidate( session )
       return { 'session': session }
     except ClientError as e:
       print( f'ERROR removeSession: { e }' )
@@ -141,49 +144,125 @@ class _Session():
       The result of getting the session from the table. This contains either
       the error that occurred or the session and its visits.
     '''
+    if not isinstance( session, Session ):
+      raise ValueError( 'Must pass a Session object' )
+    return self._cachedRead(
+      session.gsi2pk()['S'], ( 'session', ),
+      lambda: self._readSessionDetails( session )
+    )
+
+  def _readSessionDetails( self, session ):
+    '''Reads the session and visits from the table.'''
+    data = { 'visits': [] }
     try:
-      result = self.client.query(
-        TableName = self.tableName,
-        IndexName = 'GSI2',
-        KeyConditionExpression = '#gsi2 = :gsi2',
-        ExpressionAttributeNames = { '#gsi2': 'GSI2PK' },
-        ExpressionAttributeValues = { ':gsi2': session.gsi2pk() },
-        ScanIndexForward = True
-      )
-      if len( result['Items'] ) == 0:
+      for entity in self.iterSessionItems( session, True ):
+        if isinstance( entity, Visit ):
+          data['visits'].append( entity )
+        else:
+          data['session'] = entity
+      if len( data['visits'] ) == 0 and 'session' not in data.keys():
         return { 'error': 'Session not in table' }
-      data = { 'visits': [] }
-      for item in result['Items']:
-        if item['Type']['S'] == 'visit':
-          data['visits'].append( itemToVisit( item ) )
-        elif item['Type']['S'] == 'session':
-          data['session'] = itemToSession( item )
-      # DynamoDB is limited in 1MB of query results. Continue to query from the
-      # 'LastEvaluatedKey' when this condition is met.
-      if 'LastEvaluatedKey' in result.keys():
-        still_querying = True
-        while still_querying:
-          result = self.client.query.scan(
-            TableName = self.tableName,
-            IndexName = 'GSI2',
-            KeyConditionExpression = '#gsi2 = :gsi2',
-            ExpressionAttributeNames = { '#gsi2': 'GSI2PK' },
-            ExpressionAttributeValues = { ':gsi2': session.gsi2pk() },
-            ScanIndexForward = True,
-            ExclusiveStartKey = result['LastEvaluatedKey']
-          )
-          for item in result['Items']:
-            if item['Type']['S'] == 'visit':
-              data['visits'].append( itemToVisit( item ) )
-            elif item['Type']['S'] == 'session':
-              data['session'] = itemToSession( item )
-          if 'LastEvaluatedKey' not in result.keys():
-            still_querying = False
       return data
     except ClientError as e:
       print( f'ERROR getSessionDetails: { e }')
       return { 'error': 'Could not get session from table' }
 
+  def getVisitorSessions(
+    self, visitor, since = None, until = None, limit = None,
+    descending = False
+  ):
+    '''Gets a visitor's sessions that started between two dates.
+
+    Only the sessions in the range are read, so the cost does not grow with
+    the visitor's history.
+
+    Parameters
+    ----------
+    visitor : Visitor
+      The visitor to get the sessions of.
+    since : datetime.datetime, optional
+      The earliest start of the sessions. (default is None)
+    until : datetime.datetime, optional
+      The latest start of the sessions. (default is None)
+    limit : int, optional
+      The most sessions returned. (default is None)
+    descending : bool, optional
+      Whether the latest sessions are returned first. (default is False)
+
+    Returns
+    -------
+    result : dict
+      The result of getting the sessions from the table. This contains either
+      the error that occurred or the sessions ordered by their start.
+    '''
+    if not isinstance( visitor, Visitor ):
+      raise ValueError( 'Must pass a Visitor object' )
+    try:
+      return { 'sessions': self._queryVisitorSessions(
+        visitor, since, until, limit, descending
+      ) }
+    except ClientError as e:
+      print( f'ERROR getVisitorSessions: { e }')
+      return { 'error': 'Could not get sessions from table' }
+
+  def _queryVisitorSessions(
+    self, visitor, since = None, until = None, limit = None,
+    descending = False
+  ):
+    '''Queries a visitor's sessions that started between two dates.
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception.
+    '''
+    return [
+      DECODERS['session']( item )
+      for item in queryItems( self.client, {
+        'TableName': self.tableName,
+        'KeyConditionExpression': '#pk = :pk AND #sk BETWEEN :start AND :end',
+        'ExpressionAttributeNames': { '#pk': 'PK', '#sk': 'SK' },
+        'ExpressionAttributeValues': {
+          ':pk': visitor.pk(), **sortKeyRange( 'SESSION#', since, until )
+        },
+        'ScanIndexForward': not descending
+      }, limit )
+    ]
+
+  def iterSessionItems( self, session, prefetch = False ):
+    '''Iterates over the session and its visits page by page.
+
+    Parameters
+    ----------
+    session : Session
+      The session requested from the table.
+    prefetch : bool, optional
+      Whether to request the next page while the current one is used. (default
+      is False)
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception while iterating.
+
+    Returns
+    -------
+      An iterable that iterates over the session and its visits in key order.
+    '''
+    return (
+      DECODERS[item['Type']['S']]( item )
+      for result in paginate( self.client, 'query', {
+        'TableName': self.tableName,
+        'IndexName': 'GSI2',
+        'KeyConditionExpression': '#gsi2 = :gsi2',
+        'ExpressionAttributeNames': { '#gsi2': 'GSI2PK' },
+        'ExpressionAttributeValues': { ':gsi2': session.gsi2pk() },
+        'ScanIndexForward': True
+      }, prefetch )
+      for item in result['Items']
+      if item['Type']['S'] in ( 'visit', 'session' )
+    )
+
   def updateSession( self, session, visits, print_error = True ):
     '''Updates a session with new visits and attributes.
 
@@ -199,9 +278,9 @@ class _Session():
       raise ValueError( 'Must pass a Session object')
     if not isinstance( visits, list ):
       raise ValueError( 'Must pass a list of Visit objects' )
-    if not all( [
+    if not all(
       isinstance( visit, Visit ) for visit in visits
-    ] ):
+    ):
       raise ValueError( 'List of visits must be of Visit type' )
     try:
       self.client.put_item(
@@ -209,6 +288,7 @@ class _Session():
         Item = session.toItem(),
         ConditionExpression = 'attribute_exists(PK)'
       )
+      self._invalidate( session )
       return { 'session': session, 'visits': visits }
     except ClientError as e:
       if print_error:
@@ -0,0 +1,163 @@
+import os
+import sys
+from botocore.exceptions import ClientError
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Transitions, Visit, itemToTransitions # pylint: disable=wrong-import-position
+from dynamo.data.rollup import transitionMatrices # pylint: disable=wrong-import-position
+from dynamo.data.util import backoff, MAX_MERGES # pylint: disable=wrong-import-position
+from dynamo.data._pageRollups import _batchKey # pylint: disable=wrong-import-position
+
+class _Transitions():
+  def addTransitions( self, transitions ):
+    '''Adds a day's site-wide page transitions to the table.
+
+    Parameters
+    ----------
+    transitions : Transitions
+      The transitions to be added to the table.
+
+    Returns
+    -------
+    result : dict
+      The result of adding the transitions to the table.
+    '''
+    if not isinstance( transitions, Transitions ):
+      raise ValueError( 'Must pass a Transitions object' )
+    try:
+      self.client.put_item(
+        TableName = self.tableName,
+        Item = transitions.toItem()
+      )
+      return { 'transitions': transitions }
+    except ClientError as e:
+      print( f'ERROR addTransitions: { e }' )
+      return { 'error': 'Could not add new transitions to table' }
+
+  def getTransitions( self, date ):
+    '''Gets a day's site-wide page transitions from the table.
+
+    Parameters
+    ----------
+    date : str
+      The day of the transitions as "<year>-<month>-<day>".
+
+    Returns
+    -------
+    result : dict
+      The result of requesting the transitions from the table. This contains
+      either the error that occurred or the transitions.
+    '''
+    try:
+      result = self.client.get_item(
+        TableName = self.tableName,
+        Key = Transitions( date ).key()
+      )
+      if 'Item' not in result.keys():
+        return { 'error': 'Transitions not in table' }
+      return { 'transitions': itemToTransitions( result['Item'] ) }
+    except ClientError as e:
+      print( f'ERROR getTransitions: { e }' )
+      return { 'error': 'Could not get transitions from table' }
+
+  def incrementTransitions( self, visits ):
+    '''Adds the transitions of new visits to the days' site-wide transitions.
+
+    The stored matrix of every day is merged with the new visits' matrix and
+    written only when no other update has changed it since it was read.
+    Otherwise the day is read and merged again after a jittered backoff, up to
+    `MAX_MERGES` times.
+
+    Every day remembers the last batch of visits added to it, so adding the
+    same visits again, like when a stream batch is retried, does not count
+    them twice.
+
+    Parameters
+    ----------
+    visits : list[ Visit ]
+      The new visits of any number of pages.
+
+    Returns
+    -------
+    result : dict
+      The result of updating the transitions. This could be either the error
+      that occurs or the updated transitions of every day.
+    '''
+    if not isinstance( visits, list ):
+      raise ValueError( 'Must pass a list' )
+    if any( not isinstance( visit, Visit ) for visit in visits ):
+      raise ValueError( 'Must pass Visit objects' )
+    batch = _batchKey( visits )
+    results = []
+    try:
+      for transitions in transitionMatrices( visits ):
+        merged = self._mergeTransitions( transitions, batch )
+        if merged is None:
+          print(
+            'ERROR incrementTransitions: ' +
+            f'{ transitions.key() } changed before every write'
+          )
+          return { 'error': 'Could not merge transitions in table' }
+        results.append( merged )
+      return { 'transitions': results }
+    except ClientError as e:
+      print( f'ERROR incrementTransitions: { e }' )
+      return { 'error': 'Could not update transitions in table' }
+
+  def _mergeTransitions( self, transitions, batch ):
+    '''Merges a day's new transitions into the ones in the table.
+
+    The total number of transitions only grows, so it is used as the version
+    of the stored matrix. The day is left as it is when the batch was already
+    added to it.
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception.
+
+    Returns
+    -------
+    merged : Transitions | None
+      The merged transitions, or None when the stored matrix changed before
+      every write.
+    '''
+    for retries in range( MAX_MERGES ):
+      if retries > 0:
+        backoff( retries )
+      result = self.client.get_item(
+        TableName = self.tableName,
+        Key = transitions.key(),
+        ConsistentRead = True
+      )
+      if 'Item' in result.keys():
+        stored = itemToTransitions( result['Item'] )
+        if result['Item'].get( 'LastBatch' ) == { 'S': batch }:
+          return stored
+        merged = stored.merge( transitions )
+        condition = {
+          'ConditionExpression': '#count = :count AND ' + \
+            '( attribute_not_exists(#batch) OR #batch <> :batch )',
+          'ExpressionAttributeNames': {
+            '#count': 'TransitionCount', '#batch': 'LastBatch'
+          },
+          'ExpressionAttributeValues': {
+            ':count': result['Item']['TransitionCount'],
+            ':batch': { 'S': batch }
+          }
+        }
+      else:
+        merged = transitions
+        condition = { 'ConditionExpression': 'attribute_not_exists(PK)' }
+      try:
+        self.client.put_item(
+          TableName = self.tableName,
+          Item = { **merged.toItem(), 'LastBatch': { 'S': batch } },
+          **condition
+        )
+        return merged
+      except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+          raise
+    return None
@@ -4,8 +4,8 @@ from botocore.exceptions import ClientError
 sys.path.append(
   os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
 )
-from dynamo.entities import Visit # pylint: disable=wrong-import-position
-from dynamo.data.util import chunkList # pylint: disable=wrong-import-position
+from dynamo.entities import Visit, encodeItems # pylint: disable=wrong-import-position
+from dynamo.data.batch import BatchWriteException # pylint: disable=wrong-import-position
 
 class _Visit():
   def addVisit( self, visit ):
@@ -29,6 +29,7 @@ class _Visit():
         Item = visit.toItem(),
         ConditionExpression = 'attribute_not_exists(PK)'
       )
+      self._invalidate( visit )
       return { 'visit': visit }
     except ClientError as e:
       print( f'ERROR addVisit: { e }')
@@ -59,6 +60,7 @@ class _Visit():
         Key = visit.key(),
         ConditionExpression = 'attribute_exists(PK)'
       )
+      self._invalidate( visit )
       return { 'visit': visit }
     except ClientError as e:
       print( f'ERROR removeVisit: { e }' )
@@ -84,24 +86,13 @@ class _Visit():
     if any( not isinstance( visit, Visit ) for visit in visits ):
       raise ValueError( 'Must pass Visit objects' )
     try:
-      if len( visits ) > 25:
-        for sub_visits in chunkList( visits, 25 ):
-          self.client.batch_write_item(
-            RequestItems = {
-              self.tableName: [
-                { 'PutRequest': { 'Item': visit.toItem() } }
-                for visit in sub_visits
-              ] },
-          )
-      else:
-        self.client.batch_write_item(
-          RequestItems = {
-            self.tableName: [
-              { 'PutRequest': { 'Item': visit.toItem() } }
-              for visit in visits
-            ] },
-        )
+      with self.batchWriter() as writer:
+        for item in encodeItems( visits ):
+          writer.put( item )
       return { 'visits': visits }
-    except ClientError as e:
+    except ( ClientError, BatchWriteException ) as e:
       print( f'ERROR addVisits: { e }')
       return { 'error': 'Could not add new page visits to table' }
+    finally:
+      # Some of the batches may have been written when one fails.
+      self._invalidate( *visits )
@@ -1,13 +1,20 @@
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from botocore.exceptions import ClientError
 sys.path.append(
   os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
 )
-from dynamo.entities import Visitor, Session # pylint: disable=wrong-import-position
-from dynamo.entities import itemToVisitor, itemToVisit, itemToSession # pylint: disable=wrong-import-position
-from dynamo.entities import itemToLocation, itemToBrowser # pylint: disable=wrong-import-position
+from dynamo.entities import Visitor, Session, Location, Browser, Visit # pylint: disable=wrong-import-position
+from dynamo.entities import DECODERS, encodeItems # pylint: disable=wrong-import-position
+from dynamo.data.batch import BatchWriteException, BatchGetException, batchGet # pylint: disable=wrong-import-position
+from dynamo.data.projection import projectionArguments # pylint: disable=wrong-import-position
+from dynamo.data.util import paginate, MAX_QUERIES # pylint: disable=wrong-import-position
+
+# The types of items in a visitor's partition other than their visits.
+VISITOR_TYPES = ( 'visitor', 'session', 'location', 'browser' )
 
 class _Visitor:
   def addVisitor( self, visitor ):
@@ -31,6 +38,7 @@ class _Visitor:
         Item = visitor.toItem(),
         ConditionExpression = 'attribute_not_exists(PK)'
       )
+      self._invalidate( visitor )
       return { 'visitor': visitor }
     except ClientError as e:
       print( f'ERROR addVisitor: { e }' )
@@ -59,6 +67,7 @@ class _Visitor:
         Item = visitor.toItem(),
         ConditionExpression = 'attribute_exists(PK)'
       )
+      self._invalidate( visitor )
       return { 'visitor': visitor }
     except ClientError as e:
       print( f'ERROR updateVisitor: { e }' )
@@ -69,6 +78,12 @@ class _Visitor:
   def addNewVisitor( self, visitor, location, browsers, visits ):
     '''Adds a new visitor and their details the the table.
 
+    The visitor, location, and session are conditionally put in a single
+    transaction while the browsers and visits are batch written at the same
+    time, so that adding a new visitor takes about one round trip. When the
+    transaction is cancelled, none of the visitor, location, and session are
+    added, and the browsers and visits that were written are deleted.
+
     Parameters
     ----------
     visitor : Visitor
@@ -85,48 +100,96 @@ class _Visitor:
     result : dict
       The result of adding the visitor and their attributes to the table.
     '''
-    result = self.addVisitor( visitor )
-    if 'error' in result.keys():
-      return { 'error': result['error'] }
-    result = self.addLocation( location )
-    if 'error' in result.keys():
-      return { 'error': result['error'] }
-    result = self.addBrowsers( browsers )
-    if 'error' in result.keys():
-      return { 'error': result['error'] }
-    # Get all of the seconds per page visit that exist.
-    pageTimes = [
-      visit.timeOnPage for visit in visits
-      if isinstance( visit.timeOnPage, float )
-    ]
-    # Calculate the average time the visitor spent on the pages. When there are
-    # no page times, there is no average time.
-    if len( pageTimes ) == 1:
-      averageTime = pageTimes[0]
-    elif len( pageTimes ) > 1:
-      averageTime = np.mean( pageTimes )
-    else:
-      averageTime = None
-    # Calculate the total time spent in this session. When there is only one
-    # visit, there is no total time.
-    if len( visits ) == 1:
-      totalTime = None
-    else:
-      totalTime = np.sum( [ visit.timeOnPage for visit in visits ] )
-    session = Session(
-      visits[0].date, visits[0].id, averageTime, totalTime
-    )
-    result = self.addSession( session )
-    if 'error' in result.keys():
-      return { 'error': result['error'] }
-    result = self.addVisits( visits )
-    if 'error' in result.keys():
-      return { 'error': result['error'] }
+    if not isinstance( visitor, Visitor ):
+      raise ValueError( 'Must pass a Visitor object' )
+    if not isinstance( location, Location ):
+      raise ValueError( 'Must pass a Location object' )
+    if not isinstance( browsers, list ) or not isinstance( visits, list ):
+      raise ValueError( 'Must pass a list' )
+    if any( not isinstance( browser, Browser ) for browser in browsers ):
+      raise ValueError( 'Must pass Browser objects' )
+    if any( not isinstance( visit, Visit ) for visit in visits ):
+      raise ValueError( 'Must pass Visit objects' )
+    session = _visitsToSession( visits )
+    items = list( encodeItems( browsers + visits ) )
+    with ThreadPoolExecutor( max_workers = 1 ) as executor:
+      batch = executor.submit( self._putNewVisitorItems, items )
+      error = self._transactNewVisitor( visitor, location, session )
+      written = batch.result()
+    if error is not None:
+      self._deleteNewVisitorItems( items )
+    elif not written:
+      error = { 'error': 'Could not add new page visits to table' }
+    # The visits are in the visitor's, session's, and pages' partitions.
+    self._invalidate( visitor, session, *browsers, *visits )
+    if error is not None:
+      return error
     return {
       'visitor': visitor, 'location': location, 'browsers': browsers,
       'visits': visits, 'session': session
     }
 
+  def _transactNewVisitor( self, visitor, location, session ):
+    '''Conditionally puts a new visitor, location, and session in the table.
+
+    Returns
+    -------
+    error : dict | None
+      The error that occurred or None when all of them were added.
+    '''
+    try:
+      self.client.transact_write_items( TransactItems = [
+        {
+          'Put': {
+            'TableName': self.tableName,
+            'Item': item.toItem(),
+            'ConditionExpression': 'attribute_not_exists(PK)'
+          }
+        }
+        for item in ( visitor, location, session )
+      ] )
+      return None
+    except ClientError as e:
+      print( f'ERROR addNewVisitor: { e }' )
+      reasons = _cancellationReasons( e )
+      if reasons[0] == 'ConditionalCheckFailed':
+        return { 'error': f'Visitor already in table { visitor }' }
+      if reasons[1] == 'ConditionalCheckFailed':
+        return {
+          'error': f'Visitor\'s location is already in table { location }'
+        }
+      if reasons[2] == 'ConditionalCheckFailed':
+        return {
+          'error': f'Visitor\'s session is already in table { session }'
+        }
+      return { 'error': 'Could not add new visitor to table' }
+
+  def _putNewVisitorItems( self, items ):
+    '''Batch writes the items of a new visitor.
+
+    Returns
+    -------
+    result : bool
+      Whether all of the items were written to the table.
+    '''
+    try:
+      with self.batchWriter() as writer:
+        for item in items:
+          writer.put( item )
+      return True
+    except ( ClientError, BatchWriteException ) as e:
+      print( f'ERROR addNewVisitor: { e }' )
+      return False
+
+  def _deleteNewVisitorItems( self, items ):
+    '''Batch deletes the items of a new visitor that could not be added.'''
+    try:
+      with self.batchWriter() as writer:
+        for item in items:
+          writer.delete( { 'PK': item['PK'], 'SK': item['SK'] } )
+    except ( ClientError, BatchWriteException ) as e:
+      print( f'ERROR addNewVisitor: { e }' )
+
   def removeVisitor( self, visitor ):
     '''Removes a visitor from the table.
 
@@ -148,6 +211,7 @@ class _Visitor:
         Key = visitor.key(),
         ConditionExpression = 'attribute_exists(PK)'
       )
+      self._invalidate( visitor )
       return { 'visitor': visitor }
     except ClientError as e:
       print( f'ERROR removeVisitor: { e }' )
@@ -184,6 +248,7 @@ class _Visitor:
       visitor.numberSessions = int(
         result['Attributes']['NumberSessions']['N']
       )
+      self._updateCachedVisitor( result['Attributes'] )
       return { 'visitor': visitor }
     except ClientError as e:
       print( f'ERROR incrementVisitorSessions: { e }' )
@@ -222,6 +287,7 @@ class _Visitor:
       visitor.numberSessions = int(
         result['Attributes']['NumberSessions']['N']
       )
+      self._updateCachedVisitor( result['Attributes'] )
       return { 'visitor': visitor }
     except ClientError as e:
       print( f'ERROR decrementVisitorSessions: { e }' )
@@ -231,13 +297,29 @@ class _Visitor:
         'error': 'Could not decrement the number of sessions of visitor'
       }
 
-  def getVisitorDetails( self, visitor ):
+  def _updateCachedVisitor( self, item ):
+    '''Sets the visitor of the cached details to the updated one.'''
+    if self.cache is None:
+      return
+    visitor = DECODERS['visitor']( item )
+    self.cache.update(
+      self.tableName, visitor.pk()['S'],
+      lambda details: { **details, 'visitor': visitor }
+    )
+
+  def getVisitorDetails( self, visitor, profile = 'full' ):
     '''Gets the visitor and their details from the table.
 
+    The projection profile only applies to the visitor's visits. The 'full'
+    profile reads every attribute, 'visits-light' reads everything but the
+    scroll events, and 'rollup-inputs' reads only what the rollups use.
+
     Parameters
     ----------
     visitor : Visitor
       The visitor to request from the table.
+    profile : str, optional
+      The projection profile of the visits. (default is 'full')
 
     Returns
     -------
@@ -247,110 +329,300 @@ class _Visitor:
     '''
     if not isinstance( visitor, Visitor ):
       raise ValueError( 'Must pass a Visitor object' )
+    return self._cachedRead(
+      visitor.pk()['S'], ( 'visitor', profile ),
+      lambda: self._readVisitorDetails( visitor, profile )
+    )
+
+  def _readVisitorDetails( self, visitor, profile ):
+    '''Reads the visitor and their details from the table.'''
+    # Use a dictionary to store the items returned from the table
+    data = { 'visits': [], 'browsers': [], 'sessions': [] }
+    numberItems = 0
     try:
-      result = self.client.query(
-        TableName = self.tableName,
-        KeyConditionExpression = '#pk = :pk',
-        ExpressionAttributeNames = { '#pk': 'PK' },
-        ExpressionAttributeValues = { ':pk': visitor.pk() },
-        ScanIndexForward = True
-      )
+      for entity in self.iterVisitorItems( visitor, profile, True ):
+        numberItems += 1
+        if isinstance( entity, Visitor ):
+          data['visitor'] = entity
+        elif isinstance( entity, Visit ):
+          data['visits'].append( entity )
+        elif isinstance( entity, Session ):
+          data['sessions'].append( entity )
+        elif isinstance( entity, Location ):
+          data['location'] = entity
+        elif isinstance( entity, Browser ):
+          data['browsers'].append( entity )
       # Return the error when there are no items returned from the table.
-      if len( result['Items'] ) == 0:
+      if numberItems == 0:
         return { 'error': 'Visitor not in table' }
-      # Use a dictionary to store the items returned from the table
-      data = { 'visits': [], 'browsers': [], 'sessions': [] }
-      data = _parseVisitorDetails( data, result )
-      # DynamoDB is limited in 1MB of query results. Continue to query from the
-      # 'LastEvaluatedKey' when this condition is met.
-      if 'LastEvaluatedKey' in result.keys():
-        still_querying = True
-        while still_querying:
-          result = self.client.query(
-            TableName = self.tableName,
-            KeyConditionExpression = '#pk = :pk',
-            ExpressionAttributeNames = { '#pk': 'PK' },
-            ExpressionAttributeValues = { ':pk': visitor.pk() },
-            ScanIndexForward = True,
-            ExclusiveStartKey = result['LastEvaluatedKey']
-          )
-          data = _parseVisitorDetails( data, result )
-          if 'LastEvaluatedKey' in result.keys():
-            still_querying = False
       return data
     except ClientError as e:
       print( f'ERROR getVisitorDetails: { e }')
       return { 'error': 'Could not get visitor from table' }
 
-  def listVisitors( self ):
+  def getVisitorsDetails( self, visitors, since = None ):
+    '''Gets many visitors with their locations and sessions from the table.
+
+    The visitors and locations are requested with batch gets while every
+    visitor's sessions are queried at the same time. The browsers and visits
+    are not requested.
+
+    Parameters
+    ----------
+    visitors : list[ Visitor ]
+      The visitors to request from the table.
+    since : datetime.datetime, optional
+      The earliest start of the sessions requested. (default is None)
+
+    Returns
+    -------
+    result : dict
+      The result of requesting the visitors from the table. This contains
+      either the error that occurred or the details of every visitor keyed by
+      their ID. The details of the visitors that are not in the table are the
+      error.
+    '''
+    if not isinstance( visitors, list ):
+      raise ValueError( 'Must pass a list' )
+    if any( not isinstance( visitor, Visitor ) for visitor in visitors ):
+      raise ValueError( 'Must pass Visitor objects' )
+    ids = list( dict.fromkeys( visitor.id for visitor in visitors ) )
+    data = {
+      visitorId: { 'sessions': [] } for visitorId in ids
+    }
+    try:
+      with ThreadPoolExecutor( max_workers = MAX_QUERIES ) as executor:
+        sessions = {
+          visitorId: executor.submit(
+            self._queryVisitorSessions, Visitor( visitorId ), since
+          )
+          for visitorId in ids
+        }
+        items = batchGet( self.client, self.tableName, [
+          key
+          for visitorId in ids
+          for key in (
+            Visitor( visitorId ).key(),
+            { 'PK': Visitor( visitorId ).pk(), 'SK': { 'S': '#LOCATION' } }
+          )
+        ] )
+        for visitorId, query in sessions.items():
+          data[visitorId]['sessions'] = query.result()
+      for item in items:
+        if item['Type']['S'] == 'visitor':
+          visitor = DECODERS['visitor']( item )
+          data[visitor.id]['visitor'] = visitor
+        else:
+          location = DECODERS['location']( item )
+          data[location.id]['location'] = location
+      # The visitors without any items are not in the table.
+      for visitorId, details in data.items():
+        if len( details ) == 1 and len( details['sessions'] ) == 0:
+          data[visitorId] = { 'error': 'Visitor not in table' }
+      return data
+    except ( ClientError, BatchGetException ) as e:
+      print( f'ERROR getVisitorsDetails: { e }')
+      return { 'error': 'Could not get visitors from table' }
+
+  def iterVisitorItems( self, visitor, profile = 'full', prefetch = False ):
+    '''Iterates over the visitor and their details page by page.
+
+    The items are parsed as every page of the query is returned, so only one
+    page, or two when prefetching, is held at once.
+
+    Parameters
+    ----------
+    visitor : Visitor
+      The visitor to request from the table.
+    profile : str, optional
+      The projection profile of the visits. (default is 'full')
+    prefetch : bool, optional
+      Whether to request the next page while the current one is used. (default
+      is False)
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception while iterating.
+
+    Returns
+    -------
+      An iterable that iterates over the visitor, location, browsers, sessions,
+      and visits in key order.
+    '''
+    if not isinstance( visitor, Visitor ):
+      raise ValueError( 'Must pass a Visitor object' )
+    _, decoder = projectionArguments( profile )
+    if profile == 'full':
+      requests = [ self._visitorQuery( visitor ) ]
+    else:
+      # The visits are the last items of the visitor's partition, so only
+      # they are projected.
+      requests = [
+        self._visitorQuery(
+          visitor, '#sk < :visit', { ':visit': { 'S': 'VISIT#' } }
+        ),
+        self._visitorQuery(
+          visitor, 'begins_with( #sk, :visit )',
+          { ':visit': { 'S': 'VISIT#' } }, profile
+        )
+      ]
+    return (
+      entity
+      for request in requests
+      for result in paginate( self.client, 'query', request, prefetch )
+      for entity in _parseVisitorItems( result['Items'], decoder )
+    )
+
+  def _visitorQuery(
+    self, visitor, sortKeyCondition = None, values = None, profile = 'full'
+  ):
+    '''Returns the query of a visitor's items with a condition on their sort
+    keys.
+
+    Parameters
+    ----------
+    visitor : Visitor
+      The visitor the items belong to.
+    sortKeyCondition : str, optional
+      The condition on the sort key, which is named '#sk'. (default is None)
+    values : dict, optional
+      The values used in the condition. (default is None)
+    profile : str, optional
+      The projection profile of the items. (default is 'full')
+    '''
+    names = { '#pk': 'PK' }
+    condition = '#pk = :pk'
+    if sortKeyCondition is not None:
+      names['#sk'] = 'SK'
+      condition += f' AND { sortKeyCondition }'
+    projection, _ = projectionArguments( profile, names )
+    return {
+      'TableName': self.tableName,
+      'KeyConditionExpression': condition,
+      **projection,
+      'ExpressionAttributeValues': {
+        ':pk': visitor.pk(), **( values if values is not None else {} )
+      },
+      'ScanIndexForward': True
+    }
+
+  def listVisitors( self, segments = 1 ):
     '''Lists all visitors in the table.
 
+    Parameters
+    ----------
+    segments : int, optional
+      The number of segments of the table scanned at the same time when there
+      is no type index. (default is 1)
+
     Returns
     -------
     visitors : list[ Visitor ]
       The list of visitors from the table.
     '''
-    # Use a list to store the locations returned from the table.
-    visitors = []
     try:
-      result = self.client.scan(
-        TableName = self.tableName,
-        ScanFilter = {
-          'Type': {
-            'AttributeValueList': [ { 'S': 'visitor' } ],
-            'ComparisonOperator': 'EQ'
-          }
-        }
-      )
-      for item in result['Items']:
-        visitors.append( itemToVisitor( item ) )
-      # DynamoDB is limited in 1MB of query results. Continue to query from the
-      # 'LastEvaluatedKey' when this condition is met.
-      if 'LastEvaluatedKey' in result.keys():
-        still_querying = True
-        while still_querying:
-          result = self.client.scan(
-            TableName = self.tableName,
-            ScanFilter = {
-              'Type': {
-                'AttributeValueList': [ { 'S': 'location' } ],
-                'ComparisonOperator': 'EQ'
-              }
-            },
-            ExclusiveStartKey = result['LastEvaluatedKey']
-          )
-          for item in result['Items']:
-            visitors.append( itemToVisitor( item ) )
-          if 'LastEvaluatedKey' not in result.keys():
-            still_querying = False
-      return visitors
+      return list( self.iterVisitors( True, segments ) )
     except ClientError as e:
       print( f'ERROR listVisitors: { e }' )
       return { 'error': 'Could not get visitors from table' }
 
-def _parseVisitorDetails( data, result ):
+  def iterVisitors( self, prefetch = False, segments = 1 ):
+    '''Iterates over all visitors in the table page by page.
+
+    When the client has a type index, the visitors are queried from it.
+    Otherwise, the segments of the table are scanned at the same time and the
+    visitors are returned in the order they arrive.
+
+    Parameters
+    ----------
+    prefetch : bool, optional
+      Whether to request the next page while the current one is used. (default
+      is False)
+    segments : int, optional
+      The number of segments of the table scanned at the same time when there
+      is no type index. (default is 1)
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception while iterating.
+
+    Returns
+    -------
+      An iterable that iterates over the visitors.
+    '''
+    return self._iterType( 'visitor', DECODERS['visitor'], prefetch, segments )
+
+def _visitsToSession( visits ):
+  '''Creates the session of a visitor's visits.
+
+  Parameters
+  ----------
+  visits : list[ Visit ]
+    The visits of the session.
+
+  Returns
+  -------
+  session : Session
+    The session with the visitor's average and total time.
+  '''
+  # Get all of the seconds per page visit that exist.
+  pageTimes = [
+    visit.timeOnPage for visit in visits
+    if isinstance( visit.timeOnPage, float )
+  ]
+  # Calculate the average time the visitor spent on the pages. When there are
+  # no page times, there is no average time.
+  if len( pageTimes ) == 1:
+    averageTime = pageTimes[0]
+  elif len( pageTimes ) > 1:
+    averageTime = np.mean( pageTimes )
+  else:
+    averageTime = None
+  # Calculate the total time spent in this session. When there is only one
+  # visit, there is no total time.
+  if len( visits ) == 1:
+    totalTime = None
+  else:
+    totalTime = np.sum( [ visit.timeOnPage for visit in visits ] )
+  return Session( visits[0].date, visits[0].id, averageTime, totalTime )
+
+def _cancellationReasons( error ):
+  '''Returns the code of every item of a cancelled transaction.
+
+  The reasons are in the same order as the transaction's items. When the
+  response does not hold the reasons, they are parsed from the error's
+  message.
+  '''
+  if 'CancellationReasons' in error.response.keys():
+    return [
+      reason.get( 'Code', 'None' )
+      for reason in error.response['CancellationReasons']
+    ]
+  match = re.search( r'\[([^\]]*)\]$', error.response['Error']['Message'] )
+  if match is None:
+    return [ 'None', 'None', 'None' ]
+  return [ reason.strip() for reason in match.group( 1 ).split( ',' ) ]
+
+def _parseVisitorItems( items, decoder = DECODERS['visit'] ):
   '''Parses the DynamoDB items to their respective objects.
 
   Parameters
   ----------
-  data : dict
-    The parsed data as a dictionary.
-  result : dict
-    The result of the DynamoDB query.
+  items : list[ dict ]
+    The raw DynamoDB items of a visitor.
+  decoder : function, optional
+    The function that parses the visits. (default is decodeVisit)
 
   Returns
-  data : dict
-    The original parsed data combined with the new parsed data.
+  -------
+    An iterable that iterates over the parsed objects.
   '''
-  for item in result['Items']:
-    if item['Type']['S'] == 'visitor':
-      data['visitor'] = itemToVisitor( item )
-    elif item['Type']['S'] == 'visit':
-      data['visits'].append( itemToVisit( item ) )
-    elif item['Type']['S'] == 'session':
-      data['sessions'].append( itemToSession( item ) )
-    elif item['Type']['S'] == 'location':
-      data['location'] = itemToLocation( item )
-    elif item['Type']['S'] == 'browser':
-      data['browsers'].append( itemToBrowser( item ) )
-  return data
+  decoders = {
+    **{ itemType: DECODERS[itemType] for itemType in VISITOR_TYPES },
+    'visit': decoder
+  }
+  for item in items:
+    if item['Type']['S'] in decoders:
+      yield decoders[item['Type']['S']]( item )
@@ -0,0 +1,286 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from botocore.exceptions import ClientError
+from dynamo.data.util import backoff
+
+# The maximum number of requests DynamoDB accepts in a single batch write.
+BATCH_SIZE = 25
+# The maximum number of keys DynamoDB accepts in a single batch get.
+GET_BATCH_SIZE = 100
+# The error codes returned when the table's capacity is exceeded.
+THROTTLE_CODES = (
+  'ProvisionedThroughputExceededException', 'ThrottlingException',
+  'RequestLimitExceeded'
+)
+
+class BatchWriteException( Exception ):
+  '''An exception raised when items could not be written after retrying.'''
+
+class BatchGetException( Exception ):
+  '''An exception raised when items could not be read after retrying.'''
+
+class BatchWriter:
+  '''A class to buffer the puts and deletes written to a DynamoDB table.
+
+  The requests are written in batches of 25. The items DynamoDB does not
+  process are written again after a jittered exponential backoff. With more
+  than one worker, the batches are written concurrently by a thread pool that
+  shares the client.
+
+  Attributes
+  ----------
+  client : boto3.client
+    The boto3 DynamoDB client used to access the table.
+  tableName : str
+    The name of the DynamoDB table.
+  maxRetries : int
+    The number of times unprocessed items are written again.
+  baseDelay : float
+    The number of seconds the backoff starts at.
+  maxDelay : float
+    The maximum number of seconds to wait between retries.
+  workers : int
+    The number of threads writing batches.
+  flushes : list[ dict ]
+    The number of 'items' written and the number of 'retries' of every flush.
+
+  Methods
+  -------
+  put( item ):
+    Adds a put request to the buffer.
+  delete( key ):
+    Adds a delete request to the buffer.
+  flush():
+    Writes the requests in the buffer to the table.
+  close():
+    Writes the remaining requests and waits for every batch to be written.
+  '''
+  def __init__(
+    self, client, tableName, maxRetries = 8, baseDelay = 0.05, maxDelay = 5.0,
+    workers = 1
+  ):
+    '''Constructs the necessary attributes for the batch writer object.
+
+    Parameters
+    ----------
+    client : boto3.client
+      The boto3 DynamoDB client used to access the table.
+    tableName : str
+      The name of the DynamoDB table.
+    maxRetries : int, optional
+      The number of times unprocessed items are written again. (default is 8)
+    baseDelay : float, optional
+      The number of seconds the backoff starts at. (default is 0.05)
+    maxDelay : float, optional
+      The maximum number of seconds to wait between retries. (default is 5.0)
+    workers : int, optional
+      The number of threads writing batches. (default is 1)
+    '''
+    if int( workers ) < 1:
+      raise ValueError( 'Must use at least one worker' )
+    self.client = client
+    self.tableName = tableName
+    self.maxRetries = maxRetries
+    self.baseDelay = baseDelay
+    self.maxDelay = maxDelay
+    self.workers = int( workers )
+    self.flushes = []
+    self._executor = None
+    self._futures = set()
+    # The requests are keyed by their Primary Key so that only the last
+    # request of an item is written.
+    self._buffer = {}
+
+  def put( self, item ):
+    '''Adds a put request to the buffer.
+
+    Parameters
+    ----------
+    item : dict
+      The DynamoDB item to put in the table.
+    '''
+    self._add( item, { 'PutRequest': { 'Item': item } } )
+
+  def delete( self, key ):
+    '''Adds a delete request to the buffer.
+
+    Parameters
+    ----------
+    key : dict
+      The Primary Key of the item to delete from the table.
+    '''
+    self._add( key, { 'DeleteRequest': { 'Key': key } } )
+
+  def _add( self, item, request ):
+    '''Adds a request to the buffer, writing the buffer when it is full.'''
+    key = ( item['PK']['S'], item['SK']['S'] )
+    self._buffer.pop( key, None )
+    self._buffer[key] = request
+    if len( self._buffer ) >= BATCH_SIZE:
+      self.flush()
+
+  def flush( self ):
+    '''Writes the requests in the buffer to the table.
+
+    With more than one worker, the batch is handed to the thread pool. At most
+    two batches per worker are in flight, so the buffer does not grow without
+    bound when the table is slower than the caller.
+
+    Raises
+    ------
+    BatchWriteException
+      When the requests could not be written after retrying.
+    ClientError
+      When the DynamoDB client raises an exception that is not throttling.
+    '''
+    if len( self._buffer ) == 0:
+      return
+    requests = list( self._buffer.values() )
+    self._buffer = {}
+    if self.workers == 1:
+      self._write( requests )
+      return
+    if self._executor is None:
+      self._executor = ThreadPoolExecutor( max_workers = self.workers )
+    while len( self._futures ) >= 2 * self.workers:
+      done, self._futures = wait(
+        self._futures, return_when = FIRST_COMPLETED
+      )
+      for future in done:
+        future.result()
+    self._futures.add( self._executor.submit( self._write, requests ) )
+
+  def close( self ):
+    '''Writes the remaining requests and waits for every batch to be written.
+
+    Raises
+    ------
+    BatchWriteException
+      When a batch could not be written after retrying.
+    ClientError
+      When the DynamoDB client raises an exception that is not throttling.
+    '''
+    try:
+      self.flush()
+      done, _ = wait( self._futures )
+      self._futures = set()
+      for future in done:
+        future.result()
+    finally:
+      self._shutdown()
+
+  def _shutdown( self ):
+    '''Stops the thread pool, cancelling the batches that have not started.'''
+    if self._executor is not None:
+      for future in self._futures:
+        future.cancel()
+      self._executor.shutdown( wait = True )
+      self._executor = None
+      self._futures = set()
+
+  def _write( self, requests ):
+    '''Writes a batch of requests, retrying the unprocessed items.'''
+    unprocessed = { self.tableName: requests }
+    retries = 0
+    while len( unprocessed ) > 0:
+      if retries > 0:
+        if retries > self.maxRetries:
+          raise BatchWriteException(
+            f'Could not write { len( unprocessed[self.tableName] ) } items ' +
+            f'after { self.maxRetries } retries'
+          )
+        backoff( retries, self.baseDelay, self.maxDelay )
+      try:
+        result = self.client.batch_write_item( RequestItems = unprocessed )
+        unprocessed = {
+          table: tableRequests
+          for table, tableRequests in result.get(
+            'UnprocessedItems', {}
+          ).items()
+          if len( tableRequests ) > 0
+        }
+      except ClientError as e:
+        if e.response['Error']['Code'] not in THROTTLE_CODES:
+          raise
+      if len( unprocessed ) > 0:
+        retries += 1
+    self.flushes.append( { 'items': len( requests ), 'retries': retries } )
+
+  def __enter__( self ):
+    return self
+
+  def __exit__( self, exceptionType, exception, traceback ):
+    if exceptionType is None:
+      self.close()
+    else:
+      self._shutdown()
+
+  def __repr__( self ):
+    return f'{ self.tableName } - { len( self._buffer ) } buffered'
+
+def batchGet(
+  client, tableName, keys, maxRetries = 8, baseDelay = 0.05, maxDelay = 5.0
+):
+  '''Gets items from a DynamoDB table in batches of 100 keys.
+
+  The keys DynamoDB does not process are requested again after a jittered
+  exponential backoff.
+
+  Parameters
+  ----------
+  client : boto3.client
+    The boto3 DynamoDB client used to access the table.
+  tableName : str
+    The name of the DynamoDB table.
+  keys : list[ dict ]
+    The Primary Keys of the items.
+  maxRetries : int, optional
+    The number of times unprocessed keys are requested again. (default is 8)
+  baseDelay : float, optional
+    The number of seconds the backoff starts at. (default is 0.05)
+  maxDelay : float, optional
+    The maximum number of seconds to wait between retries. (default is 5.0)
+
+  Raises
+  ------
+  BatchGetException
+    When keys are still unprocessed after retrying.
+  ClientError
+    When the DynamoDB client raises an exception that is not a throttle.
+
+  Returns
+  -------
+  items : list[ dict ]
+    The items that are in the table, in no particular order.
+  '''
+  # A batch must not request the same key twice.
+  keys = list( {
+    ( key['PK']['S'], key['SK']['S'] ): key for key in keys
+  }.values() )
+  items = []
+  for start in range( 0, len( keys ), GET_BATCH_SIZE ):
+    unprocessed = {
+      tableName: { 'Keys': keys[start:start + GET_BATCH_SIZE] }
+    }
+    retries = 0
+    while len( unprocessed ) > 0:
+      if retries > 0:
+        if retries > maxRetries:
+          raise BatchGetException(
+            f'Could not get { len( unprocessed[tableName]["Keys"] ) } ' +
+            f'items after { maxRetries } retries'
+          )
+        backoff( retries, baseDelay, maxDelay )
+      try:
+        result = client.batch_get_item( RequestItems = unprocessed )
+        items += result.get( 'Responses', {} ).get( tableName, [] )
+        unprocessed = {
+          table: request
+          for table, request in result.get( 'UnprocessedKeys', {} ).items()
+          if len( request.get( 'Keys', [] ) ) > 0
+        }
+      except ClientError as e:
+        if e.response['Error']['Code'] not in THROTTLE_CODES:
+          raise
+      if len( unprocessed ) > 0:
+        retries += 1
+  return items
@@ -0,0 +1,186 @@
+import time
+import threading
+from collections import OrderedDict
+
+# The number of partitions kept in the cache.
+MAX_SIZE = 1024
+# The number of seconds a cached read is used for.
+TTL = 300.0
+
+class EntityCache:
+  '''A class to represent a least recently used cache of partition reads.
+
+  Every entry holds the reads of one partition of a table, like a visitor's
+  details or a page's details, so that a write to the partition removes all
+  of them at once. Every read expires on its own after the time to live.
+
+  Attributes
+  ----------
+  maxSize : int
+    The number of partitions kept in the cache.
+  ttl : float
+    The number of seconds a read is used for.
+  clock : function
+    The function that returns the current time in seconds.
+  hits : int
+    The number of reads returned from the cache.
+  misses : int
+    The number of reads not in the cache or expired.
+  evictions : int
+    The number of partitions removed to keep the cache within its size.
+
+  Methods
+  -------
+  get( table, partition, variant ):
+    Returns a cached read or None.
+  put( table, partition, variant, value ):
+    Caches a read.
+  update( table, partition, function ):
+    Changes every cached read of a partition in place.
+  invalidate( table, partition ):
+    Removes every cached read of a partition.
+  clear():
+    Removes every cached read.
+  stats():
+    Returns the counters and size of the cache.
+  '''
+  def __init__( self, maxSize = MAX_SIZE, ttl = TTL, clock = time.monotonic ):
+    '''Constructs the necessary attributes for the cache object.
+
+    Parameters
+    ----------
+    maxSize : int, optional
+      The number of partitions kept in the cache. (default is 1024)
+    ttl : float, optional
+      The number of seconds a read is used for. (default is 300.0)
+    clock : function, optional
+      The function that returns the current time in seconds. (default is
+      time.monotonic)
+    '''
+    if maxSize < 1:
+      raise ValueError( 'Must keep at least one partition' )
+    self.maxSize = maxSize
+    self.ttl = ttl
+    self.clock = clock
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get( self, table, partition, variant ):
+    '''Returns a cached read or None.
+
+    Parameters
+    ----------
+    table : str
+      The name of the table.
+    partition : str
+      The partition key that was read.
+    variant : tuple
+      The read of the partition, like the method and its projection profile.
+    '''
+    with self._lock:
+      reads = self._entries.get( ( table, partition ) )
+      if reads is None or variant not in reads.keys():
+        self.misses += 1
+        return None
+      expires, value = reads[variant]
+      if expires <= self.clock():
+        del reads[variant]
+        self.misses += 1
+        return None
+      self._entries.move_to_end( ( table, partition ) )
+      self.hits += 1
+      return value
+
+  def put( self, table, partition, variant, value ):
+    '''Caches a read.
+
+    Parameters
+    ----------
+    table : str
+      The name of the table.
+    partition : str
+      The partition key that was read.
+    variant : tuple
+      The read of the partition, like the method and its projection profile.
+    value : object
+      The result of the read.
+    '''
+    with self._lock:
+      reads = self._entries.setdefault( ( table, partition ), {} )
+      reads[variant] = ( self.clock() + self.ttl, value )
+      self._entries.move_to_end( ( table, partition ) )
+      while len( self._entries ) > self.maxSize:
+        self._entries.popitem( last = False )
+        self.evictions += 1
+
+  def update( self, table, partition, function ):
+    '''Changes every cached read of a partition in place.
+
+    Parameters
+    ----------
+    table : str
+      The name of the table.
+    partition : str
+      The partition key that was written.
+    function : function
+      The function that returns the changed read from the cached one.
+    '''
+    with self._lock:
+      reads = self._entries.get( ( table, partition ), {} )
+      for variant, ( expires, value ) in reads.items():
+        reads[variant] = ( expires, function( value ) )
+
+  def invalidate( self, table, partition ):
+    '''Removes every cached read of a partition.
+
+    Parameters
+    ----------
+    table : str
+      The name of the table.
+    partition : str
+      The partition key that was written.
+    '''
+    with self._lock:
+      self._entries.pop( ( table, partition ), None )
+
+  def clear( self ):
+    '''Removes every cached read.'''
+    with self._lock:
+      self._entries.clear()
+
+  def stats( self ):
+    '''Returns the counters and size of the cache.'''
+    with self._lock:
+      return {
+        'hits': self.hits, 'misses': self.misses,
+        'evictions': self.evictions, 'size': len( self._entries )
+      }
+
+  def __len__( self ):
+    return len( self._entries )
+
+def entityPartitions( entity ):
+  '''Returns the partition keys an entity's item is read from.
+
+  Parameters
+  ----------
+  entity : object
+    The entity that was written, like a visit or a session.
+
+  Returns
+  -------
+  partitions : list[ str ]
+    The partition keys of the table and of the indexes the item is in.
+  '''
+  return list( dict.fromkeys(
+    getattr( entity, name )()['S']
+    for name in ( 'pk', 'gsi1pk', 'gsi2pk' )
+    if hasattr( entity, name )
+  ) )
+
+# The cache shared by every client in the process, so that warm containers
+# reuse the reads of earlier invocations.
+CACHE = EntityCache()
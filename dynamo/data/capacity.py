@@ -0,0 +1,242 @@
+import time
+import threading
+from botocore.exceptions import ClientError
+from .batch import THROTTLE_CODES
+
+# The client operations that consume read capacity.
+READ_OPERATIONS = (
+  'get_item', 'query', 'scan', 'batch_get_item', 'transact_get_items'
+)
+# The client operations that consume write capacity.
+WRITE_OPERATIONS = (
+  'put_item', 'update_item', 'delete_item', 'batch_write_item',
+  'transact_write_items'
+)
+
+class AdaptiveBucket:
+  '''A class to represent a token bucket that adapts its rate to throttling.
+
+  The bucket is filled at a rate of capacity units per second and holds at most
+  one second of units. Requests reserve their estimated units before they are
+  sent and the difference to the units DynamoDB reports is settled after. The
+  rate is cut by a factor when DynamoDB throttles a request and grows back by a
+  fixed amount after every request that is not throttled.
+
+  Attributes
+  ----------
+  capacity : float
+    The provisioned capacity units per second.
+  rate : float
+    The current number of capacity units per second.
+  minimumRate : float
+    The lowest rate the bucket is cut to.
+  increase : float
+    The number of units per second the rate grows by after a request.
+  decrease : float
+    The factor the rate is multiplied by when a request is throttled.
+  tokens : float
+    The number of units available. This is negative when requests have
+    reserved more units than are available.
+
+  Methods
+  -------
+  acquire( units ):
+    Reserves units, waiting until the bucket has refilled enough.
+  settle( units ):
+    Takes the difference between the consumed and reserved units.
+  throttled():
+    Cuts the rate after a throttled request.
+  succeeded():
+    Grows the rate after a request that was not throttled.
+  '''
+  def __init__(
+    self, capacity, minimumRate = 1.0, increase = None, decrease = 0.5
+  ):
+    '''Constructs the necessary attributes for the adaptive bucket object.
+
+    Parameters
+    ----------
+    capacity : float
+      The provisioned capacity units per second.
+    minimumRate : float, optional
+      The lowest rate the bucket is cut to. (default is 1.0)
+    increase : float, optional
+      The number of units per second the rate grows by after a request.
+      (default is 5% of the capacity)
+    decrease : float, optional
+      The factor the rate is multiplied by when a request is throttled.
+      (default is 0.5)
+    '''
+    if float( capacity ) <= 0:
+      raise ValueError( 'Capacity must be positive' )
+    self.capacity = float( capacity )
+    self.rate = self.capacity
+    self.minimumRate = min( float( minimumRate ), self.capacity )
+    self.increase = self.capacity * 0.05 if increase is None \
+      else float( increase )
+    self.decrease = float( decrease )
+    self.tokens = self.capacity
+    self._updated = time.monotonic()
+    self._lock = threading.Lock()
+
+  def _refill( self ):
+    '''Adds the units accumulated since the last refill.'''
+    now = time.monotonic()
+    self.tokens = min(
+      self.rate, self.tokens + ( now - self._updated ) * self.rate
+    )
+    self._updated = now
+
+  def acquire( self, units ):
+    '''Reserves units, waiting until the bucket has refilled enough.
+
+    Parameters
+    ----------
+    units : float
+      The number of capacity units the request is expected to consume.
+    '''
+    with self._lock:
+      self._refill()
+      self.tokens -= units
+      wait = -self.tokens / self.rate if self.tokens < 0 else 0
+    if wait > 0:
+      time.sleep( wait )
+
+  def settle( self, units ):
+    '''Takes the difference between the consumed and reserved units.
+
+    Parameters
+    ----------
+    units : float
+      The number of units consumed beyond the ones reserved. This is negative
+      when fewer units were consumed.
+    '''
+    with self._lock:
+      self._refill()
+      self.tokens -= units
+
+  def throttled( self ):
+    '''Cuts the rate after a throttled request.'''
+    with self._lock:
+      self._refill()
+      self.rate = max( self.minimumRate, self.rate * self.decrease )
+      self.tokens = min( self.tokens, 0.0 )
+
+  def succeeded( self ):
+    '''Grows the rate after a request that was not throttled.'''
+    with self._lock:
+      self._refill()
+      self.rate = min( self.capacity, self.rate + self.increase )
+
+  def __repr__( self ):
+    return f'{ self.rate:.1f }/{ self.capacity:.1f } units per second'
+
+class CapacityClient:
+  '''A class to limit the capacity a boto3 DynamoDB client consumes.
+
+  The read and write operations wait for their buckets before they are sent,
+  and request the capacity they consume from DynamoDB. Throttled requests are
+  sent again after the bucket's rate is cut. Every other attribute is taken
+  from the wrapped client.
+
+  Attributes
+  ----------
+  client : boto3.client
+    The boto3 DynamoDB client that sends the requests.
+  read : AdaptiveBucket | None
+    The bucket of read capacity units. Reads are not limited when there is
+    none.
+  write : AdaptiveBucket | None
+    The bucket of write capacity units. Writes are not limited when there is
+    none.
+  maxRetries : int
+    The number of times a throttled request is sent again.
+  '''
+  def __init__(
+    self, client, readCapacity = None, writeCapacity = None, maxRetries = 8
+  ):
+    '''Constructs the necessary attributes for the capacity client object.
+
+    Parameters
+    ----------
+    client : boto3.client
+      The boto3 DynamoDB client that sends the requests.
+    readCapacity : float, optional
+      The provisioned read capacity units of the table. (default is None)
+    writeCapacity : float, optional
+      The provisioned write capacity units of the table. (default is None)
+    maxRetries : int, optional
+      The number of times a throttled request is sent again. (default is 8)
+    '''
+    self.client = client
+    self.read = None if readCapacity is None \
+      else AdaptiveBucket( readCapacity )
+    self.write = None if writeCapacity is None \
+      else AdaptiveBucket( writeCapacity )
+    self.maxRetries = maxRetries
+
+  def __getattr__( self, name ):
+    attribute = getattr( self.client, name )
+    if name in READ_OPERATIONS and self.read is not None:
+      bucket = self.read
+    elif name in WRITE_OPERATIONS and self.write is not None:
+      bucket = self.write
+    else:
+      return attribute
+    def limited( **kwargs ):
+      return self._call( attribute, bucket, kwargs )
+    return limited
+
+  def _call( self, operation, bucket, kwargs ):
+    '''Sends a request once the bucket has enough units.
+
+    Raises
+    ------
+    ClientError
+      When the request is throttled more than the maximum number of retries
+      or fails for another reason.
+    '''
+    kwargs.setdefault( 'ReturnConsumedCapacity', 'TOTAL' )
+    units = _estimateUnits( kwargs )
+    retries = 0
+    while True:
+      bucket.acquire( units )
+      try:
+        result = operation( **kwargs )
+      except ClientError as e:
+        if e.response['Error']['Code'] not in THROTTLE_CODES \
+          or retries >= self.maxRetries:
+          raise
+        bucket.throttled()
+        retries += 1
+        continue
+      bucket.settle( _consumedUnits( result, units ) - units )
+      if any(
+        len( requests ) > 0
+        for requests in result.get( 'UnprocessedItems', {} ).values()
+      ):
+        bucket.throttled()
+      else:
+        bucket.succeeded()
+      return result
+
+def _estimateUnits( kwargs ):
+  '''Returns the number of capacity units a request is expected to consume.'''
+  if 'RequestItems' in kwargs.keys():
+    return float( sum(
+      len( requests['Keys'] ) if isinstance( requests, dict )
+      else len( requests )
+      for requests in kwargs['RequestItems'].values()
+    ) )
+  if 'TransactItems' in kwargs.keys():
+    return 2.0 * len( kwargs['TransactItems'] )
+  return 1.0
+
+def _consumedUnits( result, default ):
+  '''Returns the number of capacity units DynamoDB reports were consumed.'''
+  consumed = result.get( 'ConsumedCapacity' )
+  if consumed is None:
+    return default
+  if isinstance( consumed, dict ):
+    consumed = [ consumed ]
+  return float( sum( table.get( 'CapacityUnits', 0 ) for table in consumed ) )
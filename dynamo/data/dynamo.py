@@ -1,7 +1,7 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import boto3
-import numpy as np
 from botocore.exceptions import ClientError
 sys.path.append(
   os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
@@ -11,24 +11,39 @@ from dynamo.data._location import _Location # pylint: disable=wrong-import-posit
 from dynamo.data._session import _Session # pylint: disable=wrong-import-position
 from dynamo.data._visit import _Visit # pylint: disable=wrong-import-position
 from dynamo.data._browser import _Browser # pylint: disable=wrong-import-position
-from dynamo.entities import Visit # pylint: disable=wrong-import-position
-from dynamo.entities import Year, Month, Week, Day, Page # pylint: disable=wrong-import-position
-from dynamo.entities import itemToVisit # pylint: disable=wrong-import-position
-from dynamo.entities import itemToYear, itemToMonth, itemToWeek, itemToDay # pylint: disable=wrong-import-position
-from dynamo.entities import itemToPage # pylint: disable=wrong-import-position
-from dynamo.data.util import pagesToDict # pylint: disable=wrong-import-position
+from dynamo.data._transitions import _Transitions # pylint: disable=wrong-import-position
+from dynamo.data._page import _Page # pylint: disable=wrong-import-position
+from dynamo.data._pageRollups import _PageRollups # pylint: disable=wrong-import-position
+from dynamo.entities import DECODERS # pylint: disable=wrong-import-position
+from dynamo.data.batch import BatchWriter # pylint: disable=wrong-import-position
+from dynamo.data.capacity import CapacityClient # pylint: disable=wrong-import-position
+from dynamo.data.projection import typeArguments # pylint: disable=wrong-import-position
+from dynamo.data.util import paginate, scanSegments # pylint: disable=wrong-import-position
+from dynamo.data.cache import CACHE, EntityCache, entityPartitions # pylint: disable=wrong-import-position
 
-class DynamoClient( _Visitor, _Location, _Session, _Visit, _Browser ):
+class DynamoClient( # pylint: disable=too-many-ancestors
+  _Visitor, _Location, _Session, _Visit, _Browser, _Transitions, _Page,
+  _PageRollups
+):
   '''A class to represent the DynamoDB client.
 
   Attributes
   ----------
-  client : boto3.client
+  client : boto3.client | CapacityClient
     The boto3 DynamoDB client used to access the table.
   tableName : str
     The name of the DynamoDB table.
+  workers : int
+    The number of threads that write the batches of the bulk requests.
+  typeIndex : str | None
+    The name of the sparse index of the visitors, locations, and pages.
+  cache : EntityCache | None
+    The cache of the visitors', sessions', and pages' details.
   '''
-  def __init__( self, tableName, regionName = 'us-east-1' ):
+  def __init__(
+    self, tableName, regionName = 'us-east-1', workers = 1,
+    readCapacity = None, writeCapacity = None, typeIndex = None, cache = None
+  ):
     '''Constructs the necessary attributes for the DynamoDB client object.
 
     Parameters
@@ -37,450 +52,247 @@ class DynamoClient( _Visitor, _Location, _Session, _Visit, _Browser ):
       The name of the DynamoDB table.
     regionName : str
       The AWS region to connect to.
+    workers : int, optional
+      The number of threads that write the batches of the bulk requests.
+      (default is 1)
+    readCapacity : float, optional
+      The provisioned read capacity units of the table. When given, the reads
+      are rate limited to them. (default is None)
+    writeCapacity : float, optional
+      The provisioned write capacity units of the table. When given, the
+      writes are rate limited to them. (default is None)
+    typeIndex : str, optional
+      The name of the sparse index keyed on 'GSI3PK' and 'GSI3SK' that only
+      the visitors, locations, and pages are in. When given, these are listed
+      by querying the index instead of scanning the table. (default is None)
+    cache : bool | EntityCache, optional
+      The cache of the visitors', sessions', and pages' details. When True,
+      the cache shared by every client in the process is used. When False or
+      None, nothing is cached. The client's writes remove the details they
+      change from the cache. (default is None)
     '''
     self.client = boto3.client( 'dynamodb', region_name = regionName )
+    if readCapacity is not None or writeCapacity is not None:
+      self.client = CapacityClient(
+        self.client, readCapacity, writeCapacity
+      )
     self.tableName = tableName
+    self.workers = workers
+    self.typeIndex = typeIndex
+    if cache is True:
+      cache = CACHE
+    elif cache is False:
+      cache = None
+    if cache is not None and not isinstance( cache, EntityCache ):
+      raise ValueError( 'Must pass an EntityCache object' )
+    self.cache = cache
 
-  def addYear( self, visits ):
-    '''Adds a year item to the table.
-
-    Parameters
-    ----------
-    visits : list[ Visit ]
-      The list of visits from a specific year for the specific page.
+  def batchWriter( self ):
+    '''Returns a batch writer that writes the table's bulk requests.
 
-    Returns
-    -------
-    result : dict
-      The result of adding the year to the table. This could be the error that
-      occurs or the year object added to the table.
+    The requests are written in batches of 25 and the unprocessed items are
+    retried with backoff. The batches are spread across the client's workers.
     '''
-    if not isinstance( visits, list ):
-      raise ValueError( 'Must pass a list' )
-    if len( {visit.slug for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same slug' )
-    if len( {visit.title for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same title' )
-    if len( {visit.date.strftime( '%Y' ) for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must be from the same year' )
-    # Find all the pages visited before and after this one.
-    toPages = [ visit.nextSlug for visit in visits ]
-    fromPages = [ visit.prevSlug for visit in visits ]
-    # Calculate the average time spent on the page.
-    pageTimes = [
-      visit.timeOnPage for visit in visits
-      if isinstance( visit.timeOnPage, float )
-    ]
-    if len( pageTimes ) > 1:
-      averageTime = np.mean( pageTimes )
-    elif len( pageTimes ) == 1:
-      averageTime = pageTimes[0]
-    else:
-      averageTime = None
-    # Create the year object
-    year = Year(
-      visits[0].slug,
-      visits[0].title,
-      visits[0].date.strftime( '%Y' ),
-      len( { visit.id for visit in visits } ),
-      averageTime,
-      toPages.count( None ) / len( toPages ),
-      pagesToDict( fromPages ),
-      pagesToDict( toPages )
-    )
-    try:
-      # Add the year to the table
-      self.client.put_item( TableName = self.tableName, Item = year.toItem() )
-      # Return the year added to the table
-      return { 'year': year }
-    except ClientError as e:
-      print( f'ERROR addYear: { e }' )
-      return { 'error': 'Could not add new year to table' }
+    return BatchWriter( self.client, self.tableName, workers = self.workers )
 
-  def addMonth( self, visits ):
-    '''Adds a month item to the table.
+  def _cachedRead( self, partition, variant, read ):
+    '''Returns a partition's details from the cache or reads them.
+
+    Only the details that were found are cached. The lists of the details are
+    copied, so changing them does not change the cached ones.
 
     Parameters
     ----------
-    visits : list[ Visit ]
-      The list of visits from a specific month for the specific page.
-
-    Returns
-    -------
-    result : dict
-      The result of adding the month to the table. This could be the error that
-      occurs or the month object added to the table.
+    partition : str
+      The partition key of the details.
+    variant : tuple
+      The method and projection profile of the read.
+    read : function
+      The function that reads the details from the table.
     '''
-    if not isinstance( visits, list ):
-      raise ValueError( 'Must pass a list' )
-    if len( {visit.slug for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same slug' )
-    if len( {visit.title for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same title' )
-    if len( {visit.date.strftime( '%Y-%m' ) for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must be from the same year and month' )
-    # Find all the pages visited before and after this one.
-    toPages = [ visit.nextSlug for visit in visits ]
-    fromPages = [ visit.prevSlug for visit in visits ]
-    # Calculate the average time spent on the page.
-    pageTimes = [
-      visit.timeOnPage for visit in visits
-      if isinstance( visit.timeOnPage, float )
-    ]
-    if len( pageTimes ) > 1:
-      averageTime = np.mean( pageTimes )
-    elif len( pageTimes ) == 1:
-      averageTime = pageTimes[0]
-    else:
-      averageTime = None
-    # Create the month object
-    month = Month(
-      visits[0].slug,
-      visits[0].title,
-      visits[0].date.strftime( '%Y-%m' ),
-      len( { visit.id for visit in visits } ),
-      averageTime,
-      toPages.count( None ) / len( toPages ),
-      pagesToDict( fromPages ),
-      pagesToDict( toPages )
-    )
-    try:
-      # Add the month to the table
-      self.client.put_item( TableName = self.tableName, Item = month.toItem() )
-      # Return the month added to the table
-      return { 'month': month }
-    except ClientError as e:
-      print( f'ERROR addMonth: { e }' )
-      return { 'error': 'Could not add new month to table' }
+    if self.cache is None:
+      return read()
+    result = self.cache.get( self.tableName, partition, variant )
+    if result is None:
+      result = read()
+      if 'error' in result.keys():
+        return result
+      self.cache.put( self.tableName, partition, variant, result )
+    return {
+      key: list( value ) if isinstance( value, list ) else value
+      for key, value in result.items()
+    }
+
+  def _invalidate( self, *entities ):
+    '''Removes the details the written entities are in from the cache.'''
+    if self.cache is None:
+      return
+    for entity in entities:
+      for partition in entityPartitions( entity ):
+        self.cache.invalidate( self.tableName, partition )
 
-  def addWeek( self, visits ):
-    '''Adds a week item to the table.
+  def _iterType( self, itemType, parser, prefetch = False, segments = 1 ):
+    '''Iterates over all items of one type page by page.
 
     Parameters
     ----------
-    visits : list[ Visit ]
-      The list of visits from a specific week for the specific page.
+    itemType : str
+      The type of the items, like 'visitor', 'location', or 'page'.
+    parser : function
+      The function that parses the items.
+    prefetch : bool, optional
+      Whether to request the next page while the current one is used. (default
+      is False)
+    segments : int, optional
+      The number of segments of the table scanned at the same time when there
+      is no type index. (default is 1)
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception while iterating.
 
     Returns
     -------
-    result : dict
-      The result of adding the week to the table. This could be the error that
-      occurs or the week object added to the table.
+      An iterable that iterates over the parsed items.
     '''
-    if not isinstance( visits, list ):
-      raise ValueError( 'Must pass a list' )
-    if len( {visit.slug for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same slug' )
-    if len( {visit.title for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same title' )
-    if len( {visit.date.strftime( '%Y-%U' ) for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must be from the same year and week' )
-    # Find all the pages visited before and after this one.
-    toPages = [ visit.nextSlug for visit in visits ]
-    fromPages = [ visit.prevSlug for visit in visits ]
-    # Calculate the average time spent on the page.
-    pageTimes = [
-      visit.timeOnPage for visit in visits
-      if isinstance( visit.timeOnPage, float )
-    ]
-    if len( pageTimes ) > 1:
-      averageTime = np.mean( pageTimes )
-    elif len( pageTimes ) == 1:
-      averageTime = pageTimes[0]
+    if self.typeIndex is None:
+      results = scanSegments( self.client, {
+        'TableName': self.tableName, **typeArguments( itemType )
+      }, segments, prefetch )
     else:
-      averageTime = None
-    # Create the week object
-    week = Week(
-      visits[0].slug,
-      visits[0].title,
-      visits[0].date.strftime( '%Y-%U' ),
-      len( { visit.id for visit in visits } ),
-      averageTime,
-      toPages.count( None ) / len( toPages ),
-      pagesToDict( fromPages ),
-      pagesToDict( toPages )
-    )
-    try:
-      # Add the week to the table
-      self.client.put_item( TableName = self.tableName, Item = week.toItem() )
-      # Return the week added to the table
-      return { 'week': week }
-    except ClientError as e:
-      print( f'ERROR addWeek: { e }' )
-      return { 'error': 'Could not add new week to table' }
+      results = paginate( self.client, 'query', {
+        'TableName': self.tableName, 'IndexName': self.typeIndex,
+        **typeArguments( itemType, True )
+      }, prefetch )
+    return ( parser( item ) for result in results for item in result['Items'] )
 
-  def addDay( self, visits ):
-    '''Adds a day item to the table.
+  def listPages( self, segments = 1 ):
+    '''Lists all pages in the table.
 
     Parameters
     ----------
-    visits : list[ Visit ]
-      The list of visits from a specific day for the specific page.
+    segments : int, optional
+      The number of segments of the table scanned at the same time when there
+      is no type index. (default is 1)
 
     Returns
     -------
-    result : dict
-      The result of adding the day to the table. This could be the error that
-      occurs or the day object added to the table.
+    pages : list[ Page ]
+      The list of pages from the table.
     '''
-    if not isinstance( visits, list ):
-      raise ValueError( 'Must pass a list' )
-    if len( {visit.slug for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same slug' )
-    if len( {visit.title for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same title' )
-    if len( {visit.date.strftime( '%Y-%m-%d' ) for visit in visits } ) != 1:
-      raise ValueError(
-        'List of visits must be from the same year, month, and day'
-      )
-    # Find all the pages visited before and after this one.
-    toPages = [ visit.nextSlug for visit in visits ]
-    fromPages = [ visit.prevSlug for visit in visits ]
-    # Calculate the average time spent on the page.
-    pageTimes = [
-      visit.timeOnPage for visit in visits
-      if isinstance( visit.timeOnPage, float )
-    ]
-    if len( pageTimes ) > 1:
-      averageTime = np.mean( pageTimes )
-    elif len( pageTimes ) == 1:
-      averageTime = pageTimes[0]
-    else:
-      averageTime = None
-    # Create the day object.
-    day = Day(
-      visits[0].slug,
-      visits[0].title,
-      visits[0].date.strftime( '%Y-%m-%d' ),
-      len( { visit.id for visit in visits } ),
-      averageTime,
-      toPages.count( None ) / len( toPages ),
-      pagesToDict( fromPages ),
-      pagesToDict( toPages )
-    )
     try:
-      # Add the day to the table
-      self.client.put_item( TableName = self.tableName, Item = day.toItem() )
-      # Return the day added to the table
-      return { 'day': day }
+      return list( self.iterPages( True, segments ) )
     except ClientError as e:
-      print( f'ERROR addDay: { e }')
-      return { 'error': 'Could not add new day to table' }
+      print( f'ERROR listPages: { e }' )
+      return { 'error': 'Could not get pages from table' }
+
+  def iterPages( self, prefetch = False, segments = 1 ):
+    '''Iterates over all pages in the table page by page.
 
-  def addPage( self, visits ):
-    '''Adds the page item to the table.
+    When the client has a type index, the pages are queried from it in the
+    order of their slugs. Otherwise, the segments of the table are scanned at
+    the same time and the pages are returned in the order they arrive.
 
     Parameters
     ----------
-    visits : list[ Visit ]
-      The list of all visits for the specific page.
+    prefetch : bool, optional
+      Whether to request the next page while the current one is used. (default
+      is False)
+    segments : int, optional
+      The number of segments of the table scanned at the same time when there
+      is no type index. (default is 1)
+
+    Raises
+    ------
+    ClientError
+      When the DynamoDB client raises an exception while iterating.
 
     Returns
     -------
-    result : dict
-      The result of adding the page to the table. This could be the error that
-      occurs or the page object added to the table.
+      An iterable that iterates over the pages.
     '''
-    if not isinstance( visits, list ):
-      raise ValueError( 'Must pass a list' )
-    if len( {visit.slug for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same slug' )
-    if len( {visit.title for visit in visits } ) != 1:
-      raise ValueError( 'List of visits must have the same title' )
-    # Find all the pages visited before and after this one.
-    toPages = [ visit.nextSlug for visit in visits ]
-    fromPages = [ visit.prevSlug for visit in visits ]
-    # Calculate the average time spent on the page.
-    pageTimes = [
-      visit.timeOnPage for visit in visits
-      if isinstance( visit.timeOnPage, float )
-    ]
-    if len( pageTimes ) > 1:
-      averageTime = np.mean( pageTimes )
-    elif len( pageTimes ) == 1:
-      averageTime = pageTimes[0]
-    else:
-      averageTime = None
-    # Create the page object.
-    page = Page(
-      visits[0].slug,
-      visits[0].title,
-      len( { visit.id for visit in visits } ),
-      averageTime,
-      toPages.count( None ) / len( toPages ),
-      pagesToDict( fromPages ),
-      pagesToDict( toPages )
-    )
-    try:
-      # Add the page to the table
-      self.client.put_item( TableName = self.tableName, Item = page.toItem() )
-      # Return the page added to the table
-      return { 'page': page }
-    except ClientError as e:
-      print( f'ERROR addPage: { e }')
-      return { 'error': 'Could not add new page to table' }
+    return self._iterType( 'page', DECODERS['page'], prefetch, segments )
 
-  def updatePage( self, visits ):
-    '''Adds the page, and its days/weeks/months/years to the table.
+  def backfillTypeIndex( self, segments = 1 ):
+    '''Adds the type index's keys to the visitors, locations, and pages that
+    were written before the index existed.
+
+    The table is scanned in segments and the items of every page of results
+    are updated at the same time by the client's workers. Only the index's
+    keys are set, so the updates made to the items in the meantime are kept.
 
     Parameters
     ----------
-    visits : list[ Visit ]
-      The specific page's visits that are processed to the page, days, weeks,
-      months, and years items.
+    segments : int, optional
+      The number of segments of the table scanned at the same time. (default
+      is 1)
 
     Returns
     -------
-    results : dict
-      The result of adding the new page, days, weeks, months, and years. This
-      could be either the error that occurs or the new page, days, weeks,
-      months, and years.
+    result : dict
+      The result of backfilling the index. This could be either the error that
+      occurs or the number of items updated.
     '''
-    if not isinstance( visits, list ):
-      raise ValueError( 'Must pass a list of Visit objects' )
-    if not all( [
-      isinstance( visit, Visit ) for visit in visits
-    ] ):
-      raise ValueError( 'List of visits must be of Visit type' )
-    # Add each day's visits
-    days = []
-    for day_visits in [
-      [ visit for visit in visits if visit.date.strftime( '%Y-%m-%d' ) == day ]
-      for day in { visit.date.strftime( '%Y-%m-%d' ) for visit in visits }
-    ]:
-      day_result = self.addDay( day_visits )
-      if 'error' in day_result.keys():
-        return { 'error': day_result['error'] }
-      days.append( day_result['day'] )
-    # Add each week's visits
-    weeks = []
-    for week_visits in [
-      [ visit for visit in visits if visit.date.strftime( '%Y-%U' ) == week ]
-      for week in { visit.date.strftime( '%Y-%U' ) for visit in visits }
-    ]:
-      week_result = self.addWeek( week_visits )
-      if 'error' in week_result.keys():
-        return { 'error': week_result['error'] }
-      days.append( week_result['week'] )
-    # Add each months's visits
-    months = []
-    for month_visits in [
-      [ visit for visit in visits if visit.date.strftime( '%Y-%m' ) == month ]
-      for month in { visit.date.strftime( '%Y-%m' ) for visit in visits }
-    ]:
-      month_result = self.addMonth( month_visits )
-      if 'error' in month_result.keys():
-        return { 'error': month_result['error'] }
-      months.append( month_result['month'] )
-    # Add each years's visits
-    years = []
-    for year_visits in [
-      [ visit for visit in visits if visit.date.strftime( '%Y' ) == year ]
-      for year in { visit.date.strftime( '%Y' ) for visit in visits }
-    ]:
-      year_result = self.addYear( year_visits )
-      if 'error' in year_result.keys():
-        return { 'error': year_result['error'] }
-      years.append( year_result['year'] )
-    # Add the page to the table
-    page_result = self.addPage( visits )
-    if 'error' in page_result.keys():
-      return { 'error': page_result['error'] }
-    return {
-      'page': page_result['page'], 'days': days, 'weeks': weeks,
-      'months': months, 'years': years
+    parsers = {
+      itemType: DECODERS[itemType]
+      for itemType in ( 'visitor', 'location', 'page' )
+    }
+    request = {
+      'TableName': self.tableName,
+      'FilterExpression': 'attribute_not_exists(#gsi3pk) AND ' + \
+        '#type IN (:visitor, :location, :page)',
+      'ExpressionAttributeNames': { '#gsi3pk': 'GSI3PK', '#type': 'Type' },
+      'ExpressionAttributeValues': {
+        f':{ itemType }': { 'S': itemType } for itemType in parsers
+      }
     }
+    numberItems = 0
+    try:
+      with ThreadPoolExecutor( max_workers = self.workers ) as executor:
+        for result in scanSegments(
+          self.client, request, segments, True
+        ):
+          list( executor.map(
+            self._setTypeIndex,
+            [
+              { 'PK': item['PK'], 'SK': item['SK'] }
+              for item in result['Items']
+            ],
+            [
+              parsers[item['Type']['S']]( item ).gsi3()
+              for item in result['Items']
+            ]
+          ) )
+          numberItems += len( result['Items'] )
+      return { 'items': numberItems }
+    except ClientError as e:
+      print( f'ERROR backfillTypeIndex: { e }' )
+      return { 'error': 'Could not backfill the type index' }
 
-  def getPageDetails( self, page ):
-    '''Gets a page and its days, weeks, months, and years of analytics.
+  def _setTypeIndex( self, key, gsi3 ):
+    '''Sets the type index's keys of an item.
 
-    Parameters
-    ----------
-    page : Page
-      The page to request the details of.
+    Items removed since they were scanned are not added again.
 
     Raises
     ------
-    Exception
-      When the items returned by the query are not either a visit, session,
-      page, day, week, month, or year.
-    KeyError
-      When the items returned are not structured as expected
     ClientError
       When the DynamoDB client raises an exception.
-
-    Returns
-    -------
-    result : dict
-      The result of requesting the page from the table. This contains either the
-      error that occurred or the page's analytics.
     '''
-    if not isinstance( page, ( Page, Visit ) ):
-      raise ValueError( 'Must pass a Page object' )
     try:
-      result = self.client.query(
+      self.client.update_item(
         TableName = self.tableName,
-        IndexName = 'GSI1',
-        KeyConditionExpression = '#gsi1 = :gsi1',
-        ExpressionAttributeNames = { '#gsi1': 'GSI1PK' },
-        ExpressionAttributeValues = { ':gsi1': page.gsi1pk() },
-        ScanIndexForward = True
+        Key = key,
+        ConditionExpression = 'attribute_exists(PK)',
+        UpdateExpression = 'SET #gsi3pk = :gsi3pk, #gsi3sk = :gsi3sk',
+        ExpressionAttributeNames = {
+          '#gsi3pk': 'GSI3PK', '#gsi3sk': 'GSI3SK'
+        },
+        ExpressionAttributeValues = {
+          ':gsi3pk': gsi3['GSI3PK'], ':gsi3sk': gsi3['GSI3SK']
+        }
       )
-      # Return the error when there are no items returned from the table.
-      if len( result['Items'] ) == 0:
-        return { 'error': 'Page not in table' }
-      # Use a dictionary to store the items returned from the table
-      data = {
-        'visits': [], 'days': [], 'weeks': [], 'months': [], 'years': []
-      }
-      data = _parsePageDetails( data, result )
-      # DynamoDB is limited in 1MB of query results. Continue to query from the
-      # 'LastEvaluatedKey' when this condition is met.
-      if 'LastEvaluatedKey' in result.keys():
-        still_querying = True
-        while still_querying:
-          result = self.client.query(
-            TableName = self.tableName,
-            IndexName = 'GSI1',
-            KeyConditionExpression = '#gsi1 = :gsi1',
-            ExpressionAttributeNames = { '#gsi1': 'GSI1PK' },
-            ExpressionAttributeValues = { ':gsi1': page.gsi1pk() },
-            ScanIndexForward = True,
-            ExclusiveStartKey = result['LastEvaluatedKey']
-          )
-          data = _parsePageDetails( data, result )
-          if 'LastEvaluatedKey' not in result.keys():
-            still_querying = False
-      return data
     except ClientError as e:
-      print( f'ERROR getPageDetails: { e }')
-      return { 'error': 'Could not get page from table' }
-
-def _parsePageDetails( data, result ):
-  '''Parses the DynamoDB items to their respective objects.
-
-  Parameters
-  ----------
-  data : dict
-    The parsed data as a dictionary.
-  result : dict
-    The result of the DynamoDB query.
-
-  Returns
-  data : dict
-    The original parsed data combined with the new parsed data.
-  '''
-  for item in result['Items']:
-    if item['Type']['S'] == 'visit':
-      data['visits'].append( itemToVisit( item ) )
-    elif item['Type']['S'] == 'page':
-      data['page'] = itemToPage( item )
-    elif item['Type']['S'] == 'day':
-      data['days'].append( itemToDay( item ) )
-    elif item['Type']['S'] == 'week':
-      data['weeks'].append( itemToWeek( item ) )
-    elif item['Type']['S'] == 'month':
-      data['months'].append( itemToMonth( item ) )
-    elif item['Type']['S'] == 'year':
-      data['years'].append( itemToYear( item ) )
-  return data
+      if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+        raise
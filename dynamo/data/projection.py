@@ -0,0 +1,120 @@
+import os
+import sys
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import DECODERS, decodeLightVisit # pylint: disable=wrong-import-position
+
+# The attributes of the visits read with every profile. The full profile reads
+# every attribute.
+PROFILES = {
+  'full': None,
+  # Everything but the scroll events.
+  'visits-light': (
+    'PK', 'SK', 'GSI1PK', 'GSI1SK', 'GSI2PK', 'GSI2SK', 'Type', 'User',
+    'Title', 'Slug', 'PreviousTitle', 'PreviousSlug', 'NextTitle',
+    'NextSlug', 'TimeOnPage'
+  ),
+  # Only what the rollups of a page use.
+  'rollup-inputs': (
+    'PK', 'SK', 'Type', 'Title', 'Slug', 'PreviousSlug', 'NextSlug',
+    'TimeOnPage'
+  )
+}
+
+# The attributes that the decoders of the listed item types read. The pages
+# are read whole.
+TYPE_ATTRIBUTES = {
+  'visitor': ( 'PK', 'NumberSessions' ),
+  'location': (
+    'PK', 'IP', 'Country', 'Region', 'City', 'Latitude', 'Longitude',
+    'PostalCode', 'TimeZone', 'Domains', 'AutonomousSystem', 'ISP', 'Proxy',
+    'VPN', 'TOR', 'DateAdded'
+  ),
+  'page': None
+}
+
+def projectionArguments( profile, names = None ):
+  '''Returns the query arguments and visit decoder of a projection profile.
+
+  Parameters
+  ----------
+  profile : str
+    The name of the projection profile.
+  names : dict, optional
+    The 'ExpressionAttributeNames' the query already uses. Their placeholders
+    are reused for the same attributes. (default is None)
+
+  Raises
+  ------
+  ValueError
+    When the profile does not exist.
+
+  Returns
+  -------
+  arguments : dict
+    The 'ExpressionAttributeNames' combined with the projected names, and the
+    'ProjectionExpression' when the profile does not read every attribute.
+  decoder : function
+    The function that parses the projected visit items.
+  '''
+  if profile not in PROFILES.keys():
+    raise ValueError(
+      f'Must pass a projection profile of { ", ".join( PROFILES ) }'
+    )
+  names = dict( names ) if names is not None else {}
+  if PROFILES[profile] is None:
+    return { 'ExpressionAttributeNames': names }, DECODERS['visit']
+  # Attribute names like 'Type' and 'User' are reserved words, so every
+  # attribute is projected through a name placeholder.
+  placeholders = { name: placeholder for placeholder, name in names.items() }
+  for index, name in enumerate( PROFILES[profile] ):
+    if name not in placeholders.keys():
+      placeholders[name] = f'#p{ index }'
+      names[f'#p{ index }'] = name
+  return {
+    'ProjectionExpression': ', '.join(
+      placeholders[name] for name in PROFILES[profile]
+    ),
+    'ExpressionAttributeNames': names
+  }, decodeLightVisit
+
+def typeArguments( itemType, indexed = False ):
+  '''Returns the arguments of a request of one type of item.
+
+  Parameters
+  ----------
+  itemType : str
+    The type of the items, like 'visitor', 'location', or 'page'.
+  indexed : bool, optional
+    Whether the items are queried from the type index instead of scanned
+    from the table. (default is False)
+
+  Returns
+  -------
+  arguments : dict
+    The 'KeyConditionExpression' of the index or the 'FilterExpression' of
+    the scan, the 'ProjectionExpression', and their attribute names and
+    values.
+  '''
+  arguments = {}
+  names = {}
+  if TYPE_ATTRIBUTES[itemType] is not None:
+    names = {
+      f'#p{ index }': name
+      for index, name in enumerate( TYPE_ATTRIBUTES[itemType] )
+    }
+    arguments['ProjectionExpression'] = ', '.join( names )
+  if indexed:
+    return {
+      **arguments,
+      'KeyConditionExpression': '#type = :type',
+      'ExpressionAttributeNames': { '#type': 'GSI3PK', **names },
+      'ExpressionAttributeValues': { ':type': { 'S': f'TYPE#{ itemType }' } }
+    }
+  return {
+    **arguments,
+    'FilterExpression': '#type = :type',
+    'ExpressionAttributeNames': { '#type': 'Type', **names },
+    'ExpressionAttributeValues': { ':type': { 'S': itemType } }
+  }
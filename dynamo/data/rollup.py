@@ -0,0 +1,355 @@
+import os
+import sys
+import datetime
+import numpy as np
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import Year, Month, Week, Day, Page, Aggregate # pylint: disable=wrong-import-position
+from dynamo.entities import hashIds, groupSketches, TopPages, CAPACITY # pylint: disable=wrong-import-position
+from dynamo.entities import Transitions, ENTRY # pylint: disable=wrong-import-position
+
+# The granularities the visits of a page are rolled up into.
+GRANULARITIES = ( 'day', 'week', 'month', 'year', 'page' )
+
+def visitsToArrays( visits ):
+  '''Converts a list of visits into columnar NumPy arrays.
+
+  The strings that repeat across visits, the visitor IDs and the previous and
+  next slugs, are interned as integer codes so that they can be grouped with
+  NumPy.
+
+  Parameters
+  ----------
+  visits : list[ Visit ]
+    The visits to convert.
+
+  Returns
+  -------
+  arrays : dict
+    The visits as arrays. 'date' holds the datetimes in milliseconds, 'time'
+    holds the time on page with NaN when there is none, 'visitor' holds the
+    visitor codes, and 'prev' and 'next' hold the slug codes where -1 is used
+    when there is no previous or next page. 'ids' and 'slugs' map the codes
+    back to their strings.
+  '''
+  ids = {}
+  slugs = {}
+  visitor = np.empty( len( visits ), dtype = np.int64 )
+  prev = np.empty( len( visits ), dtype = np.int64 )
+  nxt = np.empty( len( visits ), dtype = np.int64 )
+  for index, visit in enumerate( visits ):
+    visitor[index] = ids.setdefault( visit.id, len( ids ) )
+    prev[index] = -1 if visit.prevSlug is None \
+      else slugs.setdefault( visit.prevSlug, len( slugs ) )
+    nxt[index] = -1 if visit.nextSlug is None \
+      else slugs.setdefault( visit.nextSlug, len( slugs ) )
+  return {
+    'date': np.array(
+      [ visit.date for visit in visits ], dtype = 'datetime64[ms]'
+    ),
+    'time': np.array(
+      [
+        visit.timeOnPage if isinstance( visit.timeOnPage, float ) else np.nan
+        for visit in visits
+      ],
+      dtype = np.float64
+    ),
+    'visitor': visitor,
+    'prev': prev,
+    'next': nxt,
+    'ids': list( ids ),
+    'slugs': list( slugs )
+  }
+
+def bucketCodes( dates, granularity ):
+  '''Groups datetimes into the calendar buckets of a granularity.
+
+  The weeks follow `strftime`'s '%U', where the weeks start on Sunday and the
+  days before the first Sunday of the year are in week 0.
+
+  Parameters
+  ----------
+  dates : np.ndarray
+    The datetimes as a 'datetime64' array.
+  granularity : str
+    Either 'day', 'week', 'month', 'year', or 'page'.
+
+  Returns
+  -------
+  codes : np.ndarray
+    The index of each datetime's bucket.
+  labels : list[ str ]
+    The date of each bucket formatted the way the Day, Week, Month, and Year
+    objects expect them.
+  '''
+  if granularity not in GRANULARITIES:
+    raise ValueError( f'Unknown granularity { granularity }' )
+  if granularity == 'page':
+    return np.zeros( len( dates ), dtype = np.int64 ), [ None ]
+  days = dates.astype( 'datetime64[D]' ).astype( np.int64 )
+  years = dates.astype( 'datetime64[Y]' ).astype( np.int64 ) + 1970
+  if granularity == 'day':
+    keys = days
+  elif granularity == 'month':
+    keys = dates.astype( 'datetime64[M]' ).astype( np.int64 )
+  elif granularity == 'year':
+    keys = years
+  else:
+    # 1970-01-01 was a Thursday, so Sunday is 0 when 4 days are added.
+    yearStart = dates.astype( 'datetime64[Y]' ) \
+      .astype( 'datetime64[D]' ).astype( np.int64 )
+    weekday = ( days + 4 ) % 7
+    keys = years * 100 + ( days - yearStart + 7 - weekday ) // 7
+  uniqueKeys, codes = np.unique( keys, return_inverse = True )
+  if granularity == 'day':
+    labels = [
+      str( key ) for key in uniqueKeys.astype( 'datetime64[D]' )
+    ]
+  elif granularity == 'month':
+    labels = [
+      str( key ) for key in uniqueKeys.astype( 'datetime64[M]' )
+    ]
+  elif granularity == 'year':
+    labels = [ str( key ) for key in uniqueKeys ]
+  else:
+    labels = [
+      f'{ key // 100 }-{ str( key % 100 ).zfill( 2 ) }' for key in uniqueKeys
+    ]
+  return codes.reshape( -1 ), labels
+
+def bucketRange( granularity, label ):
+  '''Returns the first and last datetime of a calendar bucket.
+
+  Parameters
+  ----------
+  granularity : str
+    Either 'day', 'week', 'month', or 'year'.
+  label : str
+    The date of the bucket, formatted like the labels of `bucketCodes`.
+
+  Returns
+  -------
+  start : datetime.datetime
+    The first millisecond of the bucket.
+  end : datetime.datetime
+    The last millisecond of the bucket.
+  '''
+  parts = [ int( part ) for part in label.split( '-' ) ]
+  if granularity == 'day':
+    start = datetime.datetime( *parts )
+    end = start + datetime.timedelta( days = 1 )
+  elif granularity == 'month':
+    start = datetime.datetime( parts[0], parts[1], 1 )
+    end = datetime.datetime( parts[0] + parts[1] // 12, parts[1] % 12 + 1, 1 )
+  elif granularity == 'year':
+    start = datetime.datetime( parts[0], 1, 1 )
+    end = datetime.datetime( parts[0] + 1, 1, 1 )
+  elif granularity == 'week':
+    # Week 0 holds the days before the first Sunday of the year.
+    newYear = datetime.datetime( parts[0], 1, 1 )
+    firstSunday = newYear + datetime.timedelta(
+      days = ( 6 - newYear.weekday() ) % 7
+    )
+    start = newYear if parts[1] == 0 \
+      else firstSunday + datetime.timedelta( weeks = parts[1] - 1 )
+    end = min(
+      firstSunday + datetime.timedelta( weeks = parts[1] ),
+      datetime.datetime( parts[0] + 1, 1, 1 )
+    )
+  else:
+    raise ValueError( f'Unknown granularity { granularity }' )
+  return start, end - datetime.timedelta( milliseconds = 1 )
+
+def aggregateArrays( arrays, codes, numberGroups, capacity = CAPACITY ):
+  '''Computes the analytics of every group in a single pass over the visits.
+
+  Parameters
+  ----------
+  arrays : dict
+    The visits as arrays, returned by `visitsToArrays`.
+  codes : np.ndarray
+    The group index of each visit.
+  numberGroups : int
+    The number of groups.
+  capacity : int, optional
+    The number of pages the from and to page distributions keep. (default is
+    32)
+
+  Returns
+  -------
+  aggregates : list[ Aggregate ]
+    The mergeable analytics of each group.
+  '''
+  counts = np.bincount( codes, minlength = numberGroups )
+  # Only the visits with a time on page are used in the average time.
+  timed = ~np.isnan( arrays['time'] )
+  timeSums = np.bincount(
+    codes[timed], weights = arrays['time'][timed], minlength = numberGroups
+  )
+  timeCounts = np.bincount( codes[timed], minlength = numberGroups )
+  churns = np.bincount(
+    codes[arrays['next'] == -1], minlength = numberGroups
+  )
+  # Every unique visitor ID is hashed once and every visit's hash is added to
+  # its group's sketch.
+  sketches = groupSketches(
+    hashIds( arrays['ids'] )[arrays['visitor']], codes, numberGroups
+  )
+  aggregates = [
+    Aggregate(
+      counts[index], timeSums[index], timeCounts[index], churns[index],
+      sketches[index]
+    )
+    for index in range( numberGroups )
+  ]
+  _count( aggregates, 'fromCount', arrays['prev'], arrays, codes, capacity )
+  _count( aggregates, 'toCount', arrays['next'], arrays, codes, capacity )
+  return aggregates
+
+def _distinctVisitors( arrays, codes, numberGroups ):
+  '''Counts the exact number of unique visitors of every group.
+
+  Parameters
+  ----------
+  arrays : dict
+    The visits as arrays, returned by `visitsToArrays`.
+  codes : np.ndarray
+    The group index of each visit.
+  numberGroups : int
+    The number of groups.
+
+  Returns
+  -------
+  counts : np.ndarray
+    The number of unique visitors of each group.
+  '''
+  numberIds = max( len( arrays['ids'] ), 1 )
+  pairs = np.unique(
+    codes.astype( np.int64 ) * numberIds + arrays['visitor']
+  )
+  return np.bincount( pairs // numberIds, minlength = numberGroups )
+
+def _count( aggregates, name, slugCodes, arrays, codes, capacity ):
+  '''Sets the top previous or next slugs of every group.'''
+  width = len( arrays['slugs'] ) + 1
+  pairs, pairCounts = np.unique(
+    codes * width + slugCodes + 1, return_counts = True
+  )
+  counts = [ {} for _ in aggregates ]
+  for pair, count in zip( pairs.tolist(), pairCounts.tolist() ):
+    group, slug = divmod( pair, width )
+    counts[group]['www' if slug == 0 else arrays['slugs'][slug - 1]] = count
+  for aggregate, groupCounts in zip( aggregates, counts ):
+    setattr( aggregate, name, TopPages( groupCounts, capacity ) )
+
+def rollupVisits( visits, granularities = GRANULARITIES, capacity = CAPACITY ):
+  '''Rolls up a page's visits into its days, weeks, months, years, and page.
+
+  The visits are converted to arrays once and every granularity is computed
+  with a grouped pass over those arrays. Every visit is known, so the number
+  of unique visitors is counted exactly instead of estimated from the sketch.
+
+  Parameters
+  ----------
+  visits : list[ Visit ]
+    The visits of a single page.
+  granularities : tuple[ str ], optional
+    The granularities to compute. (default is all of them)
+  capacity : int, optional
+    The number of pages the from and to page distributions keep. (default is
+    32)
+
+  Returns
+  -------
+  result : dict
+    The 'days', 'weeks', 'months', and 'years' as lists and the 'page' of the
+    granularities requested.
+  '''
+  if len( visits ) == 0:
+    raise ValueError( 'Must pass at least one visit' )
+  arrays = visitsToArrays( visits )
+  slug = visits[0].slug
+  title = visits[0].title
+  result = {}
+  for granularity in granularities:
+    codes, labels = bucketCodes( arrays['date'], granularity )
+    aggregates = aggregateArrays( arrays, codes, len( labels ), capacity )
+    visitors = _distinctVisitors( arrays, codes, len( labels ) ).tolist()
+    if granularity == 'page':
+      result['page'] = Page(
+        slug, title, *aggregates[0].analytics( visitors[0] ), aggregates[0]
+      )
+      continue
+    rollupClass = {
+      'day': Day, 'week': Week, 'month': Month, 'year': Year
+    }[granularity]
+    result[f'{ granularity }s'] = [
+      rollupClass(
+        slug, title, label, *aggregate.analytics( numberVisitors ), aggregate
+      )
+      for label, aggregate, numberVisitors in zip(
+        labels, aggregates, visitors
+      )
+    ]
+  return result
+
+def transitionMatrices( visits ):
+  '''Builds the site-wide page transitions of every day of visits.
+
+  The slugs are interned as integer codes and the transitions of all of the
+  days are counted with a single pass over the visits.
+
+  Parameters
+  ----------
+  visits : list[ Visit ]
+    The visits of any number of pages.
+
+  Returns
+  -------
+  transitions : list[ Transitions ]
+    The transitions of every day the visits were on.
+  '''
+  if len( visits ) == 0:
+    raise ValueError( 'Must pass at least one visit' )
+  slugs = { ENTRY: 0 }
+  pages = np.empty( len( visits ), dtype = np.int64 )
+  prev = np.empty( len( visits ), dtype = np.int64 )
+  exits = np.empty( len( visits ), dtype = bool )
+  for index, visit in enumerate( visits ):
+    pages[index] = slugs.setdefault( visit.slug, len( slugs ) )
+    prev[index] = 0 if visit.prevSlug is None \
+      else slugs.setdefault( visit.prevSlug, len( slugs ) )
+    exits[index] = visit.nextSlug is None
+  codes, labels = bucketCodes(
+    np.array( [ visit.date for visit in visits ], dtype = 'datetime64[ms]' ),
+    'day'
+  )
+  # Every visit is a transition from its previous page to its page and every
+  # exit is a transition from its page to 'www'.
+  width = len( slugs )
+  keys, counts = np.unique(
+    np.concatenate( [
+      ( codes * width + prev ) * width + pages,
+      ( codes[exits] * width + pages[exits] ) * width
+    ] ),
+    return_counts = True
+  )
+  days, cells = np.divmod( keys, width * width )
+  sources, targets = np.divmod( cells, width )
+  names = list( slugs )
+  transitions = []
+  for day, label in enumerate( labels ):
+    selected = days == day
+    # Only the slugs used on the day are kept in its matrix.
+    used, inverse = np.unique(
+      np.concatenate( [ sources[selected], targets[selected] ] ),
+      return_inverse = True
+    )
+    inverse = inverse.reshape( -1 )
+    number = int( selected.sum() )
+    transitions.append( Transitions(
+      label, [ names[code] for code in used.tolist() ],
+      inverse[:number], inverse[number:], counts[selected]
+    ) )
+  return transitions
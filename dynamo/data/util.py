@@ -1,3 +1,36 @@
+import os
+import sys
+import time
+import queue
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import formatDate # pylint: disable=wrong-import-position
+
+# The most queries of the table that run at the same time.
+MAX_QUERIES = 16
+# The most times an item is read and merged again when another update changed
+# it between the read and the conditional write.
+MAX_MERGES = 8
+
+def backoff( retries, baseDelay = 0.05, maxDelay = 5.0 ):
+  '''Sleeps for a jittered exponential backoff before retrying a write.
+
+  Parameters
+  ----------
+  retries : int
+    The number of times the write has been retried.
+  baseDelay : float
+    The number of seconds the backoff starts at.
+  maxDelay : float
+    The maximum number of seconds to wait.
+  '''
+  time.sleep( random.uniform( 0, min( maxDelay, baseDelay * 2 ** retries ) ) )
+
 def chunkList( this_list, size ):
   '''Splits a list into a list of lists.
 
@@ -32,6 +65,212 @@ def pagesToDict( pages ):
   return {
     (
       'www' if page is None else page
-    ): pages.count( page ) / len( pages )
-    for page in list( set( pages ) )
+    ): count / len( pages )
+    for page, count in Counter( pages ).items()
   }
+
+def paginate(
+  client, operation, request, prefetch = False, pageSize = None
+):
+  '''Yields every page of results of a DynamoDB query or scan.
+
+  DynamoDB is limited in 1MB of results per request, so the requests continue
+  from the 'LastEvaluatedKey' until there is none. When prefetching, the next
+  page is requested on a background thread while the current page is used, so
+  at most two pages are held at once. The thread is only started once there
+  is a second page, so single page reads are never slowed down by it. The
+  requests stop when the consumer stops iterating.
+
+  Parameters
+  ----------
+  client : boto3.client
+    The boto3 DynamoDB client used to access the table.
+  operation : str
+    The name of the client's paginated operation, like 'query' or 'scan'.
+  request : dict
+    The arguments of the first request.
+  prefetch : bool, optional
+    Whether to request the next page while the current one is used. (default
+    is False)
+  pageSize : int, optional
+    The most items read by every request. (default is None)
+
+  Raises
+  ------
+  ClientError
+    When the DynamoDB client raises an exception.
+
+  Returns
+  -------
+    An iterable that iterates over the results of every request.
+  '''
+  call = getattr( client, operation )
+  request = dict( request )
+  if pageSize is not None:
+    if pageSize < 1:
+      raise ValueError( 'Must request at least one item' )
+    request['Limit'] = pageSize
+  result = call( **request )
+  if not prefetch or 'LastEvaluatedKey' not in result.keys():
+    while True:
+      yield result
+      if 'LastEvaluatedKey' not in result.keys():
+        return
+      request['ExclusiveStartKey'] = result['LastEvaluatedKey']
+      result = call( **request )
+  with ThreadPoolExecutor( max_workers = 1 ) as executor:
+    while True:
+      future = None
+      if 'LastEvaluatedKey' in result.keys():
+        request['ExclusiveStartKey'] = result['LastEvaluatedKey']
+        future = executor.submit( call, **request )
+      yield result
+      if future is None:
+        return
+      result = future.result()
+
+def queryItems( client, request, limit = None ):
+  '''Returns the items of a DynamoDB query up to a number of items.
+
+  Without a limit, the pages are prefetched while the earlier ones are
+  collected. With one, the pages are read one at a time so that none is read
+  past the limit.
+
+  Parameters
+  ----------
+  client : boto3.client
+    The boto3 DynamoDB client used to access the table.
+  request : dict
+    The arguments of the query.
+  limit : int, optional
+    The most items returned. The query stops once it has read these. (default
+    is None)
+
+  Raises
+  ------
+  ClientError
+    When the DynamoDB client raises an exception.
+
+  Returns
+  -------
+  items : list[ dict ]
+    The raw DynamoDB items in the order of the query.
+  '''
+  items = []
+  for result in paginate(
+    client, 'query', request, limit is None, limit
+  ):
+    items += result['Items']
+    if limit is not None and len( items ) >= limit:
+      return items[:limit]
+  return items
+
+def sortKeyRange( prefix, start = None, end = None ):
+  '''Returns the sort keys between two dates of the items with a prefix.
+
+  Parameters
+  ----------
+  prefix : str
+    The prefix of the sort keys, like 'SESSION#' or 'VISIT#'.
+  start : datetime.datetime, optional
+    The earliest date of the range. When None, the range starts at the
+    earliest item. (default is None)
+  end : datetime.datetime, optional
+    The latest date of the range. When None, the range ends at the latest
+    item. (default is None)
+
+  Returns
+  -------
+  values : dict
+    The ':start' and ':end' values of a 'BETWEEN :start AND :end' condition.
+  '''
+  if start is not None and end is not None and start > end:
+    raise ValueError( 'Must end the range after it starts' )
+  return {
+    ':start': {
+      'S': prefix + ( formatDate( start ) if start is not None else '' )
+    },
+    # The dates start with digits, which sort before '~'.
+    ':end': {
+      'S': prefix + ( formatDate( end ) if end is not None else '~' )
+    }
+  }
+
+def scanSegments( client, request, segments = 1, prefetch = False ):
+  '''Yields every page of results of a scan split into parallel segments.
+
+  Every segment is scanned by its own thread and the pages are yielded in the
+  order they arrive. The threads wait when the consumer falls behind, so at
+  most two pages per segment are held at once.
+
+  Parameters
+  ----------
+  client : boto3.client
+    The boto3 DynamoDB client used to access the table.
+  request : dict
+    The arguments of the scan.
+  segments : int, optional
+    The number of segments scanned at the same time. (default is 1)
+  prefetch : bool, optional
+    Whether to request the next page while the current one is used. Segmented
+    scans always request ahead. (default is False)
+
+  Raises
+  ------
+  ValueError
+    When there is not at least one segment.
+  ClientError
+    When the DynamoDB client raises an exception while iterating.
+
+  Returns
+  -------
+    An iterable that iterates over the results of every request.
+  '''
+  if not isinstance( segments, int ) or segments < 1:
+    raise ValueError( 'Must use at least one segment' )
+  if segments == 1:
+    return paginate( client, 'scan', request, prefetch )
+  return _scanSegments( client, request, segments )
+
+def _scanSegments( client, request, segments ):
+  '''Yields the pages of the segments of a scan as they arrive.'''
+  results = queue.Queue( maxsize = 2 * segments )
+  stopped = threading.Event()
+
+  def put( result ):
+    # Stop waiting for the consumer once it has stopped iterating.
+    while not stopped.is_set():
+      try:
+        results.put( result, timeout = 0.1 )
+        return True
+      except queue.Full:
+        continue
+    return False
+
+  def scanSegment( segment ):
+    try:
+      for result in paginate( client, 'scan', {
+        **request, 'Segment': segment, 'TotalSegments': segments
+      } ):
+        if not put( result ):
+          return
+    except Exception as e: # pylint: disable=broad-except
+      put( e )
+    # Every segment ends with None so the consumer knows when all are done.
+    put( None )
+
+  with ThreadPoolExecutor( max_workers = segments ) as executor:
+    for segment in range( segments ):
+      executor.submit( scanSegment, segment )
+    try:
+      remaining = segments
+      while remaining > 0:
+        result = results.get()
+        if result is None:
+          remaining -= 1
+        elif isinstance( result, Exception ):
+          raise result
+        else:
+          yield result
+    finally:
+      stopped.set()
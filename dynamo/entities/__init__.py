@@ -8,4 +8,10 @@ from .day import *
 from .week import *
 from .month import *
 from .year import *
+from .sketch import *
+from .scroll import *
+from .aggregate import *
+from .transitions import *
 from .util import *
+from .decode import *
+from .encode import *
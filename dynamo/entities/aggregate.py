@@ -0,0 +1,262 @@
+from .util import toItemException
+from .sketch import VisitorSketch, bytesToSketch, TopPages, bytesToTopPages
+
+class Aggregate:
+  '''A class to represent the mergeable analytics of a page, day, week, month,
+  or year.
+
+  The analytics are stored as counts and sums so that the analytics of new
+  visits can be added to the ones already in the table.
+
+  Attributes
+  ----------
+  numberVisits : int
+    The number of visits.
+  timeSum : float
+    The total number of seconds spent on the page by the visits that have a
+    time on page.
+  timeCount : int
+    The number of visits that have a time on page.
+  churnCount : int
+    The number of visits that did not continue to another page.
+  visitors : VisitorSketch
+    The HyperLogLog sketch of the unique IDs of the visitors.
+  fromCount : TopPages
+    The number of visits that came from the most frequent pages.
+  toCount : TopPages
+    The number of visits that went to the most frequent pages.
+
+  Methods
+  -------
+  addVisit( visit ):
+    Adds a visit to the analytics.
+  merge( other ):
+    Adds the analytics of another aggregate to this one.
+  numberVisitors():
+    Returns the estimated number of unique visitors.
+  averageTime():
+    Returns the average time spent on the page.
+  percentChurn():
+    Returns the ratio of the visits that churned on the page.
+  fromPage():
+    Returns the ratios of the pages the visits came from.
+  toPage():
+    Returns the ratios of the pages the visits went to.
+  analytics( numberVisitors = None ):
+    Returns the number of unique visitors, average time, churn, and from and
+    to page ratios.
+  toItem():
+    Returns the analytics as DynamoDB attributes.
+  '''
+  def __init__(
+    self, numberVisits = 0, timeSum = 0.0, timeCount = 0, churnCount = 0,
+    visitors = None, fromCount = None, toCount = None
+  ):
+    '''Constructs the necessary attributes for the aggregate object.
+
+    Parameters
+    ----------
+    numberVisits : int, optional
+      The number of visits. (default is 0)
+    timeSum : float, optional
+      The total number of seconds spent on the page by the visits that have a
+      time on page. (default is 0.0)
+    timeCount : int, optional
+      The number of visits that have a time on page. (default is 0)
+    churnCount : int, optional
+      The number of visits that did not continue to another page. (default is
+      0)
+    visitors : VisitorSketch | list[ str ], optional
+      The sketch of the unique IDs of the visitors, or the IDs to add to a new
+      sketch. (default is an empty sketch)
+    fromCount : TopPages | dict, optional
+      The number of visits that came from each page. (default is an empty
+      sketch)
+    toCount : TopPages | dict, optional
+      The number of visits that went to each page. (default is an empty
+      sketch)
+    '''
+    self.numberVisits = int( numberVisits )
+    self.timeSum = float( timeSum )
+    self.timeCount = int( timeCount )
+    self.churnCount = int( churnCount )
+    self.visitors = visitors.copy() \
+      if isinstance( visitors, VisitorSketch ) else VisitorSketch( visitors )
+    self.fromCount = fromCount.copy() \
+      if isinstance( fromCount, TopPages ) else TopPages( fromCount )
+    self.toCount = toCount.copy() \
+      if isinstance( toCount, TopPages ) else TopPages( toCount )
+
+  def addVisit( self, visit ):
+    '''Adds a visit to the analytics.
+
+    Parameters
+    ----------
+    visit : Visit
+      The visit to add.
+    '''
+    self.numberVisits += 1
+    if isinstance( visit.timeOnPage, float ):
+      self.timeSum += visit.timeOnPage
+      self.timeCount += 1
+    if visit.nextSlug is None:
+      self.churnCount += 1
+    self.visitors.add( visit.id )
+    fromSlug = 'www' if visit.prevSlug is None else visit.prevSlug
+    toSlug = 'www' if visit.nextSlug is None else visit.nextSlug
+    self.fromCount.add( fromSlug )
+    self.toCount.add( toSlug )
+    return self
+
+  def merge( self, other ):
+    '''Adds the analytics of another aggregate to this one.
+
+    Parameters
+    ----------
+    other : Aggregate
+      The analytics to add.
+    '''
+    self.numberVisits += other.numberVisits
+    self.timeSum += other.timeSum
+    self.timeCount += other.timeCount
+    self.churnCount += other.churnCount
+    self.visitors.merge( other.visitors )
+    self.fromCount.merge( other.fromCount )
+    self.toCount.merge( other.toCount )
+    return self
+
+  def numberVisitors( self ):
+    '''Returns the estimated number of unique visitors.'''
+    return self.visitors.count()
+
+  def averageTime( self ):
+    '''Returns the average time spent on the page.
+
+    When none of the visits have a time on page, there is no average time.
+    '''
+    if self.timeCount == 0:
+      return None
+    return self.timeSum / self.timeCount
+
+  def percentChurn( self ):
+    '''Returns the ratio of the visits that churned on the page.'''
+    return self.churnCount / self.numberVisits
+
+  def fromPage( self ):
+    '''Returns the ratios of the pages the visits came from.
+
+    The visits from pages that are not kept are in the 'other' ratio.
+    '''
+    return self.fromCount.ratios()
+
+  def toPage( self ):
+    '''Returns the ratios of the pages the visits went to.
+
+    The visits to pages that are not kept are in the 'other' ratio.
+    '''
+    return self.toCount.ratios()
+
+  def analytics( self, numberVisitors = None ):
+    '''Returns the number of unique visitors, average time, churn, and from and
+    to page ratios.
+
+    These are in the order the page, day, week, month, and year objects take
+    them.
+
+    Parameters
+    ----------
+    numberVisitors : int | str, optional
+      The exact number of unique visitors. When None, it is estimated from
+      the sketch. (default is None)
+    '''
+    if numberVisitors is None:
+      numberVisitors = self.numberVisitors()
+    return (
+      int( numberVisitors ), self.averageTime(), self.percentChurn(),
+      self.fromPage(), self.toPage()
+    )
+
+  def toItem( self ):
+    '''Returns the analytics as DynamoDB attributes.
+
+    Returns
+    -------
+    item : dict
+      The analytics in DynamoDB syntax.
+    '''
+    return {
+      'VisitCount': { 'N': str( self.numberVisits ) },
+      'TimeSum': { 'N': str( self.timeSum ) },
+      'TimeCount': { 'N': str( self.timeCount ) },
+      'ChurnCount': { 'N': str( self.churnCount ) },
+      'VisitorSketch': { 'B': self.visitors.toBytes() },
+      'FromSketch': { 'B': self.fromCount.toBytes() },
+      'ToSketch': { 'B': self.toCount.toBytes() }
+    }
+
+  def __repr__( self ):
+    return f'{ self.numberVisits } visits - { self.numberVisitors() } visitors'
+
+  def __iter__( self ):
+    yield 'numberVisits', self.numberVisits
+    yield 'timeSum', self.timeSum
+    yield 'timeCount', self.timeCount
+    yield 'churnCount', self.churnCount
+    yield 'visitors', self.visitors
+    yield 'fromCount', self.fromCount
+    yield 'toCount', self.toCount
+
+def itemToAggregate( item ):
+  '''Parses the mergeable analytics of a DynamoDB item.
+
+  Parameters
+  ----------
+  item : dict
+    The raw DynamoDB item of a page, day, week, month, or year.
+
+  Raises
+  ------
+  toItemException
+    When the item's analytics are not structured as expected.
+
+  Returns
+  -------
+  aggregate : Aggregate | None
+    The analytics parsed from the item. When the item was written without
+    mergeable analytics, there is no aggregate.
+  '''
+  if 'VisitCount' not in item.keys():
+    return None
+  try:
+    return Aggregate(
+      item['VisitCount']['N'], item['TimeSum']['N'], item['TimeCount']['N'],
+      item['ChurnCount']['N'],
+      bytesToSketch( item['VisitorSketch']['B'] )
+      if 'VisitorSketch' in item.keys() else item['Visitors']['SS'],
+      *[
+        bytesToTopPages( item[f'{ name }Sketch']['B'] )
+        if f'{ name }Sketch' in item.keys() else {
+          key: int( value['N'] )
+          for ( key, value ) in item[f'{ name }Count']['M'].items()
+        }
+        for name in ( 'From', 'To' )
+      ]
+    )
+  except Exception as e:
+    print( f'ERROR itemToAggregate: {e}' )
+    raise toItemException( 'aggregate' ) from e
+
+def storedVisitors( item ):
+  '''Returns the number of unique visitors stored on a DynamoDB item.
+
+  Parameters
+  ----------
+  item : dict
+    The raw DynamoDB item of a page, day, week, month, or year.
+
+  Returns
+  -------
+  numberVisitors : str | None
+    The number of unique visitors, or None when the item does not have one.
+  '''
+  return item.get( 'NumberVisitors', {} ).get( 'N' )
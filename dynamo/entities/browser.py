@@ -43,6 +43,11 @@ class Browser:
   toItem():
     Returns the browser as a parsed DynamoDB item.
   '''
+  __slots__ = (
+    'id', 'app', 'width', 'height', 'dateVisited', 'dateAdded', 'device',
+    'deviceType', 'browser', 'os', 'webkit', 'version'
+  )
+
   def __init__(
     self, visitor_id, app, width, height, dateVisited, device = None,
     deviceType = None, browser = None, os = None,  webkit = None,
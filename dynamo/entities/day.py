@@ -1,5 +1,6 @@
 import re
 from .util import objectToItemAtr, toItemException
+from .aggregate import itemToAggregate, storedVisitors
 
 class Day:
   '''A class to represent a day item for DynamoDB.
@@ -28,6 +29,8 @@ class Day:
     The different pages the visitors came from and their ratios.
   toPage : dict
     The different pages the visitors when to and their ratios.
+  aggregate : Aggregate | None
+    The mergeable analytics the ratios are calculated from.
 
   Methods
   -------
@@ -42,7 +45,7 @@ class Day:
   '''
   def __init__(
     self, slug, title, date, numberVisitors, averageTime,
-    percentChurn, fromPage, toPage
+    percentChurn, fromPage, toPage, aggregate = None
   ):
     '''Constructs the necessary attributes for the day object.
 
@@ -66,6 +69,9 @@ class Day:
       The different pages the visitors came from and their ratios.
     toPage : dict
       The different pages the visitors when to and their ratios.
+    aggregate : Aggregate | None, optional
+      The mergeable analytics the ratios are calculated from. (default is
+      None)
     '''
     dateMatch = re.match( r'(\d+)-(\d+)-(\d+)', date )
     if not dateMatch:
@@ -88,6 +94,7 @@ class Day:
     self.percentChurn = float( percentChurn )
     self.fromPage = fromPage
     self.toPage = toPage
+    self.aggregate = aggregate
 
   def key( self ):
     '''Returns the Primary Key of the day.
@@ -155,7 +162,8 @@ class Day:
       'AverageTime': objectToItemAtr( self.averageTime ),
       'PercentChurn': objectToItemAtr( self.percentChurn ),
       'FromPage': objectToItemAtr( self.fromPage ),
-      'ToPage': objectToItemAtr( self.toPage )
+      'ToPage': objectToItemAtr( self.toPage ),
+      **( {} if self.aggregate is None else self.aggregate.toItem() )
     }
 
   def __repr__( self ):
@@ -200,6 +208,12 @@ def itemToDay( item ):
     The day object parsed from the raw DynamoDB item.
   '''
   try:
+    aggregate = itemToAggregate( item )
+    if aggregate is not None:
+      return Day(
+        item['Slug']['S'], item['Title']['S'], item['SK']['S'].split('#')[2],
+        *aggregate.analytics( storedVisitors( item ) ), aggregate
+      )
     return Day(
       item['Slug']['S'], item['Title']['S'], item['SK']['S'].split('#')[2],
       item['NumberVisitors']['N'],
@@ -0,0 +1,289 @@
+import sys
+import datetime
+from .visit import Visit
+from .visitor import Visitor
+from .session import Session
+from .location import Location
+from .browser import Browser
+from .page import Page
+from .day import Day
+from .week import Week
+from .month import Month
+from .year import Year
+from .aggregate import itemToAggregate, storedVisitors
+from .transitions import itemToTransitions
+from .scroll import itemAtrToScrollEvents
+from .util import toItemException, internString
+
+# The Python expressions that parse each kind of attribute, where "{value}" is
+# the attribute of the item.
+KINDS = {
+  'S': "{value}['S']",
+  'S?': "{value}.get( 'S' )",
+  'internedS': "_intern( {value}['S'] )",
+  'internedS?': "_internString( {value}.get( 'S' ) )",
+  'SS?': "{value}.get( 'SS' )",
+  'BOOL': "{value}['BOOL']",
+  'int': "int( {value}['N'] )",
+  'float': "float( {value}['N'] )",
+  'float?': "( None if 'NULL' in {value} else float( {value}['N'] ) )",
+  'date': "_date( {value}['S'] )",
+  'id': "{value}['S'].split( '#' )[1]",
+  'internedId': "_intern( {value}['S'].split( '#' )[1] )",
+  'keyDate': "_date( {value}['S'].split( '#' )[1] )",
+  'sessionStart': "_date( {value}['S'].split( '#' )[2] )",
+  'year': "int( {value}['S'].split( '#' )[2].split( '-' )[0] )",
+  'part': "int( {value}['S'].split( '#' )[2].split( '-' )[1] )",
+  'day': "int( {value}['S'].split( '#' )[2].split( '-' )[2] )",
+  'scrollEvents': "_itemAtrToScrollEvents( {value}, entity.date )",
+  'autonomousSystem': "_autonomousSystem( {value} )",
+  'empty': 'dict()'
+}
+
+def _date( value ):
+  '''Parses a datetime string formatted like JS's ISO standard.'''
+  return datetime.datetime.fromisoformat( value[:-1] )
+
+def _autonomousSystem( value ):
+  '''Parses the routing data of a location.'''
+  return {
+    key: int( atr['N'] ) if 'N' in atr else atr.get( 'S' )
+    for key, atr in value['M'].items()
+    if 'N' in atr or 'S' in atr or 'NULL' in atr
+  }
+
+def _rollupAnalytics( item ):
+  '''Parses the analytics of a page, day, week, month, or year item.'''
+  aggregate = itemToAggregate( item )
+  if aggregate is not None:
+    numberVisitors, averageTime, percentChurn, fromPage, toPage = \
+      aggregate.analytics( storedVisitors( item ) )
+  else:
+    numberVisitors = item['NumberVisitors']['N']
+    averageTime = item['AverageTime'].get( 'N' )
+    percentChurn = item['PercentChurn']['N']
+    fromPage, toPage = [
+      {
+        key: float( value['N'] )
+        for key, value in item[name]['M'].items()
+        if 'N' in value
+      }
+      for name in ( 'FromPage', 'ToPage' )
+    ]
+  return {
+    'numberVisitors': int( numberVisitors ),
+    'averageTime': float( averageTime ) if averageTime is not None else None,
+    'percentChurn': float( percentChurn ),
+    'fromPage': fromPage,
+    'toPage': toPage,
+    'aggregate': aggregate
+  }
+
+def compileDecoder( itemType, cls, fields, extra = None ):
+  '''Compiles a function that parses one type of DynamoDB item.
+
+  The function creates the object without calling its constructor and sets
+  its attributes straight from the item, so the item must have been written
+  by the object's `toItem`.
+
+  Parameters
+  ----------
+  itemType : str
+    The 'Type' of the items parsed.
+  cls : type
+    The class of the objects created.
+  fields : list[ tuple ]
+    The object's attribute, the item's attribute, and its kind of every
+    field. When a field has a fourth value, it is the default used when the
+    item does not have the attribute.
+  extra : function, optional
+    The function that returns more attributes of the object from the item.
+    (default is None)
+
+  Returns
+  -------
+  decode : function
+    The function that parses an item as an object.
+  '''
+  lines = [
+    'def decode( item ):',
+    '  try:',
+    '    entity = _new( _cls )'
+  ]
+  for attribute, name, kind, *default in fields:
+    expression = KINDS[kind].format( value = f'item[{ repr( name ) }]' )
+    if default:
+      expression = f'( { expression } if { repr( name ) } in item ' + \
+        f'else { repr( default[0] ) } )'
+    lines.append( f'    entity.{ attribute } = { expression }' )
+  if extra is not None:
+    lines.append( '    entity.__dict__.update( _extra( item ) )' )
+  lines += [
+    '    return entity',
+    '  except ( KeyError, ValueError, TypeError, AttributeError ) as e:',
+    f"    print( f'ERROR decode{ cls.__name__ }: {{ e }}' )",
+    f'    raise toItemException( { repr( itemType ) } ) from e'
+  ]
+  namespace = {
+    '_new': object.__new__, '_cls': cls, '_extra': extra, '_date': _date,
+    '_intern': sys.intern, '_internString': internString,
+    '_itemAtrToScrollEvents': itemAtrToScrollEvents,
+    '_autonomousSystem': _autonomousSystem,
+    'toItemException': toItemException
+  }
+  exec( '\n'.join( lines ), namespace ) # pylint: disable=exec-used
+  decode = namespace['decode']
+  decode.__name__ = decode.__qualname__ = f'decode{ cls.__name__ }'
+  return decode
+
+_VISIT_LINKS = [
+  ( 'prevTitle', 'PreviousTitle' ), ( 'prevSlug', 'PreviousSlug' ),
+  ( 'nextTitle', 'NextTitle' ), ( 'nextSlug', 'NextSlug' )
+]
+
+# The fields of every type of item, in the order of the object's attributes.
+SCHEMAS = {
+  'visit': ( Visit, [
+    ( 'date', 'SK', 'keyDate' ),
+    ( 'id', 'PK', 'internedId' ),
+    ( 'user', 'User', 'int' ),
+    ( 'title', 'Title', 'internedS' ),
+    ( 'slug', 'Slug', 'internedS' ),
+    ( 'sessionStart', 'GSI2PK', 'sessionStart' ),
+    ( 'scrollEvents', 'ScrollEvents', 'scrollEvents' ),
+    *[
+      ( attribute, name, 'internedS?' ) for attribute, name in _VISIT_LINKS
+    ],
+    ( 'timeOnPage', 'TimeOnPage', 'float?' )
+  ] ),
+  'visitor': ( Visitor, [
+    ( 'id', 'PK', 'id' ),
+    ( 'numberSessions', 'NumberSessions', 'int' )
+  ] ),
+  'session': ( Session, [
+    ( 'sessionStart', 'SK', 'keyDate' ),
+    ( 'id', 'PK', 'internedId' ),
+    ( 'avgTime', 'AverageTime', 'float?' ),
+    ( 'totalTime', 'TotalTime', 'float?' )
+  ] ),
+  'location': ( Location, [
+    ( 'id', 'PK', 'id' ),
+    ( 'ip', 'IP', 'S' ),
+    ( 'country', 'Country', 'S' ),
+    ( 'region', 'Region', 'S' ),
+    ( 'city', 'City', 'S' ),
+    ( 'latitude', 'Latitude', 'float' ),
+    ( 'longitude', 'Longitude', 'float' ),
+    ( 'postalCode', 'PostalCode', 'S?' ),
+    ( 'timeZone', 'TimeZone', 'S' ),
+    ( 'domains', 'Domains', 'SS?' ),
+    ( 'autonomousSystem', 'AutonomousSystem', 'autonomousSystem' ),
+    ( 'isp', 'ISP', 'S' ),
+    ( 'proxy', 'Proxy', 'BOOL' ),
+    ( 'vpn', 'VPN', 'BOOL' ),
+    ( 'tor', 'TOR', 'BOOL' ),
+    ( 'dateAdded', 'DateAdded', 'date' )
+  ] ),
+  # The browser's device, OS, and version are stored, so the user agent is
+  # not matched again.
+  'browser': ( Browser, [
+    ( 'id', 'PK', 'id' ),
+    ( 'app', 'App', 'S' ),
+    ( 'width', 'Width', 'int' ),
+    ( 'height', 'Height', 'int' ),
+    ( 'dateVisited', 'DateVisited', 'date' ),
+    ( 'dateAdded', 'DateAdded', 'date' ),
+    *[
+      ( attribute, name, 'S?' ) for attribute, name in (
+        ( 'device', 'Device' ), ( 'deviceType', 'DeviceType' ),
+        ( 'browser', 'Browser' ), ( 'os', 'OS' ), ( 'webkit', 'Webkit' ),
+        ( 'version', 'Version' )
+      )
+    ]
+  ] ),
+  'page': ( Page, [
+    ( 'slug', 'Slug', 'S' ),
+    ( 'title', 'Title', 'S' )
+  ] ),
+  'day': ( Day, [
+    ( 'slug', 'Slug', 'S' ),
+    ( 'title', 'Title', 'S' ),
+    ( 'year', 'SK', 'year' ),
+    ( 'month', 'SK', 'part' ),
+    ( 'day', 'SK', 'day' )
+  ] ),
+  'week': ( Week, [
+    ( 'slug', 'Slug', 'S' ),
+    ( 'title', 'Title', 'S' ),
+    ( 'year', 'SK', 'year' ),
+    ( 'week', 'SK', 'part' )
+  ] ),
+  'month': ( Month, [
+    ( 'slug', 'Slug', 'S' ),
+    ( 'title', 'Title', 'S' ),
+    ( 'year', 'SK', 'year' ),
+    ( 'month', 'SK', 'part' )
+  ] ),
+  'year': ( Year, [
+    ( 'slug', 'Slug', 'S' ),
+    ( 'title', 'Title', 'S' ),
+    ( 'year', 'SK', 'year' )
+  ] )
+}
+
+# The types of items whose analytics are parsed after their fields.
+ROLLUP_TYPES = ( 'page', 'day', 'week', 'month', 'year' )
+
+# The decoder of every type of item.
+DECODERS = {
+  itemType: compileDecoder(
+    itemType, cls, fields,
+    _rollupAnalytics if itemType in ROLLUP_TYPES else None
+  )
+  for itemType, ( cls, fields ) in SCHEMAS.items()
+}
+# The transitions are stored as arrays that are already parsed in bulk.
+DECODERS['transitions'] = itemToTransitions
+
+# The decoder of the visits read with a projection profile. Only the visitor
+# ID, date, and slug are required.
+decodeLightVisit = compileDecoder( 'visit', Visit, [
+  ( 'date', 'SK', 'keyDate' ),
+  ( 'id', 'PK', 'internedId' ),
+  ( 'user', 'User', 'int', 0 ),
+  ( 'title', 'Title', 'internedS', None ),
+  ( 'slug', 'Slug', 'internedS' ),
+  ( 'sessionStart', 'GSI2PK', 'sessionStart', None ),
+  ( 'scrollEvents', 'ScrollEvents', 'empty' ),
+  *[
+    ( attribute, name, 'internedS?', None )
+    for attribute, name in _VISIT_LINKS
+  ],
+  ( 'timeOnPage', 'TimeOnPage', 'float?', None )
+] )
+
+def decodeItem( item ):
+  '''Parses a DynamoDB item written by the table as its respective object.
+
+  Parameters
+  ----------
+  item : dict
+    The raw DynamoDB item.
+
+  Raises
+  ------
+  toItemException
+    When the item's type is unknown or the item is missing the required keys
+    to parse into an object.
+
+  Returns
+  -------
+  entity : object
+    The object parsed from the raw DynamoDB item.
+  '''
+  try:
+    decoder = DECODERS[item['Type']['S']]
+  except KeyError as e:
+    print( f'ERROR decodeItem: { e }' )
+    raise toItemException( 'item' ) from e
+  return decoder( item )
@@ -0,0 +1,164 @@
+from .visit import Visit
+from .visitor import Visitor
+from .session import Session
+from .location import Location
+from .browser import Browser
+from .scroll import scrollEventsToItemAtr
+from .util import formatDate, objectToItemAtr
+
+def _dateFormatter():
+  '''Returns a `formatDate` that formats every datetime only once.
+
+  The visits of a session share the session's start, so a batch of visits
+  formats it once instead of twice per visit.
+  '''
+  formatted = {}
+  def formatter( date ):
+    text = formatted.get( date )
+    if text is None:
+      text = formatted[date] = formatDate( date )
+    return text
+  return formatter
+
+def _encodeVisit( visit, formatter ):
+  '''Returns the visit as a DynamoDB item.'''
+  date = formatDate( visit.date )
+  sessionPK = f'SESSION#{ visit.id }#{ formatter( visit.sessionStart ) }'
+  return {
+    'PK': { 'S': f'VISITOR#{ visit.id }' },
+    'SK': { 'S': f'VISIT#{ date }#{ visit.slug }' },
+    'GSI1PK': { 'S': f'PAGE#{ visit.slug }' },
+    'GSI1SK': { 'S': f'VISIT#{ date }' },
+    'GSI2PK': { 'S': sessionPK },
+    'GSI2SK': { 'S': f'VISIT#{ date }' },
+    'Type': { 'S': 'visit' },
+    'User': { 'N': f'{ visit.user }' },
+    'Title': { 'S': visit.title },
+    'Slug': { 'S': visit.slug },
+    'ScrollEvents': scrollEventsToItemAtr( visit.scrollEvents, visit.date ),
+    'PreviousTitle': objectToItemAtr( visit.prevTitle ),
+    'PreviousSlug': objectToItemAtr( visit.prevSlug ),
+    'NextTitle': objectToItemAtr( visit.nextTitle ),
+    'NextSlug': objectToItemAtr( visit.nextSlug ),
+    'TimeOnPage': objectToItemAtr( visit.timeOnPage )
+  }
+
+def _encodeVisitor( visitor, _formatter ):
+  '''Returns the visitor as a DynamoDB item.'''
+  return {
+    'PK': { 'S': f'VISITOR#{ visitor.id }' },
+    'SK': { 'S': '#VISITOR' },
+    'GSI3PK': { 'S': 'TYPE#visitor' },
+    'GSI3SK': { 'S': visitor.id },
+    'Type': { 'S': 'visitor' },
+    'NumberSessions': { 'N': str( visitor.numberSessions ) }
+  }
+
+def _encodeSession( session, formatter ):
+  '''Returns the session as a DynamoDB item.'''
+  sessionStart = formatter( session.sessionStart )
+  return {
+    'PK': { 'S': f'VISITOR#{ session.id }' },
+    'SK': { 'S': f'SESSION#{ sessionStart }' },
+    'GSI2PK': { 'S': f'SESSION#{ session.id }#{ sessionStart }' },
+    'GSI2SK': { 'S': '#SESSION' },
+    'Type': { 'S': 'session' },
+    'AverageTime': objectToItemAtr( session.avgTime ),
+    'TotalTime': objectToItemAtr( session.totalTime )
+  }
+
+def _encodeLocation( location, _formatter ):
+  '''Returns the location as a DynamoDB item.'''
+  dateAdded = formatDate( location.dateAdded )
+  return {
+    'PK': { 'S': f'VISITOR#{ location.id }' },
+    'SK': { 'S': '#LOCATION' },
+    'GSI3PK': { 'S': 'TYPE#location' },
+    'GSI3SK': { 'S': dateAdded },
+    'Type': { 'S': 'location' },
+    'IP': { 'S': location.ip },
+    'Country': { 'S': location.country },
+    'Region': { 'S': location.region },
+    'City': { 'S': location.city },
+    'Latitude': { 'N': str( location.latitude ) },
+    'Longitude': { 'N': str( location.longitude ) },
+    'PostalCode': objectToItemAtr( location.postalCode ),
+    'TimeZone': { 'S': location.timeZone },
+    'Domains': objectToItemAtr( location.domains ),
+    'AutonomousSystem': objectToItemAtr( location.autonomousSystem ),
+    'ISP': { 'S': location.isp },
+    'Proxy': { 'BOOL': location.proxy },
+    'VPN': { 'BOOL': location.vpn },
+    'TOR': { 'BOOL': location.tor },
+    'DateAdded': { 'S': dateAdded }
+  }
+
+def _encodeBrowser( browser, formatter ):
+  '''Returns the browser as a DynamoDB item.'''
+  dateVisited = formatDate( browser.dateVisited )
+  return {
+    'PK': { 'S': f'VISITOR#{ browser.id }' },
+    'SK': { 'S': f'BROWSER#{ dateVisited }' },
+    'Type': { 'S': 'browser' },
+    'App': objectToItemAtr( browser.app ),
+    'Width': objectToItemAtr( browser.width ),
+    'Height': objectToItemAtr( browser.height ),
+    'DateVisited': { 'S': dateVisited },
+    'Device': objectToItemAtr( browser.device ),
+    'DeviceType': objectToItemAtr( browser.deviceType ),
+    'Browser': objectToItemAtr( browser.browser ),
+    'OS': objectToItemAtr( browser.os ),
+    'Webkit': objectToItemAtr( browser.webkit ),
+    'Version': objectToItemAtr( browser.version ),
+    'DateAdded': objectToItemAtr( formatter( browser.dateAdded ) )
+  }
+
+# The encoder of every class written to the table in bulk. The other classes
+# are encoded with their `toItem`.
+ENCODERS = {
+  Visit: _encodeVisit,
+  Visitor: _encodeVisitor,
+  Session: _encodeSession,
+  Location: _encodeLocation,
+  Browser: _encodeBrowser
+}
+
+def encodeItem( entity ):
+  '''Returns an object as a DynamoDB item.
+
+  Parameters
+  ----------
+  entity : object
+    The object to encode, like a visit or a session.
+
+  Returns
+  -------
+  item : dict
+    The object in DynamoDB syntax. This is the same as the object's `toItem`.
+  '''
+  encoder = ENCODERS.get( type( entity ) )
+  if encoder is None:
+    return entity.toItem()
+  return encoder( entity, formatDate )
+
+def encodeItems( entities ):
+  '''Encodes objects as DynamoDB items one at a time.
+
+  The datetimes shared by the objects, like the start of the session of
+  every visit, are formatted once for the whole batch. The items are made as
+  they are used, so a large batch is never in memory twice.
+
+  Parameters
+  ----------
+  entities : list
+    The objects to encode, like visits and browsers.
+
+  Returns
+  -------
+    An iterable that iterates over the objects in DynamoDB syntax in the same
+    order.
+  '''
+  formatter = _dateFormatter()
+  for entity in entities:
+    encoder = ENCODERS.get( type( entity ) )
+    yield entity.toItem() if encoder is None else encoder( entity, formatter )
@@ -44,9 +44,18 @@ class Location:
     Returns the Primary Key of the location.
   pk():
     Returns the Partition Key of the location.
+  gsi3():
+    Returns the Primary Key of the third Global Secondary Index of the
+    location.
   toItem():
     Returns the location as a parsed DynamoDB item.
   '''
+  __slots__ = (
+    'id', 'ip', 'country', 'region', 'city', 'latitude', 'longitude',
+    'postalCode', 'timeZone', 'domains', 'autonomousSystem', 'isp', 'proxy',
+    'vpn', 'tor', 'dateAdded'
+  )
+
   def __init__(
     self, visitor_id, ip, country, region, city, latitude, longitude,
     postalCode, timezone, domains, autonomousSystem, isp, proxy, vpn, tor,
@@ -126,6 +135,18 @@ class Location:
     '''
     return { 'S': f'VISITOR#{ self.id }' }
 
+  def gsi3( self ):
+    '''Returns the Primary Key of the third Global Secondary Index of the
+    location.
+
+    This is used to list the locations by the date they were added without
+    scanning the table.
+    '''
+    return {
+      'GSI3PK': { 'S': 'TYPE#location' },
+      'GSI3SK': { 'S': formatDate( self.dateAdded ) }
+    }
+
   def toItem( self ):
     '''Returns the location as a parsed DynamoDB item.
 
@@ -136,6 +157,7 @@ class Location:
     '''
     return {
       **self.key(),
+      **self.gsi3(),
       'Type': { 'S': 'location' },
       'IP': { 'S': self.ip },
       'Country': { 'S': self.country },
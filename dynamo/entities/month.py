@@ -1,5 +1,6 @@
 import re
 from .util import objectToItemAtr, toItemException
+from .aggregate import itemToAggregate, storedVisitors
 
 class Month:
   '''A class to represent a month item for DynamoDB.
@@ -26,6 +27,8 @@ class Month:
     The different pages the visitors came from and their ratios.
   toPage : dict
     The different pages the visitors when to and their ratios.
+  aggregate : Aggregate | None
+    The mergeable analytics the ratios are calculated from.
 
   Methods
   -------
@@ -42,7 +45,7 @@ class Month:
   '''
   def __init__(
     self, slug, title, date, numberVisitors, averageTime,
-    percentChurn, fromPage, toPage
+    percentChurn, fromPage, toPage, aggregate = None
   ):
     '''Constructs the necessary attributes for the month object.
 
@@ -66,6 +69,9 @@ class Month:
       The different pages the visitors came from and their ratios.
     toPage : dict
       The different pages the visitors when to and their ratios.
+    aggregate : Aggregate | None, optional
+      The mergeable analytics the ratios are calculated from. (default is
+      None)
     '''
     dateMatch = re.match( r'(\d+)-(\d+)', date )
     if not dateMatch:
@@ -85,6 +91,7 @@ class Month:
     self.percentChurn = float( percentChurn )
     self.fromPage = fromPage
     self.toPage = toPage
+    self.aggregate = aggregate
 
   def key( self ):
     '''Returns the Primary Key of the week.
@@ -142,7 +149,8 @@ class Month:
       'AverageTime': objectToItemAtr( self.averageTime ),
       'PercentChurn': objectToItemAtr( self.percentChurn ),
       'FromPage': objectToItemAtr( self.fromPage ),
-      'ToPage': objectToItemAtr( self.toPage )
+      'ToPage': objectToItemAtr( self.toPage ),
+      **( {} if self.aggregate is None else self.aggregate.toItem() )
     }
 
   def __repr__( self ):
@@ -178,6 +186,12 @@ def itemToMonth( item ):
     The month object parsed from the raw DynamoDB item.
   '''
   try:
+    aggregate = itemToAggregate( item )
+    if aggregate is not None:
+      return Month(
+        item['Slug']['S'], item['Title']['S'], item['SK']['S'].split('#')[2],
+        *aggregate.analytics( storedVisitors( item ) ), aggregate
+      )
     return Month(
       item['Slug']['S'], item['Title']['S'], item['SK']['S'].split('#')[2],
       item['NumberVisitors']['N'],
@@ -1,4 +1,5 @@
 from .util import objectToItemAtr, toItemException
+from .aggregate import itemToAggregate, storedVisitors
 
 class Page:
   '''A class to represent a page item for DynamoDB.
@@ -21,6 +22,8 @@ class Page:
     The different pages the visitors came from and their ratios.
   toPage : dict
     The different pages the visitors when to and their ratios.
+  aggregate : Aggregate | None
+    The mergeable analytics the ratios are calculated from.
 
   Methods
   -------
@@ -30,12 +33,14 @@ class Page:
     Returns the Primary Key of the first Global Secondary Index of the page.
   gsi1pk():
     Returns the Partition Key of the first Global Secondary Index of the page.
+  gsi3():
+    Returns the Primary Key of the third Global Secondary Index of the page.
   toItem():
     Returns the page as a parsed DynamoDB item.
   '''
   def __init__(
     self, slug, title, numberVisitors, averageTime, percentChurn, fromPage,
-    toPage
+    toPage, aggregate = None
   ):
     '''Constructs the necessary attributes for the page object.
 
@@ -57,6 +62,9 @@ class Page:
       The different pages the visitors came from and their ratios.
     toPage : dict
       The different pages the visitors when to and their ratios.
+    aggregate : Aggregate | None, optional
+      The mergeable analytics the ratios are calculated from. (default is
+      None)
     '''
     self.slug = slug
     self.title = title
@@ -67,6 +75,7 @@ class Page:
     self.percentChurn = float( percentChurn )
     self.fromPage = fromPage
     self.toPage = toPage
+    self.aggregate = aggregate
 
   def key( self ):
     '''Returns the Primary Key of the page.
@@ -104,6 +113,17 @@ class Page:
     '''
     return { 'S': f'PAGE#{ self.slug }' }
 
+  def gsi3( self ):
+    '''Returns the Primary Key of the third Global Secondary Index of the
+    page.
+
+    This is used to list the pages without scanning the table.
+    '''
+    return {
+      'GSI3PK': { 'S': 'TYPE#page' },
+      'GSI3SK': { 'S': self.slug }
+    }
+
   def toItem( self ):
     '''Returns the visit as a parsed DynamoDB item.
 
@@ -115,6 +135,7 @@ class Page:
     return {
       **self.key(),
       **self.gsi1(),
+      **self.gsi3(),
       'Type': { 'S': 'page' },
       'Title': { 'S': self.title },
       'Slug': { 'S': self.slug },
@@ -122,7 +143,8 @@ class Page:
       'AverageTime': objectToItemAtr( self.averageTime ),
       'PercentChurn': objectToItemAtr( self.percentChurn ),
       'FromPage': objectToItemAtr( self.fromPage ),
-      'ToPage': objectToItemAtr( self.toPage )
+      'ToPage': objectToItemAtr( self.toPage ),
+      **( {} if self.aggregate is None else self.aggregate.toItem() )
     }
 
   def __repr__( self ):
@@ -156,6 +178,12 @@ def itemToPage( item ):
     The page object parsed from the raw DynamoDB item.
   '''
   try:
+    aggregate = itemToAggregate( item )
+    if aggregate is not None:
+      return Page(
+        item['Slug']['S'], item['Title']['S'],
+        *aggregate.analytics( storedVisitors( item ) ), aggregate
+      )
     return Page(
       item['Slug']['S'], item['Title']['S'], item['NumberVisitors']['N'],
       None if 'NULL' in item['AverageTime'].keys() \
@@ -0,0 +1,348 @@
+import re
+import zlib
+import base64
+from collections.abc import Mapping
+import numpy as np
+from .util import objectToItemAtr
+
+# The version of the binary format of the scroll events.
+SCROLL_VERSION = 1
+# The flag set when the varints are compressed.
+COMPRESSED = 1
+# The number of bytes of varints that are worth compressing.
+MIN_COMPRESS = 64
+# The number of varints below which a loop is faster than numpy's arrays.
+MIN_VECTORIZE = 256
+# The datetimes formatted by `formatDate`, one after another.
+_DATES = re.compile( r'(?:\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z)*' )
+
+def _toVarints( values ):
+  '''Encodes signed integers as zigzag varints.
+
+  Every byte holds 7 bits of the zigzag encoded value, least significant
+  first, and its high bit is set when more bytes follow.
+  '''
+  if len( values ) < MIN_VECTORIZE:
+    data = bytearray()
+    for value in values.tolist():
+      zigzag = ( value << 1 ) ^ ( value >> 63 )
+      while zigzag > 0x7f:
+        data.append( ( zigzag & 0x7f ) | 0x80 )
+        zigzag >>= 7
+      data.append( zigzag )
+    return bytes( data )
+  values = np.asarray( values, dtype = np.int64 )
+  zigzag = ( ( values << 1 ) ^ ( values >> 63 ) ).astype( np.uint64 )
+  lengths = np.ones( len( zigzag ), dtype = np.int64 )
+  for shift in range( 7, 64, 7 ):
+    lengths += ( zigzag >> np.uint64( shift ) ) > 0
+  ends = np.cumsum( lengths )
+  starts = ends - lengths
+  data = np.zeros( int( ends[-1] ) if len( ends ) else 0, dtype = np.uint8 )
+  for group in range( int( lengths.max() ) if len( lengths ) else 0 ):
+    rows = lengths > group
+    data[starts[rows] + group] = (
+      ( zigzag[rows] >> np.uint64( 7 * group ) ) & np.uint64( 0x7f )
+    ).astype( np.uint8 ) | np.where( lengths[rows] > group + 1, 0x80, 0 ) \
+      .astype( np.uint8 )
+  return data.tobytes()
+
+def _fromVarints( data ):
+  '''Decodes zigzag varints as signed integers.'''
+  if len( data ) < MIN_VECTORIZE:
+    values = []
+    zigzag = shift = 0
+    for byte in data:
+      zigzag |= ( byte & 0x7f ) << shift
+      if byte & 0x80:
+        shift += 7
+        if shift > 63:
+          raise ValueError( 'Scroll events have a number that is too large' )
+      else:
+        zigzag &= 0xffffffffffffffff
+        values.append( ( zigzag >> 1 ) ^ -( zigzag & 1 ) )
+        zigzag = shift = 0
+    if shift:
+      raise ValueError( 'Scroll events end in the middle of a number' )
+    return np.array( values, dtype = np.int64 )
+  data = np.frombuffer( data, dtype = np.uint8 )
+  ends = np.flatnonzero( data < 0x80 )
+  if len( data ) and ( len( ends ) == 0 or ends[-1] != len( data ) - 1 ):
+    raise ValueError( 'Scroll events end in the middle of a number' )
+  if len( ends ) == 0:
+    return np.zeros( 0, dtype = np.int64 )
+  starts = np.concatenate( ( [ 0 ], ends[:-1] + 1 ) )
+  groups = np.arange( len( data ) ) - np.repeat( starts, ends - starts + 1 )
+  if groups.max() > 9:
+    raise ValueError( 'Scroll events have a number that is too large' )
+  parts = ( data & 0x7f ).astype( np.uint64 ) \
+    << ( 7 * groups ).astype( np.uint64 )
+  zigzag = np.bitwise_or.reduceat( parts, starts )
+  return ( zigzag >> np.uint64( 1 ) ).astype( np.int64 ) \
+    ^ -( zigzag & np.uint64( 1 ) ).astype( np.int64 )
+
+class ScrollTrack( Mapping ):
+  '''A class to represent the scroll events of a visit as arrays.
+
+  Every event is a datetime and the x and y positions of the page, kept in
+  three arrays instead of a dictionary per event. The track is a read-only
+  mapping of the datetimes, formatted like `formatDate`, to dictionaries of
+  the positions, so it reads like the dictionary of scroll events.
+
+  Attributes
+  ----------
+  times : np.ndarray
+    The milliseconds since the epoch of every event, as int64.
+  x : np.ndarray
+    The horizontal position of every event, as int32.
+  y : np.ndarray
+    The vertical position of every event, as int32.
+  '''
+  def __init__( self, times = None, x = None, y = None ):
+    '''Constructs the necessary attributes for the scroll track object.
+
+    Parameters
+    ----------
+    times : list[ int ] | np.ndarray, optional
+      The milliseconds since the epoch of every event. Every event must have
+      a different time. (default is None)
+    x : list[ int ] | np.ndarray, optional
+      The horizontal position of every event. (default is None)
+    y : list[ int ] | np.ndarray, optional
+      The vertical position of every event. (default is None)
+    '''
+    self.times = np.asarray( [] if times is None else times, dtype = np.int64 )
+    self.x = np.asarray( [] if x is None else x, dtype = np.int32 )
+    self.y = np.asarray( [] if y is None else y, dtype = np.int32 )
+    if not len( self.times ) == len( self.x ) == len( self.y ):
+      raise ValueError( 'Scroll events must have a time and both positions' )
+
+  def keys( self ):
+    '''Returns the formatted datetimes of the events.'''
+    return [
+      f'{ date }Z' for date in np.datetime_as_string(
+        self.times.astype( 'datetime64[ms]' ), unit = 'ms'
+      ).tolist()
+    ]
+
+  def items( self ):
+    '''Returns the formatted datetimes and the positions of the events.'''
+    return [
+      ( key, { 'x': x, 'y': y } )
+      for key, x, y in zip( self.keys(), self.x.tolist(), self.y.tolist() )
+    ]
+
+  def values( self ):
+    '''Returns the positions of the events.'''
+    return [
+      { 'x': x, 'y': y } for x, y in zip( self.x.tolist(), self.y.tolist() )
+    ]
+
+  def __getitem__( self, key ):
+    if not isinstance( key, str ) or not _DATES.fullmatch( key ) \
+      or len( key ) != 24:
+      raise KeyError( key )
+    indexes = np.flatnonzero(
+      self.times == np.datetime64( key[:-1], 'ms' ).astype( np.int64 )
+    )
+    if len( indexes ) == 0:
+      raise KeyError( key )
+    return { 'x': int( self.x[indexes[0]] ), 'y': int( self.y[indexes[0]] ) }
+
+  def __iter__( self ):
+    return iter( self.keys() )
+
+  def __len__( self ):
+    return len( self.times )
+
+  def __eq__( self, other ):
+    if isinstance( other, ScrollTrack ):
+      return np.array_equal( self.times, other.times ) \
+        and np.array_equal( self.x, other.x ) \
+        and np.array_equal( self.y, other.y )
+    return Mapping.__eq__( self, other )
+
+  def __repr__( self ):
+    return f'{ len( self ) } scroll events'
+
+def _isScrollEvents( scrollEvents ):
+  '''Returns whether the scroll events have the datetimes and positions that
+  a scroll track stores.
+
+  Only the datetimes that are formatted the same way after they are parsed are
+  stored as milliseconds, and every event must have only its x and y
+  positions.
+  '''
+  return isinstance( scrollEvents, dict ) and all(
+    isinstance( key, str ) for key in scrollEvents
+  ) and _DATES.fullmatch( ''.join( scrollEvents.keys() ) ) is not None \
+    and all(
+      isinstance( event, dict ) and event.keys() == { 'x', 'y' }
+      for event in scrollEvents.values()
+    )
+
+def _isInt32( positions ):
+  '''Returns whether the positions are integers that fit in 32 bits.'''
+  if positions.dtype.kind != 'i':
+    return False
+  return positions.size == 0 or (
+    positions.min() >= np.iinfo( np.int32 ).min
+    and positions.max() <= np.iinfo( np.int32 ).max
+  )
+
+def toScrollTrack( scrollEvents ):
+  '''Returns the scroll events of a visit as a scroll track.
+
+  Parameters
+  ----------
+  scrollEvents : dict | ScrollTrack
+    The scroll positions of the visit by their formatted datetimes.
+
+  Returns
+  -------
+  track : ScrollTrack | None
+    The scroll events as arrays. When the events can not be stored exactly,
+    like when a datetime is not formatted with `formatDate` or a position is
+    not a 32-bit integer, there is no track.
+  '''
+  if isinstance( scrollEvents, ScrollTrack ):
+    return scrollEvents
+  if not _isScrollEvents( scrollEvents ):
+    return None
+  events = list( scrollEvents.values() )
+  positions = np.array( [
+    [ event['x'] for event in events ], [ event['y'] for event in events ]
+  ], dtype = None if events else np.int32 )
+  if not _isInt32( positions ):
+    return None
+  keys = ''.join( scrollEvents.keys() ).encode()
+  # Every datetime is 24 characters and the last one is the 'Z'.
+  try:
+    dates = np.ascontiguousarray(
+      np.frombuffer( keys, dtype = np.uint8 ).reshape( -1, 24 )[:, :23]
+    ).view( 'S23' ).ravel().astype( 'datetime64[ms]' )
+  except ValueError:
+    return None
+  return ScrollTrack( dates.astype( np.int64 ), positions[0], positions[1] )
+
+def scrollEventsToBytes( scrollEvents, start ):
+  '''Returns the scroll events of a visit as bytes.
+
+  The first byte is the version and the second byte holds the flags. The rest
+  are the number of events, the milliseconds between every event and the one
+  before it, starting with the visit's start, and every event's x and y
+  positions as zigzag varints. These are compressed when that makes them
+  smaller.
+
+  Parameters
+  ----------
+  scrollEvents : dict | ScrollTrack
+    The scroll positions of the visit by their formatted datetimes.
+  start : datetime.datetime
+    The datetime the visit started.
+
+  Returns
+  -------
+  data : bytes | None
+    The scroll events as bytes. When the events can not be stored exactly,
+    like when a datetime is not formatted with `formatDate` or a position is
+    not a 32-bit integer, there are no bytes.
+  '''
+  track = toScrollTrack( scrollEvents )
+  if track is None:
+    return None
+  offsets = track.times - np.datetime64( start, 'ms' ).astype( np.int64 )
+  data = _toVarints( np.concatenate( (
+    [ len( track ) ], np.diff( offsets, prepend = 0 ), track.x, track.y
+  ) ) )
+  if len( data ) >= MIN_COMPRESS:
+    compressed = zlib.compress( data )
+    if len( compressed ) < len( data ):
+      return bytes( [ SCROLL_VERSION, COMPRESSED ] ) + compressed
+  return bytes( [ SCROLL_VERSION, 0 ] ) + data
+
+def bytesToScrollEvents( data, start ):
+  '''Parses the bytes of the scroll events of a visit.
+
+  Parameters
+  ----------
+  data : bytes | str
+    The bytes returned by `scrollEventsToBytes`. The base64 encoded string of
+    a DynamoDB stream record is decoded first.
+  start : datetime.datetime
+    The datetime the visit started.
+
+  Raises
+  ------
+  ValueError
+    When the bytes are not scroll events of a known version.
+
+  Returns
+  -------
+  track : ScrollTrack
+    The scroll positions of the visit by their datetimes.
+  '''
+  if isinstance( data, str ):
+    data = base64.b64decode( data )
+  if len( data ) < 2 or data[0] != SCROLL_VERSION:
+    raise ValueError( 'Unknown scroll events version' )
+  body = zlib.decompress( data[2:] ) if data[1] & COMPRESSED else data[2:]
+  values = _fromVarints( body )
+  if len( values ) == 0 or len( values ) != 1 + 3 * values[0]:
+    raise ValueError( 'Scroll events do not match their number' )
+  number = int( values[0] )
+  positions = values[number + 1:]
+  if not _isInt32( positions ):
+    raise ValueError( 'Scroll events have a position that is too large' )
+  return ScrollTrack(
+    np.datetime64( start, 'ms' ).astype( np.int64 )
+      + np.cumsum( values[1:number + 1] ),
+    positions[:number], positions[number:]
+  )
+
+def scrollEventsToItemAtr( scrollEvents, start ):
+  '''Formats the scroll events of a visit to their DynamoDB syntax.
+
+  Parameters
+  ----------
+  scrollEvents : dict | ScrollTrack
+    The scroll positions of the visit by their formatted datetimes.
+  start : datetime.datetime
+    The datetime the visit started.
+
+  Returns
+  -------
+  result : dict
+    The scroll events as a binary attribute. When they can not be stored as
+    bytes, they are stored as a map like they used to be.
+  '''
+  data = scrollEventsToBytes( scrollEvents, start )
+  if data is None:
+    return objectToItemAtr( scrollEvents )
+  return { 'B': data }
+
+def itemAtrToScrollEvents( atr, start ):
+  '''Parses the scroll events of a visit from either of their formats.
+
+  Parameters
+  ----------
+  atr : dict
+    The 'ScrollEvents' attribute of the visit's item. This is either the
+    bytes or the map of the positions by their datetimes.
+  start : datetime.datetime
+    The datetime the visit started.
+
+  Returns
+  -------
+  scrollEvents : ScrollTrack | dict
+    The scroll positions of the visit by their formatted datetimes. These are
+    a dictionary when the map can not be stored as a track.
+  '''
+  if 'B' in atr:
+    return bytesToScrollEvents( atr['B'], start )
+  scrollEvents = {
+    key: { 'x': int( value['M']['x']['N'] ), 'y': int( value['M']['y']['N'] ) }
+    for key, value in atr['M'].items()
+  }
+  track = toScrollTrack( scrollEvents )
+  return scrollEvents if track is None else track
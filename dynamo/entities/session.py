@@ -1,5 +1,5 @@
 import datetime
-from .util import formatDate, toItemException, objectToItemAtr
+from .util import formatDate, toItemException, objectToItemAtr, internString
 
 class Session:
   """A class to represent a visitor's session item for DynamoDB.
@@ -31,6 +31,8 @@ class Session:
   toItem():
     Returns the session as a parsed DynamoDB item.
   """
+  __slots__ = ( 'sessionStart', 'id', 'avgTime', 'totalTime' )
+
   def __init__(
     self, sessionStart, visitor_id, avgTime, totalTime
   ):
@@ -53,7 +55,7 @@ class Session:
       else datetime.datetime.strptime(
         sessionStart, '%Y-%m-%dT%H:%M:%S.%fZ'
       )
-    self.id = visitor_id
+    self.id = internString( visitor_id )
     self.avgTime = float( avgTime ) if avgTime is not None else avgTime
     self.totalTime = float( totalTime ) if totalTime is not None else totalTime
 
@@ -0,0 +1,486 @@
+import json
+import zlib
+import hashlib
+from collections.abc import Mapping
+import numpy as np
+
+# The number of bits of a hash used to pick its register. The sketch has
+# 2^PRECISION registers and a standard error of about 1.6%.
+PRECISION = 12
+# The number of pages the from and to page distributions keep.
+CAPACITY = 32
+# The key of the visits that did not come from or go to the pages kept.
+OTHER = 'other'
+
+class VisitorSketch:
+  '''A class to represent a HyperLogLog sketch of unique visitor IDs.
+
+  The sketch estimates the number of unique visitors in a fixed number of
+  registers. Sketches are merged by taking the maximum of every register, so
+  the visitors of a week can be counted from the sketches of its days.
+
+  Attributes
+  ----------
+  precision : int
+    The number of bits of a hash used to pick its register.
+  registers : np.ndarray
+    The largest rank seen by every register.
+
+  Methods
+  -------
+  add( visitorId ):
+    Adds a visitor ID to the sketch.
+  update( hashes ):
+    Adds the hashes of visitor IDs to the sketch.
+  merge( other ):
+    Adds the visitors of another sketch to this one.
+  count():
+    Returns the estimated number of unique visitors.
+  toBytes():
+    Returns the sketch as compressed bytes.
+  '''
+  def __init__( self, visitorIds = None, precision = PRECISION ):
+    '''Constructs the necessary attributes for the visitor sketch object.
+
+    Parameters
+    ----------
+    visitorIds : list[ str ], optional
+      The visitor IDs to add to the sketch. (default is None)
+    precision : int, optional
+      The number of bits of a hash used to pick its register. (default is 12)
+    '''
+    if not 4 <= int( precision ) <= 16:
+      raise ValueError( 'Precision must be between 4 and 16' )
+    self.precision = int( precision )
+    self.registers = np.zeros( 1 << self.precision, dtype = np.uint8 )
+    if visitorIds is not None:
+      self.update( hashIds( visitorIds ) )
+
+  def add( self, visitorId ):
+    '''Adds a visitor ID to the sketch.
+
+    Parameters
+    ----------
+    visitorId : str
+      The unique ID of the visitor.
+    '''
+    self.update( hashIds( [ visitorId ] ) )
+    return self
+
+  def update( self, hashes ):
+    '''Adds the hashes of visitor IDs to the sketch.
+
+    Parameters
+    ----------
+    hashes : np.ndarray
+      The 64-bit hashes returned by `hashIds`.
+    '''
+    indexes, ranks = _registerRanks( hashes, self.precision )
+    np.maximum.at( self.registers, indexes, ranks )
+    return self
+
+  def merge( self, other ):
+    '''Adds the visitors of another sketch to this one.
+
+    Parameters
+    ----------
+    other : VisitorSketch
+      The sketch to add.
+    '''
+    if other.precision != self.precision:
+      raise ValueError( 'Sketches must have the same precision' )
+    np.maximum( self.registers, other.registers, out = self.registers )
+    return self
+
+  def count( self ):
+    '''Returns the estimated number of unique visitors.
+
+    This uses Ertl's improved estimator, which does not need the bias
+    corrections of the original HyperLogLog at small and large counts.
+    '''
+    size = len( self.registers )
+    width = 64 - self.precision
+    counts = np.bincount( self.registers, minlength = width + 2 ).tolist()
+    if counts[0] == size:
+      return 0
+    estimate = size * _tau( 1 - counts[width + 1] / size )
+    for rank in range( width, 0, -1 ):
+      estimate = 0.5 * ( estimate + counts[rank] )
+    estimate += size * _sigma( counts[0] / size )
+    return int( round( size * size / ( 2 * np.log( 2 ) * estimate ) ) )
+
+  def copy( self ):
+    '''Returns a copy of the sketch.'''
+    sketch = VisitorSketch( precision = self.precision )
+    sketch.registers[:] = self.registers
+    return sketch
+
+  def toBytes( self ):
+    '''Returns the sketch as compressed bytes.
+
+    The first byte is the precision and the rest are the compressed registers.
+    '''
+    return bytes( [ self.precision ] ) + \
+      zlib.compress( self.registers.tobytes() )
+
+  def __eq__( self, other ):
+    return isinstance( other, VisitorSketch ) \
+      and self.precision == other.precision \
+      and bool( np.array_equal( self.registers, other.registers ) )
+
+  def __len__( self ):
+    return self.count()
+
+  def __repr__( self ):
+    return f'~{ self.count() } visitors'
+
+def _sigma( x ):
+  '''Returns the series used to correct for empty registers.'''
+  y = 1.0
+  z = x
+  while True:
+    x *= x
+    previous = z
+    z += x * y
+    y += y
+    if z == previous:
+      return z
+
+def _tau( x ):
+  '''Returns the series used to correct for saturated registers.'''
+  if x in ( 0.0, 1.0 ):
+    return 0.0
+  y = 1.0
+  z = 1 - x
+  while True:
+    x = np.sqrt( x )
+    previous = z
+    y *= 0.5
+    z -= ( 1 - x ) ** 2 * y
+    if z == previous:
+      return z / 3
+
+def hashIds( visitorIds ):
+  '''Hashes visitor IDs to 64-bit integers.
+
+  The hashes do not change between processes, unlike Python's `hash`.
+
+  Parameters
+  ----------
+  visitorIds : list[ str ]
+    The visitor IDs to hash.
+
+  Returns
+  -------
+  hashes : np.ndarray
+    The 64-bit hashes of the visitor IDs.
+  '''
+  return np.array(
+    [
+      int.from_bytes(
+        hashlib.blake2b( visitorId.encode(), digest_size = 8 ).digest(),
+        'big'
+      )
+      for visitorId in visitorIds
+    ],
+    dtype = np.uint64
+  )
+
+def _registerRanks( hashes, precision ):
+  '''Returns the register and rank of every hash.
+
+  The first bits of a hash pick its register and the rank is the position of
+  the first 1 bit of the rest.
+  '''
+  hashes = np.asarray( hashes, dtype = np.uint64 )
+  width = 64 - precision
+  indexes = ( hashes >> np.uint64( width ) ).astype( np.int64 )
+  rest = hashes & np.uint64( ( 1 << width ) - 1 )
+  # Find the bit length of the rest with a binary search over the shifts.
+  length = np.zeros( len( hashes ), dtype = np.int64 )
+  for shift in ( 32, 16, 8, 4, 2, 1 ):
+    high = ( rest >> np.uint64( shift ) ) > 0
+    rest = np.where( high, rest >> np.uint64( shift ), rest )
+    length += high * shift
+  length += ( rest > 0 ).astype( np.int64 )
+  return indexes, ( width - length + 1 ).astype( np.uint8 )
+
+def groupSketches( hashes, codes, numberGroups, precision = PRECISION ):
+  '''Builds the sketch of every group in a single pass over the hashes.
+
+  Parameters
+  ----------
+  hashes : np.ndarray
+    The 64-bit hash of the visitor of every visit.
+  codes : np.ndarray
+    The group index of every visit.
+  numberGroups : int
+    The number of groups.
+  precision : int, optional
+    The number of bits of a hash used to pick its register. (default is 12)
+
+  Returns
+  -------
+  sketches : list[ VisitorSketch ]
+    The sketch of every group.
+  '''
+  indexes, ranks = _registerRanks( hashes, precision )
+  registers = np.zeros( ( numberGroups, 1 << precision ), dtype = np.uint8 )
+  np.maximum.at( registers, ( codes, indexes ), ranks )
+  sketches = []
+  for group in range( numberGroups ):
+    sketch = VisitorSketch( precision = precision )
+    sketch.registers = registers[group].copy()
+    sketches.append( sketch )
+  return sketches
+
+def bytesToSketch( data ):
+  '''Parses the compressed bytes of a sketch.
+
+  Parameters
+  ----------
+  data : bytes
+    The bytes returned by `VisitorSketch.toBytes`.
+
+  Returns
+  -------
+  sketch : VisitorSketch
+    The sketch parsed from the bytes.
+  '''
+  sketch = VisitorSketch( precision = data[0] )
+  registers = np.frombuffer( zlib.decompress( data[1:] ), dtype = np.uint8 )
+  if len( registers ) != len( sketch.registers ):
+    raise ValueError( 'Sketch registers do not match its precision' )
+  sketch.registers[:] = registers
+  return sketch
+
+class TopPages( Mapping ):
+  '''A class to represent a Space-Saving sketch of the most frequent pages.
+
+  At most `capacity` pages are counted. When a new page is seen and the sketch
+  is full, the page with the smallest count is replaced and the new page takes
+  over its count as its error. A page's count is never below its true count
+  and its count minus its error is never above it. While there are no more
+  pages than the capacity, the counts are exact.
+
+  The sketch is a mapping of the pages to their counts.
+
+  Attributes
+  ----------
+  capacity : int
+    The maximum number of pages counted.
+  total : int
+    The number of visits added to the sketch.
+  counts : dict
+    The count of every page kept.
+  errors : dict
+    The largest amount every page's count could be above its true count.
+
+  Methods
+  -------
+  add( page, count ):
+    Adds visits of a page to the sketch.
+  merge( other ):
+    Adds the visits of another sketch to this one.
+  smallest():
+    Returns the smallest count of the pages kept.
+  ratios():
+    Returns the ratios of the visits of the pages and of the other pages.
+  toBytes():
+    Returns the sketch as compressed bytes.
+  '''
+  def __init__( self, counts = None, capacity = CAPACITY ):
+    '''Constructs the necessary attributes for the top pages object.
+
+    Parameters
+    ----------
+    counts : dict, optional
+      The exact number of visits of every page. Only the pages with the most
+      visits are kept. (default is None)
+    capacity : int, optional
+      The maximum number of pages counted. (default is 32)
+    '''
+    if int( capacity ) < 1:
+      raise ValueError( 'Capacity must be positive' )
+    self.capacity = int( capacity )
+    self.total = 0
+    self.counts = {}
+    self.errors = {}
+    # The pages grouped by their counts, used to find the smallest count.
+    self._buckets = {}
+    self._minimum = None
+    if counts is not None:
+      kept = sorted( counts.items(), key = lambda pair: -pair[1] )
+      for page, count in kept[:self.capacity]:
+        self._place( page, int( count ), 0 )
+      self.total = int( sum( counts.values() ) )
+
+  def _place( self, page, count, error ):
+    '''Adds a page that is not counted yet.'''
+    self.counts[page] = count
+    self.errors[page] = error
+    self._buckets.setdefault( count, {} )[page] = None
+    if self._minimum is not None and count < self._minimum:
+      self._minimum = count
+
+  def _remove( self, page ):
+    '''Removes a page from its count's bucket.'''
+    count = self.counts.pop( page )
+    del self.errors[page]
+    bucket = self._buckets[count]
+    del bucket[page]
+    if len( bucket ) == 0:
+      del self._buckets[count]
+      if count == self._minimum:
+        self._minimum = None
+    return count
+
+  def smallest( self ):
+    '''Returns the smallest count of the pages kept.
+
+    A sketch without pages has a smallest count of 0.
+    '''
+    if not self._buckets:
+      return 0
+    if self._minimum is None:
+      self._minimum = min( self._buckets )
+    return self._minimum
+
+  def add( self, page, count = 1 ):
+    '''Adds visits of a page to the sketch.
+
+    Adding a single visit takes constant time.
+
+    Parameters
+    ----------
+    page : str
+      The page's slug.
+    count : int, optional
+      The number of visits. (default is 1)
+    '''
+    self.total += count
+    if page in self.counts:
+      error = self.errors[page]
+      previous = self.counts[page]
+      emptied = self._minimum == previous \
+        and len( self._buckets[previous] ) == 1
+      self._remove( page )
+      self._place( page, previous + count, error )
+      # When the smallest bucket is emptied by a single visit, the page's new
+      # bucket is the next smallest.
+      if emptied and count == 1:
+        self._minimum = previous + 1
+    elif len( self.counts ) < self.capacity:
+      self._place( page, count, 0 )
+    else:
+      minimum = self.smallest()
+      self._remove( next( iter( self._buckets[minimum] ) ) )
+      self._place( page, minimum + count, minimum )
+    return self
+
+  def merge( self, other ):
+    '''Adds the visits of another sketch to this one.
+
+    A page missing from a full sketch could have up to that sketch's smallest
+    count, which is added to the page's count and error.
+
+    Parameters
+    ----------
+    other : TopPages
+      The sketch to add.
+    '''
+    missing = [
+      sketch.smallest() if len( sketch.counts ) >= sketch.capacity else 0
+      for sketch in ( self, other )
+    ]
+    merged = {}
+    for page in set( self.counts ) | set( other.counts ):
+      merged[page] = (
+        self.counts.get( page, missing[0] ) +
+          other.counts.get( page, missing[1] ),
+        self.errors.get( page, missing[0] ) +
+          other.errors.get( page, missing[1] )
+      )
+    total = self.total + other.total
+    self.counts, self.errors, self._buckets = {}, {}, {}
+    self._minimum = None
+    kept = sorted( merged.items(), key = lambda pair: -pair[1][0] )
+    for page, ( count, error ) in kept[:self.capacity]:
+      self._place( page, count, error )
+    self.total = total
+    return self
+
+  def ratios( self ):
+    '''Returns the ratios of the visits of the pages and of the other pages.
+
+    The ratios use the smallest number of visits every page could have. The
+    rest of the visits are the \'other\' ratio, which is only set when there are
+    visits not counted by the pages kept.
+    '''
+    if self.total == 0:
+      return {}
+    ratios = {
+      page: ( count - self.errors[page] ) / self.total
+      for page, count in self.counts.items()
+    }
+    other = self.total - sum(
+      count - self.errors[page] for page, count in self.counts.items()
+    )
+    if other > 0:
+      ratios[OTHER] = other / self.total
+    return ratios
+
+  def copy( self ):
+    '''Returns a copy of the sketch.'''
+    return bytesToTopPages( self.toBytes() )
+
+  def toBytes( self ):
+    '''Returns the sketch as compressed bytes.'''
+    return zlib.compress( json.dumps(
+      [
+        self.capacity, self.total,
+        [
+          [ page, count, self.errors[page] ]
+          for page, count in self.counts.items()
+        ]
+      ],
+      separators = ( ',', ':' )
+    ).encode() )
+
+  def __getitem__( self, page ):
+    return self.counts[page]
+
+  def __iter__( self ):
+    return iter( self.counts )
+
+  def __len__( self ):
+    return len( self.counts )
+
+  def __eq__( self, other ):
+    if isinstance( other, TopPages ):
+      return self.counts == other.counts and self.errors == other.errors \
+        and self.total == other.total
+    return Mapping.__eq__( self, other )
+
+  def __repr__( self ):
+    return f'{ len( self.counts ) } pages - { self.total } visits'
+
+def bytesToTopPages( data ):
+  '''Parses the compressed bytes of a top pages sketch.
+
+  Parameters
+  ----------
+  data : bytes
+    The bytes returned by `TopPages.toBytes`.
+
+  Returns
+  -------
+  topPages : TopPages
+    The sketch parsed from the bytes.
+  '''
+  capacity, total, pages = json.loads( zlib.decompress( data ).decode() )
+  topPages = TopPages( capacity = capacity )
+  for page, count, error in pages:
+    topPages._place( page, count, error ) # pylint: disable=protected-access
+  topPages.total = total
+  return topPages
@@ -0,0 +1,243 @@
+import re
+import json
+import zlib
+import numpy as np
+from .util import toItemException
+
+# The slug used for the visits entering or leaving the website.
+ENTRY = 'www'
+
+class Transitions:
+  '''A class to represent the site-wide page transitions of a day.
+
+  The transitions are a sparse matrix of the number of times visitors went
+  from one page to another. Every visit adds one transition from its previous
+  page, or 'www' when the visit entered the website, to its page. Visits that
+  left the website add one more transition from their page to 'www'. A row
+  of the matrix holds the pages visitors went to next and a column holds the
+  pages visitors came from.
+
+  Attributes
+  ----------
+  year : int
+    The year of the transitions.
+  month : int
+    The month of the transitions.
+  day : int
+    The day of the month of the transitions.
+  slugs : list[ str ]
+    The slugs of the matrix's rows and columns.
+  sources : np.ndarray
+    The row of every non-zero count.
+  targets : np.ndarray
+    The column of every non-zero count.
+  counts : np.ndarray
+    The number of transitions from every source to its target.
+
+  Methods
+  -------
+  key():
+    Returns the Primary Key of the transitions.
+  pk():
+    Returns the Partition Key of the transitions.
+  merge( other ):
+    Adds the transitions of another matrix to this one.
+  nextPages( slug ):
+    Returns the ratios of the pages visitors went to from a page.
+  previousPages( slug ):
+    Returns the ratios of the pages visitors came from to a page.
+  toItem():
+    Returns the transitions as a parsed DynamoDB item.
+  '''
+  def __init__(
+    self, date, slugs = None, sources = None, targets = None, counts = None
+  ):
+    '''Constructs the necessary attributes for the transitions object.
+
+    Parameters
+    ----------
+    date : str
+      The day of the transitions as "<year>-<month>-<day>".
+    slugs : list[ str ], optional
+      The slugs of the matrix's rows and columns. (default is None)
+    sources : list[ int ], optional
+      The row of every count. (default is None)
+    targets : list[ int ], optional
+      The column of every count. (default is None)
+    counts : list[ int ], optional
+      The number of transitions from every source to its target. (default
+      is None)
+    '''
+    dateMatch = re.match( r'(\d{4})-(\d+)-(\d+)$', date )
+    if not dateMatch:
+      raise ValueError( 'Must give day as "<year>-<month>-<day>"' )
+    self.year = int( dateMatch.group( 1 ) )
+    self.month = int( dateMatch.group( 2 ) )
+    self.day = int( dateMatch.group( 3 ) )
+    self.slugs = list( slugs ) if slugs is not None else []
+    self.sources = np.asarray(
+      sources if sources is not None else [], dtype = np.int64
+    )
+    self.targets = np.asarray(
+      targets if targets is not None else [], dtype = np.int64
+    )
+    self.counts = np.asarray(
+      counts if counts is not None else [], dtype = np.int64
+    )
+
+  def date( self ):
+    '''Returns the day of the transitions as "<year>-<month>-<day>".'''
+    return f'{ self.year }-{ str( self.month ).zfill( 2 ) }-' + \
+      str( self.day ).zfill( 2 )
+
+  def key( self ):
+    '''Returns the Primary Key of the transitions.
+
+    This is used to retrieve the unique transitions from the table.
+    '''
+    return {
+      'PK': { 'S': 'TRANSITIONS' },
+      'SK': { 'S': f'#DAY#{ self.date() }' }
+    }
+
+  def pk( self ):
+    '''Returns the Partition Key of the transitions.
+
+    This is used to retrieve the transitions of a range of days.
+    '''
+    return { 'S': 'TRANSITIONS' }
+
+  def merge( self, other ):
+    '''Adds the transitions of another matrix to this one.
+
+    Parameters
+    ----------
+    other : Transitions
+      The transitions to add.
+    '''
+    codes = { slug: index for index, slug in enumerate( self.slugs ) }
+    for slug in other.slugs:
+      codes.setdefault( slug, len( codes ) )
+    remap = np.array(
+      [ codes[slug] for slug in other.slugs ], dtype = np.int64
+    )
+    width = len( codes )
+    keys, counts = _sumDuplicates(
+      np.concatenate( [
+        self.sources * width + self.targets,
+        remap[other.sources] * width + remap[other.targets]
+        if len( other.counts ) > 0 else np.zeros( 0, dtype = np.int64 )
+      ] ),
+      np.concatenate( [ self.counts, other.counts ] )
+    )
+    self.slugs = list( codes )
+    self.sources, self.targets = np.divmod( keys, width )
+    self.counts = counts
+    return self
+
+  def _ratios( self, slug, fromRows ):
+    '''Returns the normalized row or column of a slug.'''
+    if slug not in self.slugs:
+      return {}
+    code = self.slugs.index( slug )
+    selected = ( self.sources if fromRows else self.targets ) == code
+    others = ( self.targets if fromRows else self.sources )[selected]
+    counts = self.counts[selected]
+    total = counts.sum()
+    return {
+      self.slugs[other]: count / total
+      for other, count in zip( others.tolist(), counts.tolist() )
+    }
+
+  def nextPages( self, slug ):
+    '''Returns the ratios of the pages visitors went to from a page.
+
+    Parameters
+    ----------
+    slug : str
+      The slug of the page.
+    '''
+    return self._ratios( slug, True )
+
+  def previousPages( self, slug ):
+    '''Returns the ratios of the pages visitors came from to a page.
+
+    Parameters
+    ----------
+    slug : str
+      The slug of the page.
+    '''
+    return self._ratios( slug, False )
+
+  def toBytes( self ):
+    '''Returns the matrix as compressed bytes.'''
+    return zlib.compress( json.dumps(
+      [
+        self.slugs, self.sources.tolist(), self.targets.tolist(),
+        self.counts.tolist()
+      ],
+      separators = ( ',', ':' )
+    ).encode() )
+
+  def toItem( self ):
+    '''Returns the transitions as a parsed DynamoDB item.
+
+    Returns
+    -------
+    item : dict
+      The transitions in DynamoDB syntax.
+    '''
+    return {
+      **self.key(),
+      'Type': { 'S': 'transitions' },
+      'TransitionCount': { 'N': str( int( self.counts.sum() ) ) },
+      'Matrix': { 'B': self.toBytes() }
+    }
+
+  def __repr__( self ):
+    return f'{ self.date() } - { len( self.slugs ) } pages'
+
+  def __iter__( self ):
+    yield 'year', self.year
+    yield 'month', self.month
+    yield 'day', self.day
+    yield 'slugs', self.slugs
+    yield 'sources', self.sources.tolist()
+    yield 'targets', self.targets.tolist()
+    yield 'counts', self.counts.tolist()
+
+def _sumDuplicates( keys, counts ):
+  '''Sums the counts of the same keys.'''
+  uniqueKeys, inverse = np.unique( keys, return_inverse = True )
+  return uniqueKeys, np.bincount(
+    inverse.reshape( -1 ), weights = counts, minlength = len( uniqueKeys )
+  ).astype( np.int64 )
+
+def itemToTransitions( item ):
+  '''Parses a DynamoDB item as a transitions object.
+
+  Parameters
+  ----------
+  item : dict
+    The raw DynamoDB item.
+
+  Raises
+  ------
+  toItemException
+    When the item is missing the required keys to parse into an object.
+
+  Returns
+  -------
+  transitions : Transitions
+    The transitions object parsed from the DynamoDB item.
+  '''
+  try:
+    slugs, sources, targets, counts = json.loads(
+      zlib.decompress( item['Matrix']['B'] ).decode()
+    )
+    return Transitions(
+      item['SK']['S'].split( '#' )[2], slugs, sources, targets, counts
+    )
+  except Exception as e:
+    print( f'ERROR itemToTransitions: { e }' )
+    raise toItemException( 'transitions' ) from e
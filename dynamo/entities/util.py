@@ -1,3 +1,4 @@
+import sys
 import time
 import re
 
@@ -33,7 +34,7 @@ def formatDate( date ):
     The formatted datetime string that is similar to JS's ISO standard.
   '''
   return date.strftime( '%Y-%m-%dT%H:%M:%S.' ) \
-    + date.strftime('%f')[:3] + 'Z'
+    + f'{ date.microsecond // 1000:03d}Z'
 
 def objectToItemAtr( obj ):
   '''Formats any Python type to its respective DynamoDB syntax.
@@ -48,6 +49,10 @@ def objectToItemAtr( obj ):
   result : dict
     The DynamoDB syntax of the object.
   '''
+  encoder = _ENCODERS.get( type( obj ) )
+  if encoder is not None:
+    return encoder( obj )
+  # Subclasses, like NumPy's floats, are formatted by what they inherit from.
   atr = _objectToItemAtr_singleton( obj )
   if atr is not None:
     return atr
@@ -84,6 +89,50 @@ def _objectToItemAtr_list( obj ):
     return { 'NS': obj }
   return None
 
+def _encodeString( obj ):
+  '''Formats a string into DynamoDB syntax.'''
+  if obj in ( 'None', '' ):
+    return { 'NULL': True }
+  return { 'S': obj }
+
+def _encodeNumber( obj ):
+  '''Formats a number into DynamoDB syntax.'''
+  return { 'N': str( obj ) }
+
+def _encodeMap( obj ):
+  '''Formats a dictionary into DynamoDB syntax.'''
+  return { 'M': {
+    key: objectToItemAtr( value ) for key, value in obj.items()
+  } }
+
+def _encodeList( obj ):
+  '''Formats a list into DynamoDB syntax.'''
+  if all( isinstance( string, str ) and string != '' for string in obj ):
+    return { 'SS': list( obj ) }
+  return _objectToItemAtr_list( obj )
+
+# The function that formats every exact type into DynamoDB syntax. Booleans
+# are integers to `isinstance`, so they have always been formatted as numbers.
+_ENCODERS = {
+  str: _encodeString,
+  int: _encodeNumber,
+  float: _encodeNumber,
+  bool: _encodeNumber,
+  dict: _encodeMap,
+  list: _encodeList,
+  type( None ): lambda obj: { 'NULL': True }
+}
+
+def internString( value ):
+  '''Returns the one copy of a string that is repeated across entities.
+
+  Slugs, titles, and visitor IDs repeat across the visits read from the table,
+  so every visit shares one string instead of holding its own copy. Strings
+  like NumPy's are interned as plain strings and anything that is not a string
+  is returned as it is.
+  '''
+  return sys.intern( str( value ) ) if isinstance( value, str ) else value
+
 class toItemException( Exception ):
   '''Exception raised for errors parsing a DynamoDB item to its respective
   object.
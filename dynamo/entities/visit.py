@@ -1,6 +1,7 @@
 import datetime
 import numpy as np
-from .util import formatDate, objectToItemAtr, toItemException
+from .util import formatDate, objectToItemAtr, toItemException, internString
+from .scroll import toScrollTrack, scrollEventsToItemAtr, itemAtrToScrollEvents
 class Visit:
   """A class to represent a visit item for DynamoDB.
 
@@ -20,7 +21,7 @@ class Visit:
   sessionStart : datetime.datetime | str
     The datetime the visitor started at the website. This is used to provide a
     relationship to the visitor's session.
-  scroll_events : dict
+  scrollEvents : ScrollTrack | dict
       The scroll positions over time. This is used to calculate velocity and
       acceleration.
   prevTitle : str | None
@@ -57,6 +58,11 @@ class Visit:
   toItem():
     Returns the visit as a parsed DynamoDB item.
   """
+  __slots__ = (
+    'date', 'id', 'user', 'title', 'slug', 'sessionStart', 'scrollEvents',
+    'prevTitle', 'prevSlug', 'nextTitle', 'nextSlug', 'timeOnPage'
+  )
+
   def __init__(
     self, visitor_id, date, user, title, slug, sessionStart, scroll_events,
     timeOnPage=None, prevTitle=None, prevSlug=None, nextTitle=None,
@@ -82,9 +88,10 @@ class Visit:
     sessionStart : datetime.datetime | str
       The datetime the visitor started at the website. This is used to provide a
       relationship to the visitor's session.
-    scroll_events : dict
+    scroll_events : dict | ScrollTrack
       The scroll positions over time. This is used to calculate velocity and
-      acceleration.
+      acceleration. A dictionary is kept as a scroll track when it can be
+      stored exactly.
     timeOnPage : float | None, optional
       The number of seconds the visitor spent on the page. When this is the last
       page of the session, the value is None. (default is None)
@@ -104,21 +111,23 @@ class Visit:
     self.date = datetime.datetime.strptime(
       date, '%Y-%m-%dT%H:%M:%S.%fZ'
     ) if isinstance( date, str ) else date
-    self.id = visitor_id
+    # The IDs, titles, and slugs repeat across visits, so they share strings.
+    self.id = internString( visitor_id )
     if user == 'None' or user is None:
       self.user = 0
     else:
       self.user = int( user )
-    self.title = title
-    self.slug = slug
+    self.title = internString( title )
+    self.slug = internString( slug )
     self.sessionStart = datetime.datetime.strptime(
       sessionStart, '%Y-%m-%dT%H:%M:%S.%fZ'
     ) if isinstance( sessionStart, str ) else sessionStart
-    self.scrollEvents = scroll_events
-    self.prevTitle = prevTitle
-    self.prevSlug = prevSlug
-    self.nextTitle = nextTitle
-    self.nextSlug = nextSlug
+    track = toScrollTrack( scroll_events )
+    self.scrollEvents = scroll_events if track is None else track
+    self.prevTitle = internString( prevTitle )
+    self.prevSlug = internString( prevSlug )
+    self.nextTitle = internString( nextTitle )
+    self.nextSlug = internString( nextSlug )
     if str(timeOnPage) == 'nan':
       self.timeOnPage = None
     elif timeOnPage is None:
@@ -199,7 +208,7 @@ class Visit:
       'User': { 'N': f'{self.user}' },
       'Title': { 'S': self.title },
       'Slug': { 'S': self.slug },
-      'ScrollEvents': objectToItemAtr( self.scrollEvents ),
+      'ScrollEvents': scrollEventsToItemAtr( self.scrollEvents, self.date ),
       'PreviousTitle': objectToItemAtr( self.prevTitle ),
       'PreviousSlug': objectToItemAtr( self.prevSlug ),
       'NextTitle': objectToItemAtr( self.nextTitle ),
@@ -243,17 +252,14 @@ def itemToVisit( item ):
     The visit object parsed from the raw DynamoDB item.
   '''
   try:
+    date = datetime.datetime.strptime(
+      item['SK']['S'].split('#')[1], '%Y-%m-%dT%H:%M:%S.%fZ'
+    )
     return Visit(
-      item['PK']['S'].split('#')[1], item['SK']['S'].split('#')[1],
+      item['PK']['S'].split('#')[1], date,
       int( item['User']['N'] ), item['Title']['S'], item['Slug']['S'],
       item['GSI2PK']['S'].split('#')[2],
-      {
-        key: {
-          'x': int( value['M']['x']['N'] ),
-          'y': int( value['M']['y']['N'] )
-        }
-        for key, value in item['ScrollEvents']['M'].items()
-      },
+      itemAtrToScrollEvents( item['ScrollEvents'], date ),
       np.nan
         if 'NULL' in item['TimeOnPage']
         else float( item['TimeOnPage']['N'] ),
@@ -270,6 +276,50 @@ def itemToVisit( item ):
         if 'NULL' in item['NextSlug'].keys()
         else  item['NextSlug']['S']
     )
-  except KeyError as e:
+  except ( KeyError, ValueError ) as e:
     print( f'ERROR itemToVisit: {e}' )
     raise toItemException( 'visit' ) from e
+
+def itemToLightVisit( item ):
+  '''Parses a projected DynamoDB item as a visit object without its scroll
+  events.
+
+  Only the visitor ID, date, and slug are required. The attributes that were
+  not projected are set to their defaults.
+
+  Parameters
+  ----------
+  item : dict
+    The raw DynamoDB item.
+
+  Raises
+  ------
+  toItemException
+    When the item is missing the required keys to parse into an object.
+
+  Returns
+  -------
+  visit : Visit
+    The visit object parsed from the raw DynamoDB item.
+  '''
+  try:
+    return Visit(
+      item['PK']['S'].split('#')[1], item['SK']['S'].split('#')[1],
+      int( item['User']['N'] ) if 'User' in item.keys() else 0,
+      item['Title']['S'] if 'Title' in item.keys() else None,
+      item['Slug']['S'],
+      item['GSI2PK']['S'].split('#')[2] if 'GSI2PK' in item.keys() else None,
+      {},
+      *[
+        None if name not in item.keys() or 'NULL' in item[name].keys()
+        else float( item[name]['N'] ) if name == 'TimeOnPage'
+        else item[name]['S']
+        for name in (
+          'TimeOnPage', 'PreviousTitle', 'PreviousSlug', 'NextTitle',
+          'NextSlug'
+        )
+      ]
+    )
+  except KeyError as e:
+    print( f'ERROR itemToLightVisit: {e}' )
+    raise toItemException( 'visit' ) from e
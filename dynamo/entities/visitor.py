@@ -16,9 +16,14 @@ class Visitor:
     Returns the Primary Key of the visitor.
   pk():
     Returns the Partition Key of the visitor.
+  gsi3():
+    Returns the Primary Key of the third Global Secondary Index of the
+    visitor.
   toItem():
     Returns the visitor as a parsed DynamoDB item.
   '''
+  __slots__ = ( 'id', 'numberSessions' )
+
   def __init__( self, visitor_id, numberSessions = 0 ):
     '''Constructs the necessary attributes for the visitor object.
 
@@ -49,6 +54,17 @@ class Visitor:
     '''
     return { 'S': f'VISITOR#{ self.id }' }
 
+  def gsi3( self ):
+    '''Returns the Primary Key of the third Global Secondary Index of the
+    visitor.
+
+    This is used to list the visitors without scanning the table.
+    '''
+    return {
+      'GSI3PK': { 'S': 'TYPE#visitor' },
+      'GSI3SK': { 'S': self.id }
+    }
+
   def toItem( self ):
     """Returns the visitor as a parsed DynamoDB item.
 
@@ -59,6 +75,7 @@ class Visitor:
     """
     return {
       **self.key(),
+      **self.gsi3(),
       'Type': { 'S': 'visitor' },
       'NumberSessions': { 'N': str( self.numberSessions ) }
     }
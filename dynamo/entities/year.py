@@ -1,4 +1,5 @@
 from .util import objectToItemAtr, toItemException
+from .aggregate import itemToAggregate, storedVisitors
 
 class Year:
   '''A class to represent a year item for DynamoDB.
@@ -23,6 +24,8 @@ class Year:
     The different pages the visitors came from and their ratios.
   toPage : dict
     The different pages the visitors when to and their ratios.
+  aggregate : Aggregate | None
+    The mergeable analytics the ratios are calculated from.
 
   Methods
   -------
@@ -39,7 +42,7 @@ class Year:
   '''
   def __init__(
     self, slug, title, year, numberVisitors, averageTime,
-    percentChurn, fromPage, toPage
+    percentChurn, fromPage, toPage, aggregate = None
   ):
     '''Constructs the necessary attributes for the year object.
 
@@ -63,6 +66,9 @@ class Year:
       The different pages the visitors came from and their ratios.
     toPage : dict
       The different pages the visitors when to and their ratios.
+    aggregate : Aggregate | None, optional
+      The mergeable analytics the ratios are calculated from. (default is
+      None)
     '''
     if len( str( year ) ) != 4:
       raise ValueError( 'Must give valid year' )
@@ -76,6 +82,7 @@ class Year:
     self.percentChurn = float( percentChurn )
     self.fromPage = fromPage
     self.toPage = toPage
+    self.aggregate = aggregate
 
   def key( self ):
     '''Returns the Primary Key of the year.
@@ -133,7 +140,8 @@ class Year:
       'AverageTime': objectToItemAtr( self.averageTime ),
       'PercentChurn': objectToItemAtr( self.percentChurn ),
       'FromPage': objectToItemAtr( self.fromPage ),
-      'ToPage': objectToItemAtr( self.toPage )
+      'ToPage': objectToItemAtr( self.toPage ),
+      **( {} if self.aggregate is None else self.aggregate.toItem() )
     }
 
   def __repr__( self ):
@@ -168,6 +176,12 @@ def itemToYear( item ):
     The year object parsed from the raw DynamoDB item.
   '''
   try:
+    aggregate = itemToAggregate( item )
+    if aggregate is not None:
+      return Year(
+        item['Slug']['S'], item['Title']['S'], item['SK']['S'].split('#')[2],
+        *aggregate.analytics( storedVisitors( item ) ), aggregate
+      )
     return Year(
       item['Slug']['S'], item['Title']['S'], item['SK']['S'].split('#')[2],
       item['NumberVisitors']['N'],
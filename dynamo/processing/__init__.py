@@ -2,3 +2,4 @@ from .processDF import processDF
 from .processVisits import processVisits
 from .processParquet import processParquet
 from .processPages import processPages
+from .processTransitions import processTransitions
@@ -1,12 +1,13 @@
 import os
 import sys
 import io
+import time
 import numpy as np
 import pandas as pd
 sys.path.append(
   os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
 )
-from dynamo.entities import Visit, Browser, Session, formatEpoch # pylint: disable=wrong-import-position
+from dynamo.entities import Visit, Browser, Session, ScrollTrack, formatEpoch # pylint: disable=wrong-import-position
 
 def processDF( key, s3_client ):
   '''Reads a raw csv file S3 and parses the browsers, visits, and sessions.
@@ -50,6 +51,10 @@ def processDF( key, s3_client ):
   visits = []
   for ( start, stop ) in indexes:
     temp = df.loc[ start: stop ]
+    # The scroll events are kept by their datetimes, so only the last event
+    # of every epoch is kept.
+    events = temp[~temp.index.duplicated( keep = 'last' )]
+    epochs = events.index.to_numpy( dtype = np.int64 )
     visits.append(
       Visit(
         temp.id.unique()[0],
@@ -58,10 +63,13 @@ def processDF( key, s3_client ):
         temp.title.unique()[0],
         temp.slug.unique()[0],
         formatEpoch( temp.iloc[[0]].index[0] ),
-        {
-          formatEpoch( index ): { 'x': row.x, 'y': row.y }
-          for index, row in temp.iterrows()
-        },
+        # `formatEpoch` formats the epochs in the local time zone.
+        ScrollTrack(
+          epochs + 1000 * np.array( [
+            time.localtime( epoch / 1000 ).tm_gmtoff for epoch in epochs
+          ], dtype = np.int64 ),
+          events.x.to_numpy(), events.y.to_numpy()
+        ),
         ( temp.iloc[[-1]].index[0] - temp.iloc[[0]].index[0] ) / 1000
       )
     )
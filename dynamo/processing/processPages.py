@@ -8,6 +8,9 @@ from dynamo.entities import itemToVisit # pylint: disable=wrong-import-position
 def processPages( dynamo_client, event ):
   '''Creates the page and day/week/month/year from a DynamoDB event.
 
+  Only the visits inserted by the event are added to the pages' analytics, so
+  the pages' older visits are not read from the table.
+
   Parameters
   ----------
   dynamo_client : DynamoClient
@@ -20,11 +23,13 @@ def processPages( dynamo_client, event ):
   result : str
     The result of the number of pages processed.
   '''
-  # Parse the visits from the event.
+  # Parse the visits from the event. Modified visits have already been added
+  # to the analytics.
   visits = [
     itemToVisit( record['dynamodb']['NewImage'] )
     for record in event['Records']
     if record['dynamodb']['NewImage']['Type']['S'] == 'visit'
+    and record.get( 'eventName', 'INSERT' ) == 'INSERT'
   ]
   if len( visits ) == 0:
     return 'No pages to process'
@@ -33,23 +38,15 @@ def processPages( dynamo_client, event ):
   update_pages = 0
   # The unique slugs are iterated over because there may be multiple visits to
   # the same slug.
-  for visit in [
-    [ visit for visit in visits if visit.slug == slug ][0]
-      for slug in { visit.slug for visit in visits }
-  ]:
-    # Query the page and its details
-    page_details = dynamo_client.getPageDetails( visit )
-    # Raise an exception when an error occurs.
-    if 'error' in page_details.keys():
-      raise Exception( page_details['error']  )
-    # Update the page with new results
-    update_result = dynamo_client.updatePage( page_details['visits'] )
+  for slug in { visit.slug for visit in visits }:
+    slug_visits = [ visit for visit in visits if visit.slug == slug ]
+    # Add the new visits to the page's analytics.
+    update_result = dynamo_client.incrementPage( slug_visits )
     if 'error' in update_result.keys():
       raise Exception( update_result['error'] )
-    # Add the page to the table when there isn't one
-    if 'page' not in page_details.keys():
+    # The page is new when it only has these visits.
+    if update_result['page'].aggregate.numberVisits == len( slug_visits ):
       new_pages += 1
-    # Update the page when there is one
     else:
       update_pages += 1
   # Return what was done during execution
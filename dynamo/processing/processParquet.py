@@ -34,12 +34,23 @@ def processParquet( key, dynamo_client, s3_client ):
     df = pd.read_parquet( io.BytesIO( request['Body'].read() ) )
     # Get the unique IP addresses
     ips = df['ip'].unique()
+    # Get the browsers and visits of every IP address.
+    visitor_dicts = { ip: processDF( df, ip ) for ip in ips }
+    # Only the sessions that started less than a day before a visitor's first
+    # visit can be updated with the visits.
+    since = min( (
+      visitor_dict['visits'][0].date for visitor_dict in visitor_dicts.values()
+    ), default = datetime.datetime.now() ) - datetime.timedelta( days = 1 )
+    # Get the details of every visitor in the file from the table at once.
+    visitors_details = dynamo_client.getVisitorsDetails(
+      [ Visitor( ip ) for ip in ips ], since
+    )
+    if 'error' in visitors_details.keys():
+      raise Exception( visitors_details['error'] )
     # Iterate over the IP addresses to organize the DF's per visitor
     for ip in ips:
-      # Get the visitor details from the table.
-      visitor_details = dynamo_client.getVisitorDetails( Visitor( ip ) )
-      # Get the browsers and visits of the specific IP address.
-      visitor_dict = processDF( df, ip )
+      visitor_details = visitors_details[ip]
+      visitor_dict = visitor_dicts[ip]
       # When the visitor is not found in the database, the visitor, location,
       # browser, session, and visits must be added to the database.
       if 'error' in visitor_details.keys() \
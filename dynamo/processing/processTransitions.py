@@ -0,0 +1,37 @@
+import os
+import sys
+sys.path.append(
+  os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+)
+from dynamo.entities import itemToVisit # pylint: disable=wrong-import-position
+
+def processTransitions( dynamo_client, event ):
+  '''Adds the visits of a DynamoDB event to the site-wide page transitions.
+
+  Parameters
+  ----------
+  dynamo_client : DynamoClient
+    The DynamoDB client used to access the table.
+  event : dict
+    The DynamoDB PUT event.
+
+  Returns
+  -------
+  result : str
+    The result of the number of days processed.
+  '''
+  # Parse the visits from the event. Modified visits have already been added
+  # to the transitions.
+  visits = [
+    itemToVisit( record['dynamodb']['NewImage'] )
+    for record in event['Records']
+    if record['dynamodb']['NewImage']['Type']['S'] == 'visit'
+    and record.get( 'eventName', 'INSERT' ) == 'INSERT'
+  ]
+  if len( visits ) == 0:
+    return 'No transitions to process'
+  result = dynamo_client.incrementTransitions( visits )
+  if 'error' in result.keys():
+    raise Exception( result['error'] )
+  return f'Successfully updated { len( result["transitions"] ) } days from ' + \
+    f'{ len( visits ) } records.'
@@ -180,7 +180,9 @@ def table_init( dynamo_client, table_name ):
       { 'AttributeName': 'GSI1PK', 'AttributeType': 'S' },
       { 'AttributeName': 'GSI1SK', 'AttributeType': 'S' },
       { 'AttributeName': 'GSI2PK', 'AttributeType': 'S' },
-      { 'AttributeName': 'GSI2SK', 'AttributeType': 'S' }
+      { 'AttributeName': 'GSI2SK', 'AttributeType': 'S' },
+      { 'AttributeName': 'GSI3PK', 'AttributeType': 'S' },
+      { 'AttributeName': 'GSI3SK', 'AttributeType': 'S' }
     ],
     KeySchema=[
       { 'AttributeName': 'PK', 'KeyType': 'HASH' },
@@ -217,6 +219,21 @@ def table_init( dynamo_client, table_name ):
           'WriteCapacityUnits': 5
         }
       },
+      {
+        'IndexName': 'GSI3',
+        'KeySchema': [
+          { 'AttributeName': 'GSI3PK', 'KeyType': 'HASH' },
+          { 'AttributeName': 'GSI3SK', 'KeyType': 'RANGE' }
+        ],
+        'Projection': {
+          'ProjectionType': 'ALL',
+          'NonKeyAttributes': [ 'PK' ]
+        },
+        'ProvisionedThroughput': {
+          'ReadCapacityUnits': 5,
+          'WriteCapacityUnits': 5
+        }
+      },
     ]
   )
   yield
@@ -0,0 +1,97 @@
+import pytest
+from dynamo.entities import Aggregate, itemToAggregate, Day, itemToDay # pylint: disable=wrong-import-position
+from dynamo.entities import VisitorSketch, TopPages # pylint: disable=wrong-import-position
+
+def test_init():
+  aggregate = Aggregate(
+    4, 90.0, 2, 1, { 'a', 'b' }, { 'www': 3, '/blog': 1 },
+    { 'www': 1, '/resume': 3 }
+  )
+  assert aggregate.numberVisits == 4
+  assert aggregate.numberVisitors() == 2
+  assert aggregate.averageTime() == 45.0
+  assert aggregate.percentChurn() == 0.25
+  assert aggregate.fromPage() == { 'www': 0.75, '/blog': 0.25 }
+  assert aggregate.toPage() == { 'www': 0.25, '/resume': 0.75 }
+
+def test_addVisit( year_visits ):
+  aggregate = Aggregate()
+  for visit in year_visits:
+    aggregate.addVisit( visit )
+  assert aggregate.numberVisits == 3
+  assert aggregate.numberVisitors() == 2
+  assert aggregate.averageTime() == 90.0
+  assert aggregate.churnCount == 1
+  assert aggregate.fromCount == { 'www': 2, '/': 1 }
+  assert aggregate.toCount == { '/blog': 1, 'www': 1, '/resume': 1 }
+
+def test_merge( year_visits ):
+  first = Aggregate().addVisit( year_visits[0] )
+  second = Aggregate().addVisit( year_visits[1] ).addVisit( year_visits[2] )
+  merged = first.merge( second )
+  assert merged.numberVisits == 3
+  assert merged.numberVisitors() == 2
+  assert merged.timeSum == 180.0
+  assert merged.fromCount == { 'www': 2, '/': 1 }
+
+def test_no_time_averageTime():
+  assert Aggregate( 1, 0.0, 0, 1, { 'a' } ).averageTime() is None
+
+def test_toItem():
+  aggregate = Aggregate( 2, 30.5, 1, 1, { 'b', 'a' }, { 'www': 2 }, {
+    'www': 1, '/': 1
+  } )
+  assert aggregate.toItem() == {
+    'VisitCount': { 'N': '2' },
+    'TimeSum': { 'N': '30.5' },
+    'TimeCount': { 'N': '1' },
+    'ChurnCount': { 'N': '1' },
+    'VisitorSketch': { 'B': VisitorSketch( [ 'a', 'b' ] ).toBytes() },
+    'FromSketch': { 'B': TopPages( { 'www': 2 } ).toBytes() },
+    'ToSketch': { 'B': TopPages( { 'www': 1, '/': 1 } ).toBytes() }
+  }
+
+def test_itemToAggregate():
+  aggregate = Aggregate( 2, 30.5, 1, 1, { 'b', 'a' }, { 'www': 2 }, {
+    'www': 1, '/': 1
+  } )
+  assert dict( itemToAggregate( aggregate.toItem() ) ) == dict( aggregate )
+
+def test_visitors_itemToAggregate():
+  item = Aggregate( 2, 30.5, 1, 1, { 'b', 'a' } ).toItem()
+  del item['VisitorSketch']
+  item['Visitors'] = { 'SS': [ 'a', 'b' ] }
+  assert itemToAggregate( item ).visitors == VisitorSketch( [ 'a', 'b' ] )
+
+def test_counts_itemToAggregate():
+  item = Aggregate( 2, 30.5, 1, 1, { 'b', 'a' } ).toItem()
+  del item['FromSketch']
+  del item['ToSketch']
+  item['FromCount'] = { 'M': { 'www': { 'N': '2' } } }
+  item['ToCount'] = { 'M': { 'www': { 'N': '1' }, '/': { 'N': '1' } } }
+  aggregate = itemToAggregate( item )
+  assert aggregate.fromCount == TopPages( { 'www': 2 } )
+  assert aggregate.toPage() == { 'www': 0.5, '/': 0.5 }
+
+def test_legacy_itemToAggregate():
+  assert itemToAggregate( { 'NumberVisitors': { 'N': '1' } } ) is None
+
+def test_itemToAggregate_exception():
+  with pytest.raises( Exception ) as e:
+    assert itemToAggregate( { 'VisitCount': { 'N': '1' } } )
+  assert str( e.value ) == 'Could not parse aggregate'
+
+def test_aggregate_itemToDay():
+  aggregate = Aggregate( 4, 90.0, 2, 1, { 'a', 'b' }, { 'www': 4 }, {
+    'www': 1, '/': 3
+  } )
+  day = Day(
+    '/', 'Tyler Norlund', '2020-01-02', 2, None, 0, {}, {}, aggregate
+  )
+  newDay = itemToDay( day.toItem() )
+  assert newDay.numberVisitors == 2
+  assert newDay.averageTime == 45.0
+  assert newDay.percentChurn == 0.25
+  assert newDay.fromPage == { 'www': 1.0 }
+  assert newDay.toPage == { 'www': 0.25, '/': 0.75 }
+  assert dict( newDay.aggregate ) == dict( aggregate )
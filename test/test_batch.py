@@ -0,0 +1,182 @@
+import copy
+import datetime
+import pytest
+from botocore.exceptions import ClientError
+from dynamo.entities import Browser # pylint: disable=wrong-import-position
+from dynamo.data import DynamoClient # pylint: disable=wrong-import-position
+from dynamo.data.batch import BatchWriter, BatchWriteException # pylint: disable=wrong-import-position
+from dynamo.data.batch import BatchGetException, batchGet # pylint: disable=wrong-import-position
+
+class ThrottledClient:
+  '''A DynamoDB client that leaves the last request of every batch
+  unprocessed a number of times.'''
+  def __init__( self, unprocessed, error = None ):
+    self.unprocessed = unprocessed
+    self.error = error
+    self.requests = []
+
+  def batch_write_item( self, RequestItems ):
+    self.requests.append( RequestItems )
+    if self.error is not None and len( self.requests ) == 1:
+      raise ClientError( { 'Error': { 'Code': self.error } }, 'BatchWriteItem' )
+    if self.unprocessed == 0:
+      return { 'UnprocessedItems': {} }
+    self.unprocessed -= 1
+    table, requests = list( RequestItems.items() )[0]
+    return { 'UnprocessedItems': { table: requests[-1:] } }
+
+def _item( index ):
+  return {
+    'PK': { 'S': f'VISITOR#{ index }' }, 'SK': { 'S': '#VISITOR' }
+  }
+
+def test_flush():
+  client = ThrottledClient( 0 )
+  with BatchWriter( client, 'table' ) as writer:
+    for index in range( 60 ):
+      writer.put( _item( index ) )
+  assert [ len( request['table'] ) for request in client.requests ] == \
+    [ 25, 25, 10 ]
+  assert writer.flushes == [
+    { 'items': 25, 'retries': 0 }, { 'items': 25, 'retries': 0 },
+    { 'items': 10, 'retries': 0 }
+  ]
+
+def test_dedupe_flush():
+  client = ThrottledClient( 0 )
+  with BatchWriter( client, 'table' ) as writer:
+    writer.put( _item( 0 ) )
+    writer.put( _item( 1 ) )
+    writer.delete( _item( 0 ) )
+  assert client.requests[0]['table'] == [
+    { 'PutRequest': { 'Item': _item( 1 ) } },
+    { 'DeleteRequest': { 'Key': _item( 0 ) } }
+  ]
+
+def test_unprocessed_flush():
+  client = ThrottledClient( 2 )
+  writer = BatchWriter( client, 'table', baseDelay = 0 )
+  writer.put( _item( 0 ) )
+  writer.put( _item( 1 ) )
+  writer.flush()
+  assert client.requests[-1]['table'] == [
+    { 'PutRequest': { 'Item': _item( 1 ) } }
+  ]
+  assert writer.flushes == [ { 'items': 2, 'retries': 2 } ]
+
+def test_throttled_flush():
+  client = ThrottledClient( 0, 'ProvisionedThroughputExceededException' )
+  writer = BatchWriter( client, 'table', baseDelay = 0 )
+  writer.put( _item( 0 ) )
+  writer.flush()
+  assert len( client.requests ) == 2
+  assert writer.flushes == [ { 'items': 1, 'retries': 1 } ]
+
+def test_client_error_flush():
+  writer = BatchWriter(
+    ThrottledClient( 0, 'ValidationException' ), 'table', baseDelay = 0
+  )
+  writer.put( _item( 0 ) )
+  with pytest.raises( ClientError ):
+    writer.flush()
+
+def test_exception_flush():
+  writer = BatchWriter(
+    ThrottledClient( 5 ), 'table', maxRetries = 3, baseDelay = 0
+  )
+  writer.put( _item( 0 ) )
+  with pytest.raises( BatchWriteException ) as e:
+    writer.flush()
+  assert str( e.value ) == 'Could not write 1 items after 3 retries'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_large_addBrowsers( table_name, browsers ):
+  many_browsers = [
+    Browser(
+      browsers[0].id, browsers[0].app, 100, 200,
+      datetime.datetime( 2020, 1, 1 ) + datetime.timedelta( minutes = minute )
+    )
+    for minute in range( 60 )
+  ]
+  client = DynamoClient( table_name )
+  result = client.addBrowsers( many_browsers )
+  assert result['browsers'] == many_browsers
+  assert len( client.client.scan( TableName = table_name )['Items'] ) == 60
+
+def test_workers_flush():
+  client = ThrottledClient( 0 )
+  with BatchWriter( client, 'table', workers = 4 ) as writer:
+    for index in range( 260 ):
+      writer.put( _item( index ) )
+  assert len( client.requests ) == 11
+  assert sorted( flush['items'] for flush in writer.flushes ) == \
+    [ 10 ] + [ 25 ] * 10
+
+def test_workers_exception_flush():
+  writer = BatchWriter(
+    ThrottledClient( 0, 'ValidationException' ), 'table', workers = 4
+  )
+  with pytest.raises( ClientError ):
+    with writer:
+      for index in range( 100 ):
+        writer.put( _item( index ) )
+
+def test_parameter_workers():
+  with pytest.raises( ValueError ) as e:
+    BatchWriter( ThrottledClient( 0 ), 'table', workers = 0 )
+  assert str( e.value ) == 'Must use at least one worker'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_workers_addVisits( table_name, visits ):
+  many_visits = [
+    copy.copy( visit ) for _ in range( 20 ) for visit in visits
+  ]
+  for index, visit in enumerate( many_visits ):
+    visit.date = datetime.datetime( 2020, 1, 1 ) + \
+      datetime.timedelta( seconds = index )
+  client = DynamoClient( table_name, workers = 4 )
+  result = client.addVisits( many_visits )
+  assert result['visits'] == many_visits
+  assert len( client.client.scan( TableName = table_name )['Items'] ) == \
+    len( many_visits )
+
+class UnprocessedGetClient:
+  '''A DynamoDB client that leaves the last key of every batch get
+  unprocessed a number of times.'''
+  def __init__( self, unprocessed ):
+    self.unprocessed = unprocessed
+    self.requests = []
+
+  def batch_get_item( self, RequestItems ):
+    self.requests.append( RequestItems )
+    table, request = list( RequestItems.items() )[0]
+    keys = request['Keys']
+    if self.unprocessed == 0:
+      return { 'Responses': { table: keys }, 'UnprocessedKeys': {} }
+    self.unprocessed -= 1
+    return {
+      'Responses': { table: keys[:-1] },
+      'UnprocessedKeys': { table: { 'Keys': keys[-1:] } }
+    }
+
+def test_batchGet():
+  client = UnprocessedGetClient( 0 )
+  keys = [ _item( index ) for index in range( 150 ) ]
+  items = batchGet( client, 'table', keys + keys[:10] )
+  assert [ len( request['table']['Keys'] ) for request in client.requests ] \
+    == [ 100, 50 ]
+  assert items == keys
+
+def test_unprocessed_batchGet():
+  client = UnprocessedGetClient( 2 )
+  items = batchGet(
+    client, 'table', [ _item( 0 ), _item( 1 ) ], baseDelay = 0
+  )
+  assert items == [ _item( 0 ), _item( 1 ) ]
+  assert len( client.requests ) == 3
+
+def test_batchGet_exception():
+  client = UnprocessedGetClient( 10 )
+  with pytest.raises( BatchGetException ) as e:
+    batchGet( client, 'table', [ _item( 0 ) ], maxRetries = 2, baseDelay = 0 )
+  assert str( e.value ) == 'Could not get 1 items after 2 retries'
@@ -0,0 +1,184 @@
+import datetime
+import pytest
+from dynamo.entities import Visitor
+from dynamo.data import DynamoClient
+from dynamo.data.cache import EntityCache, entityPartitions, CACHE
+from ._location import location
+
+class Clock:
+  '''A clock that only moves when told to.'''
+  def __init__( self ):
+    self.now = 0.0
+
+  def __call__( self ):
+    return self.now
+
+def test_init():
+  cache = EntityCache( maxSize = 2, ttl = 10 )
+  assert cache.maxSize == 2
+  assert cache.ttl == 10
+  assert cache.stats() == {
+    'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0
+  }
+
+def test_maxSize_init():
+  with pytest.raises( ValueError ) as e:
+    EntityCache( maxSize = 0 )
+  assert str( e.value ) == 'Must keep at least one partition'
+
+def test_get():
+  cache = EntityCache()
+  assert cache.get( 'table', 'VISITOR#1', ( 'visitor', 'full' ) ) is None
+  cache.put( 'table', 'VISITOR#1', ( 'visitor', 'full' ), { 'visits': [] } )
+  assert cache.get( 'table', 'VISITOR#1', ( 'visitor', 'full' ) ) == {
+    'visits': []
+  }
+  assert cache.get( 'table', 'VISITOR#1', ( 'visitor', 'visits-light' ) ) \
+    is None
+  assert cache.get( 'other', 'VISITOR#1', ( 'visitor', 'full' ) ) is None
+  assert cache.hits == 1
+  assert cache.misses == 3
+
+def test_ttl_get():
+  clock = Clock()
+  cache = EntityCache( ttl = 10, clock = clock )
+  cache.put( 'table', 'VISITOR#1', ( 'visitor', 'full' ), {} )
+  clock.now = 9.5
+  assert cache.get( 'table', 'VISITOR#1', ( 'visitor', 'full' ) ) == {}
+  clock.now = 10.0
+  assert cache.get( 'table', 'VISITOR#1', ( 'visitor', 'full' ) ) is None
+  assert cache.hits == 1
+  assert cache.misses == 1
+
+def test_eviction_put():
+  cache = EntityCache( maxSize = 2 )
+  cache.put( 'table', 'VISITOR#1', ( 'visitor', 'full' ), {} )
+  cache.put( 'table', 'VISITOR#2', ( 'visitor', 'full' ), {} )
+  # Reading the first visitor makes the second the least recently used.
+  cache.get( 'table', 'VISITOR#1', ( 'visitor', 'full' ) )
+  cache.put( 'table', 'VISITOR#3', ( 'visitor', 'full' ), {} )
+  assert len( cache ) == 2
+  assert cache.evictions == 1
+  assert cache.get( 'table', 'VISITOR#2', ( 'visitor', 'full' ) ) is None
+  assert cache.get( 'table', 'VISITOR#1', ( 'visitor', 'full' ) ) == {}
+
+def test_invalidate():
+  cache = EntityCache()
+  cache.put( 'table', 'PAGE#/', ( 'page', 'full' ), {} )
+  cache.put( 'table', 'PAGE#/', ( 'page', 'rollup-inputs' ), {} )
+  cache.invalidate( 'table', 'PAGE#/' )
+  cache.invalidate( 'table', 'PAGE#/blog' )
+  assert cache.get( 'table', 'PAGE#/', ( 'page', 'full' ) ) is None
+  assert cache.get( 'table', 'PAGE#/', ( 'page', 'rollup-inputs' ) ) is None
+  assert len( cache ) == 0
+
+def test_update():
+  cache = EntityCache()
+  cache.put( 'table', 'VISITOR#1', ( 'visitor', 'full' ), { 'count': 1 } )
+  cache.update(
+    'table', 'VISITOR#1', lambda value: { 'count': value['count'] + 1 }
+  )
+  cache.update( 'table', 'VISITOR#2', lambda value: {} )
+  assert cache.get( 'table', 'VISITOR#1', ( 'visitor', 'full' ) ) == {
+    'count': 2
+  }
+  assert len( cache ) == 1
+
+def test_clear():
+  cache = EntityCache()
+  cache.put( 'table', 'VISITOR#1', ( 'visitor', 'full' ), {} )
+  cache.clear()
+  assert len( cache ) == 0
+
+def test_entityPartitions( visitor, visits, session, page ):
+  assert entityPartitions( visitor ) == [ f'VISITOR#{ visitor.id }' ]
+  assert entityPartitions( visits[0] ) == [
+    f'VISITOR#{ visitor.id }', f'PAGE#{ visits[0].slug }',
+    visits[0].gsi2pk()['S']
+  ]
+  assert entityPartitions( session ) == [
+    f'VISITOR#{ visitor.id }', session.gsi2pk()['S']
+  ]
+  assert entityPartitions( page ) == [ f'PAGE#{ page.slug }' ]
+
+def test_cache_init( table_name ):
+  assert DynamoClient( table_name ).cache is None
+  assert DynamoClient( table_name, cache = True ).cache is CACHE
+  assert DynamoClient( table_name, cache = False ).cache is None
+  cache = EntityCache()
+  assert DynamoClient( table_name, cache = cache ).cache is cache
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name, cache = {} )
+  assert str( e.value ) == 'Must pass an EntityCache object'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_getVisitorDetails( table_name, visitor, browsers, visits ):
+  cache = EntityCache()
+  client = DynamoClient( table_name, cache = cache )
+  assert client.getVisitorDetails( visitor ) == {
+    'error': 'Visitor not in table'
+  }
+  client.addNewVisitor( visitor, location(), browsers, visits )
+  first = client.getVisitorDetails( visitor )
+  first['visits'].clear()
+  second = client.getVisitorDetails( visitor )
+  assert len( second['visits'] ) == len( visits )
+  assert cache.stats() == {
+    'hits': 1, 'misses': 2, 'evictions': 0, 'size': 1
+  }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_incrementVisitorSessions( table_name, visitor, browsers, visits ):
+  cache = EntityCache()
+  client = DynamoClient( table_name, cache = cache )
+  client.addNewVisitor( visitor, location(), browsers, visits )
+  numberSessions = client.getVisitorDetails( visitor )['visitor'] \
+    .numberSessions
+  client.incrementVisitorSessions( Visitor( visitor.id ) )
+  result = client.getVisitorDetails( visitor )
+  assert result['visitor'].numberSessions == numberSessions + 1
+  assert cache.hits == 1
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_addVisits( table_name, visitor, browsers, visits, session ):
+  cache = EntityCache()
+  client = DynamoClient( table_name, cache = cache )
+  client.addNewVisitor( visitor, location(), browsers, visits[:1] )
+  client.getVisitorDetails( visitor )
+  client.getSessionDetails( session )
+  client.getPageDetails( visits[0] )
+  assert len( cache ) == 3
+  client.addVisits( visits[1:] )
+  result = client.getSessionDetails( session )
+  assert len( result['visits'] ) == len( visits )
+  assert len( client.getVisitorDetails( visitor )['visits'] ) == len( visits )
+  assert cache.hits == 0
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_updateSession( table_name, visitor, browsers, visits, session ):
+  cache = EntityCache()
+  client = DynamoClient( table_name, cache = cache )
+  client.addNewVisitor( visitor, location(), browsers, visits )
+  session = client.getSessionDetails( session )['session']
+  session.totalTime = 1.0
+  client.updateSession( session, visits )
+  assert client.getSessionDetails( session )['session'].totalTime == 1.0
+  client.removeSession( session )
+  assert 'session' not in client.getSessionDetails( session ).keys()
+  assert cache.hits == 0
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_getPageDetails( table_name, visits ):
+  cache = EntityCache()
+  client = DynamoClient( table_name, cache = cache )
+  client.addVisits( visits )
+  client.updatePage( [ visit for visit in visits if visit.slug == '/' ] )
+  first = client.getPageDetails( visits[0] )
+  assert client.getPageDetails( visits[0] ) == first
+  assert cache.hits == 1
+  newVisit = visits[0]
+  newVisit.date = newVisit.date + datetime.timedelta( days = 400 )
+  client.addVisits( [ newVisit ] )
+  result = client.getPageDetails( visits[0] )
+  assert len( result['visits'] ) == len( first['visits'] ) + 1
+  assert cache.hits == 1
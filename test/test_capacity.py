@@ -0,0 +1,101 @@
+import pytest
+from botocore.exceptions import ClientError
+from dynamo.data import DynamoClient # pylint: disable=wrong-import-position
+from dynamo.data import capacity # pylint: disable=wrong-import-position
+from dynamo.data.capacity import AdaptiveBucket, CapacityClient # pylint: disable=wrong-import-position
+
+class ThrottledClient:
+  '''A DynamoDB client that throttles the first requests.'''
+  def __init__(
+    self, throttles, code = 'ProvisionedThroughputExceededException'
+  ):
+    self.throttles = throttles
+    self.code = code
+    self.requests = []
+    self.meta = 'meta'
+
+  def put_item( self, **kwargs ):
+    self.requests.append( kwargs )
+    if self.throttles > 0:
+      self.throttles -= 1
+      raise ClientError( { 'Error': { 'Code': self.code } }, 'PutItem' )
+    return { 'ConsumedCapacity': { 'CapacityUnits': 3.0 } }
+
+@pytest.fixture( name = 'sleeps' )
+def fixture_sleeps( monkeypatch ):
+  '''Records the number of seconds the buckets wait instead of waiting.'''
+  waits = []
+  monkeypatch.setattr( capacity.time, 'sleep', waits.append )
+  return waits
+
+def test_acquire( sleeps ):
+  bucket = AdaptiveBucket( 10 )
+  bucket.acquire( 10 )
+  assert sleeps == []
+  bucket.acquire( 5 )
+  assert len( sleeps ) == 1
+  assert sleeps[0] == pytest.approx( 0.5, abs = 0.01 )
+
+def test_aimd():
+  bucket = AdaptiveBucket( 100, minimumRate = 10, increase = 5 )
+  bucket.throttled()
+  assert bucket.rate == 50
+  bucket.succeeded()
+  assert bucket.rate == 55
+  for _ in range( 10 ):
+    bucket.throttled()
+  assert bucket.rate == 10
+  for _ in range( 100 ):
+    bucket.succeeded()
+  assert bucket.rate == 100
+
+def test_parameter_AdaptiveBucket():
+  with pytest.raises( ValueError ) as e:
+    AdaptiveBucket( 0 )
+  assert str( e.value ) == 'Capacity must be positive'
+
+@pytest.mark.usefixtures( 'sleeps' )
+def test_throttled_CapacityClient():
+  client = CapacityClient( ThrottledClient( 2 ), writeCapacity = 100 )
+  result = client.put_item( TableName = 'table' )
+  assert result['ConsumedCapacity']['CapacityUnits'] == 3.0
+  assert len( client.client.requests ) == 3
+  assert client.client.requests[0]['ReturnConsumedCapacity'] == 'TOTAL'
+  assert client.write.rate == pytest.approx( 30 )
+  # The 2 units consumed beyond the one reserved are taken after the request.
+  assert client.write.tokens < 25
+
+@pytest.mark.usefixtures( 'sleeps' )
+def test_exception_CapacityClient():
+  client = CapacityClient( ThrottledClient( 1, 'ValidationException' ), 10, 10 )
+  with pytest.raises( ClientError ):
+    client.put_item( TableName = 'table' )
+  client = CapacityClient(
+    ThrottledClient( 5 ), writeCapacity = 10, maxRetries = 2
+  )
+  with pytest.raises( ClientError ):
+    client.put_item( TableName = 'table' )
+  assert len( client.client.requests ) == 3
+
+def test_attribute_CapacityClient():
+  client = CapacityClient( ThrottledClient( 0 ), readCapacity = 10 )
+  assert client.meta == 'meta'
+  # Writes are not limited without a write capacity.
+  assert client.put_item( TableName = 'table' ) == {
+    'ConsumedCapacity': { 'CapacityUnits': 3.0 }
+  }
+  assert 'ReturnConsumedCapacity' not in client.client.requests[0]
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_capacity_DynamoClient( monkeypatch, table_name, visitor, visits ):
+  settled = []
+  monkeypatch.setattr(
+    AdaptiveBucket, 'settle',
+    lambda bucket, units: settled.append( ( bucket.capacity, units ) )
+  )
+  client = DynamoClient( table_name, readCapacity = 50, writeCapacity = 40 )
+  assert 'visitor' in client.addVisitor( visitor ).keys()
+  assert 'visits' in client.addVisits( visits ).keys()
+  result = client.getVisitorDetails( visitor )
+  assert len( result['visits'] ) == len( visits )
+  assert [ bucketCapacity for bucketCapacity, _ in settled ] == [ 40, 40, 50 ]
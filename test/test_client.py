@@ -684,6 +684,18 @@ def test_getSessionDetails(
   assert result['session'].id == visitor.id
   assert result['session'].sessionStart == visits[0].date
 
+def test_iterSessionItems(
+  dynamo_client, table_init, table_name, visitor, browsers, visits, session
+):
+  client = DynamoClient( table_name )
+  client.addVisitor( visitor )
+  client.addNewSession( visitor, browsers, visits )
+  entities = list( client.iterSessionItems( session, prefetch = True ) )
+  assert entities[0].sessionStart == visits[0].date
+  assert [ dict( entity ) for entity in entities[1:] ] == [
+    dict( visit ) for visit in visits
+  ]
+
 def test_table_getSessionDetails(
   dynamo_client, table_name, visitor, browsers, visits, session
 ):
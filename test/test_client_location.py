@@ -86,6 +86,27 @@ def test_listLocations( table_name ):
   result = client.listLocations()
   assert len( result ) == len( locations() )
 
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_iterLocations( table_name ):
+  client = DynamoClient( table_name )
+  for loc in locations():
+    client.addLocation( loc )
+  result = client.iterLocations( prefetch = True )
+  assert not isinstance( result, list )
+  assert sorted( location.ip for location in result ) == \
+    sorted( location.ip for location in locations() )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_index_listLocations( table_name ):
+  client = DynamoClient( table_name, typeIndex = 'GSI3' )
+  for loc in locations():
+    client.addLocation( loc )
+  result = client.listLocations()
+  # The index is sorted by the date the locations were added.
+  assert [ location.dateAdded for location in result ] == sorted(
+    location.dateAdded for location in locations()
+  )
+
 def test_table_listLocations( table_name ):
   result = DynamoClient( table_name ).listLocations( )
   assert 'error' in result.keys()
@@ -1,5 +1,10 @@
+import datetime
 import pytest
-from dynamo.data import DynamoClient
+from botocore.exceptions import ClientError
+from dynamo.data import DynamoClient, util
+from dynamo.data.util import MAX_MERGES
+from dynamo.data._page import _parsePageDetails, _visitRanges, _bucketKeyRange
+from dynamo.entities import Day, VisitorSketch # pylint: disable=wrong-import-position
 
 @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
 def test_updatePage(
@@ -29,6 +34,123 @@ def test_getPageDetails(
     'weeks' in result.keys() and 'months' in result.keys() and \
     'years' in result.keys()
 
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_ordered_getPageDetails(
+  table_name, year_visits, month_visits, week_visits, day_visits, page
+):
+  client = DynamoClient( table_name )
+  visits = year_visits + month_visits + week_visits + day_visits
+  client.addVisits( visits )
+  client.updatePage( visits )
+  result = client.getPageDetails( page )
+  # The ranges must return the same items as one query of the partition.
+  expected = _parsePageDetails(
+    { 'visits': [], 'days': [], 'weeks': [], 'months': [], 'years': [] },
+    { 'Items': client._queryPageItems( page, '#gsi1sk >= :start', {
+      ':start': { 'S': '#' }
+    } ) }
+  )
+  assert [ dict( visit ) for visit in result['visits'] ] == \
+    [ dict( visit ) for visit in expected['visits'] ]
+  for name in ( 'days', 'weeks', 'months', 'years' ):
+    assert [ dict( item ) for item in result[name] ] == \
+      [ dict( item ) for item in expected[name] ]
+  assert dict( result['page'] ) == dict( expected['page'] )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_profile_getPageDetails( table_name, month_visits, page ):
+  client = DynamoClient( table_name )
+  client.addVisits( month_visits )
+  client.updatePage( month_visits )
+  full = client.getPageDetails( page )
+  result = client.getPageDetails( page, 'rollup-inputs' )
+  assert [ dict( day ) for day in result['days'] ] == \
+    [ dict( day ) for day in full['days'] ]
+  assert [
+    ( visit.id, visit.date, visit.slug, visit.title, visit.prevSlug,
+      visit.nextSlug, visit.timeOnPage, visit.scrollEvents )
+    for visit in result['visits']
+  ] == [
+    ( visit.id, visit.date, visit.slug, visit.title, visit.prevSlug,
+      visit.nextSlug, visit.timeOnPage, {} )
+    for visit in full['visits']
+  ]
+  assert [
+    dict( visit ) for visit in
+    client.getPageDetails( page, 'visits-light' )['visits']
+  ] == [ { **dict( visit ), 'scrollEvents': {} } for visit in full['visits'] ]
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_iterPageDetails( table_name, month_visits, page ):
+  client = DynamoClient( table_name )
+  client.addVisits( month_visits )
+  client.updatePage( month_visits )
+  result = client.getPageDetails( page )
+  entities = list( client.iterPageDetails( page, prefetch = True ) )
+  assert [ dict( entity ) for entity in entities ] == [
+    dict( entity ) for entity in
+    result['days'] + result['months'] + [ result['page'] ] + \
+    result['weeks'] + result['years'] + result['visits']
+  ]
+
+def test_parameter_iterPageDetails( table_name ):
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).iterPageDetails( {} )
+  assert str( e.value ) == 'Must pass a Page object'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_listPages( table_name, day_visits ):
+  client = DynamoClient( table_name )
+  client.updatePage( day_visits )
+  result = client.listPages()
+  assert [ page.slug for page in result ] == [ '/' ]
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_index_listPages( table_name, day_visits ):
+  client = DynamoClient( table_name, typeIndex = 'GSI3' )
+  client.updatePage( day_visits )
+  result = client.listPages()
+  assert [ dict( page ) for page in result ] == \
+    [ dict( page ) for page in DynamoClient( table_name ).listPages() ]
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_table_listPages( table_name ):
+  result = DynamoClient( table_name, typeIndex = 'GSI4' ).listPages()
+  assert result == { 'error': 'Could not get pages from table' }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_backfillTypeIndex( table_name, day_visits, visitor ):
+  client = DynamoClient( table_name, workers = 4, typeIndex = 'GSI3' )
+  client.updatePage( day_visits )
+  client.addVisitor( visitor )
+  client.addVisits( day_visits )
+  # Remove the index's keys like the items written before the index existed.
+  for item in client.client.scan( TableName = table_name )['Items']:
+    if 'GSI3PK' in item.keys():
+      client.client.update_item(
+        TableName = table_name, Key = { 'PK': item['PK'], 'SK': item['SK'] },
+        UpdateExpression = 'REMOVE GSI3PK, GSI3SK'
+      )
+  assert client.listPages() == [] and client.listVisitors() == []
+  assert client.backfillTypeIndex() == { 'items': 2 }
+  assert [ page.slug for page in client.listPages() ] == [ '/' ]
+  assert [ dict( item ) for item in client.listVisitors() ] == \
+    [ dict( visitor ) ]
+  assert client.backfillTypeIndex() == { 'items': 0 }
+
+def test_visitRanges():
+  assert _visitRanges( None, None ) == []
+  assert _visitRanges(
+    'VISIT#2020-11-02T00:00:00.000Z', 'VISIT#2021-01-05T00:00:00.000Z'
+  ) == [
+    ( 'VISIT#', 'VISIT#2020-12' ),
+    ( 'VISIT#2020-12', 'VISIT#2021-01' ),
+    ( 'VISIT#2021-01', 'VISIT$' )
+  ]
+  assert _visitRanges(
+    'VISIT#2020-11-02T00:00:00.000Z', 'VISIT#2020-11-05T00:00:00.000Z'
+  ) == [ ( 'VISIT#', 'VISIT$' ) ]
+
 @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
 def test_parameter_getPageDetails( table_name ):
   client = DynamoClient( table_name )
@@ -51,3 +173,321 @@ def test_table_getPageDetails(
   result = DynamoClient( table_name ).getPageDetails( page )
   assert 'error' in result.keys()
   assert result['error'] == 'Could not get page from table'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_rollups_updatePage( table_name, month_visits ):
+  result = DynamoClient( table_name ).updatePage( month_visits )
+  assert len( result['days'] ) == 4
+  assert len( result['weeks'] ) == 3
+  assert len( result['months'] ) == 1
+  assert len( result['years'] ) == 1
+  assert result['page'].numberVisitors == 3
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_parameter_addDay( table_name, month_visits ):
+  with pytest.raises( ValueError ) as e:
+    assert DynamoClient( table_name ).addDay( month_visits )
+  assert str( e.value ) == \
+    'List of visits must be from the same year, month, and day'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_incrementPage( table_name, month_visits ):
+  client = DynamoClient( table_name )
+  client.incrementPage( month_visits[:2] )
+  result = client.incrementPage( month_visits[2:] )
+  expected = client.updatePage( month_visits )
+  assert dict( result['page'] ) == dict( expected['page'] )
+  assert dict( result['page'].aggregate ) == \
+    dict( expected['page'].aggregate )
+  assert [ dict( month ) for month in result['months'] ] == \
+    [ dict( month ) for month in expected['months'] ]
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_ratios_incrementPage( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  client.incrementPage( month_visits[:2] )
+  client.incrementPage( month_visits[2:] )
+  item = client.client.get_item(
+    TableName = table_name, Key = page.key()
+  )['Item']
+  assert item['NumberVisitors'] == { 'N': '3' }
+  assert item['VisitCount'] == { 'N': '4' }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_legacy_incrementPage( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  # The page was added without mergeable analytics.
+  client.client.put_item( TableName = table_name, Item = page.toItem() )
+  client.addVisits( month_visits )
+  result = client.incrementPage( month_visits[2:] )
+  assert result['page'].aggregate.numberVisits == len( month_visits )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_rebuildPage( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  client.addVisits( month_visits )
+  result = client.rebuildPage( page )
+  assert result['page'].numberVisitors == 3
+  assert len( result['days'] ) == 4
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_touchedOnly_updatePage(
+  table_name, page, year_visits, month_visits, week_visits, day_visits
+):
+  visits = year_visits + month_visits + week_visits + day_visits
+  client = DynamoClient( table_name )
+  client.addVisits( visits )
+  client.updatePage( visits[:-1] )
+  result = client.updatePage( visits[-1:], touchedOnly = True )
+  assert len( result['days'] ) == 1
+  assert len( result['weeks'] ) == 1
+  assert len( result['months'] ) == 1
+  assert len( result['years'] ) == 1
+  expected = client.rebuildPage( page )
+  assert dict( result['page'] ) == dict( expected['page'] )
+  assert dict( result['page'].aggregate ) == \
+    dict( expected['page'].aggregate )
+  assert dict( result['years'][0].aggregate ) == dict( [
+    year for year in expected['years']
+    if year.key() == result['years'][0].key()
+  ][0].aggregate )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_legacy_touchedOnly_updatePage( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  # The page was added without mergeable analytics.
+  client.client.put_item( TableName = table_name, Item = page.toItem() )
+  client.addVisits( month_visits )
+  result = client.updatePage( month_visits[2:], touchedOnly = True )
+  assert result['page'].aggregate.numberVisits == len( month_visits )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_countVisitors( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  client.updatePage( month_visits )
+  result = client.countVisitors(
+    page, datetime.datetime( 2020, 1, 2 ), datetime.datetime( 2020, 1, 31 )
+  )
+  assert result['numberVisitors'] == len(
+    { visit.id for visit in month_visits if visit.date.day >= 2 }
+  )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_legacy_countVisitors( table_name, page ):
+  client = DynamoClient( table_name )
+  client.client.put_item( TableName = table_name, Item = Day(
+    page.slug, page.title, '2020-01-03', 2, 1.0, 0.5, {}, {}
+  ).toItem() )
+  result = client.countVisitors(
+    page, datetime.datetime( 2020, 1, 1 ), datetime.datetime( 2020, 1, 31 )
+  )
+  assert result['error'] == 'Page must be rebuilt to count its visitors'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_getPageVisits( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  client.addVisits( month_visits )
+  result = client.getPageVisits(
+    page, datetime.datetime( 2020, 1, 2 ), datetime.datetime( 2020, 1, 25 )
+  )
+  assert [ visit.date for visit in result['visits'] ] == [
+    month_visits[1].date, month_visits[2].date
+  ]
+  result = client.getPageVisits(
+    page, limit = 2, descending = True, profile = 'visits-light'
+  )
+  assert [ visit.date for visit in result['visits'] ] == [
+    month_visits[3].date, month_visits[2].date
+  ]
+  assert all( visit.scrollEvents == {} for visit in result['visits'] )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_parameter_getPageVisits( table_name, page ):
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).getPageVisits( {} )
+  assert str( e.value ) == 'Must pass a Page object'
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).getPageVisits(
+      page, datetime.datetime( 2020, 1, 2 ), datetime.datetime( 2020, 1, 1 )
+    )
+  assert str( e.value ) == 'Must end the range after it starts'
+
+@pytest.mark.usefixtures( 'dynamo_client' )
+def test_table_getPageVisits( table_name, page ):
+  result = DynamoClient( table_name ).getPageVisits( page )
+  assert result == { 'error': 'Could not get visits from table' }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_getPageSummary( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  client.addVisits( month_visits )
+  client.updatePage( month_visits )
+  result = client.getPageSummary(
+    page, 'day', datetime.datetime( 2020, 1, 2 ),
+    datetime.datetime( 2020, 1, 25, 12 )
+  )
+  assert list( result.keys() ) == [ 'days' ]
+  assert [ day.day for day in result['days'] ] == [ 3, 25 ]
+  result = client.getPageSummary( page, 'month' )
+  assert [ month.month for month in result['months'] ] == [ 1 ]
+  result = client.getPageSummary( page, 'page' )
+  assert result['page'].slug == page.slug
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_none_getPageSummary( table_name, page ):
+  client = DynamoClient( table_name )
+  assert client.getPageSummary( page, 'page' ) == {
+    'error': 'Page not in table'
+  }
+  assert client.getPageSummary( page, 'week' ) == { 'weeks': [] }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_parameter_getPageSummary( table_name, page ):
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).getPageSummary( {}, 'day' )
+  assert str( e.value ) == 'Must pass a Page object'
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).getPageSummary( page, 'hour' )
+  assert str( e.value ) == 'Unknown granularity hour'
+
+@pytest.mark.usefixtures( 'dynamo_client' )
+def test_table_getPageSummary( table_name, page ):
+  result = DynamoClient( table_name ).getPageSummary( page, 'day' )
+  assert result == { 'error': 'Could not get page from table' }
+
+def test_bucketKeyRange():
+  assert _bucketKeyRange(
+    'week', datetime.datetime( 2020, 1, 5 ), datetime.datetime( 2020, 3, 2 )
+  ) == {
+    ':start': { 'S': '#WEEK#2020-01' }, ':end': { 'S': '#WEEK#2020-09' }
+  }
+  assert _bucketKeyRange( 'year' ) == {
+    ':start': { 'S': '#YEAR#' }, ':end': { 'S': '#YEAR#~' }
+  }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_countPageVisits( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  client.addVisits( month_visits )
+  client.updatePage( month_visits )
+  assert client.countPageVisits( page ) == {
+    'numberVisits': len( month_visits )
+  }
+  assert client.countPageVisits(
+    page, datetime.datetime( 2020, 1, 2 ), datetime.datetime( 2020, 1, 25 )
+  ) == { 'numberVisits': 2 }
+
+@pytest.mark.usefixtures( 'dynamo_client' )
+def test_table_countPageVisits( table_name, page ):
+  result = DynamoClient( table_name ).countPageVisits( page )
+  assert result == { 'error': 'Could not get visits from table' }
+
+class StaleClient:
+  '''A DynamoDB client that reads an item before it was last updated.'''
+  def __init__( self, client, item ):
+    self.client = client
+    self.item = item
+
+  def get_item( self, **kwargs ):
+    if self.item is not None and kwargs['Key'] == {
+      'PK': self.item['PK'], 'SK': self.item['SK']
+    }:
+      item, self.item = self.item, None
+      return { 'Item': item }
+    return self.client.get_item( **kwargs )
+
+  def __getattr__( self, name ):
+    return getattr( self.client, name )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_conflict_incrementPage(
+  monkeypatch, table_name, page, month_visits
+):
+  sleeps = []
+  monkeypatch.setattr( util.time, 'sleep', sleeps.append )
+  client = DynamoClient( table_name )
+  client.incrementPage( month_visits[:1] )
+  stale = client.client.get_item(
+    TableName = table_name, Key = page.key()
+  )['Item']
+  client.incrementPage( month_visits[1:3] )
+  # The page read before the last update is merged after reading it again.
+  client.client = StaleClient( client.client, stale )
+  result = client.incrementPage( month_visits[3:] )
+  assert len( sleeps ) == 1
+  assert result['page'].aggregate.visitors == VisitorSketch(
+    [ visit.id for visit in month_visits ]
+  )
+  assert result['page'].aggregate.toCount.total == len( month_visits )
+  assert result['page'].aggregate.numberVisits == len( month_visits )
+  # Merged visitors are estimated from the sketch.
+  assert result['page'].numberVisitors == \
+    result['page'].aggregate.numberVisitors()
+
+class ConflictedClient:
+  '''A DynamoDB client whose items change before every merge is written.'''
+  def __init__( self, client ):
+    self.client = client
+
+  def update_item( self, **kwargs ):
+    if 'REMOVE' in kwargs['UpdateExpression']:
+      raise ClientError(
+        { 'Error': { 'Code': 'ConditionalCheckFailedException' } },
+        'UpdateItem'
+      )
+    return self.client.update_item( **kwargs )
+
+  def __getattr__( self, name ):
+    return getattr( self.client, name )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_retries_incrementPage( monkeypatch, table_name, month_visits ):
+  sleeps = []
+  monkeypatch.setattr( util.time, 'sleep', sleeps.append )
+  client = DynamoClient( table_name )
+  client.addVisits( month_visits )
+  client.incrementPage( month_visits[:1] )
+  client.client = ConflictedClient( client.client )
+  # The page is rebuilt from its visits when the analytics can not be merged.
+  result = client.incrementPage( month_visits[1:] )
+  assert len( sleeps ) == MAX_MERGES - 1
+  assert result['page'].aggregate.visitors == VisitorSketch(
+    [ visit.id for visit in month_visits ]
+  )
+  assert result['page'].aggregate.numberVisits == len( month_visits )
+
+class FailingClient:
+  '''A DynamoDB client that fails to update an item once.'''
+  def __init__( self, client, key ):
+    self.client = client
+    self.key = key
+
+  def update_item( self, **kwargs ):
+    if kwargs['Key'] == self.key:
+      self.key = None
+      raise ClientError(
+        { 'Error': { 'Code': 'InternalServerError' } }, 'UpdateItem'
+      )
+    return self.client.update_item( **kwargs )
+
+  def __getattr__( self, name ):
+    return getattr( self.client, name )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_retry_incrementPage( table_name, page, month_visits ):
+  client = DynamoClient( table_name )
+  client.incrementPage( month_visits[:1] )
+  client.client = FailingClient( client.client, page.key() )
+  # The days, weeks, months, and years are updated before the page fails.
+  assert client.incrementPage( month_visits[1:] ) == {
+    'error': 'Could not update page in table'
+  }
+  # Retrying the visits only adds them to the page.
+  result = client.incrementPage( month_visits[1:] )
+  assert result['page'].aggregate.numberVisits == len( month_visits )
+  assert sum(
+    month.aggregate.numberVisits for month in result['months']
+  ) == len( month_visits )
+  assert sum(
+    year.aggregate.numberVisits for year in result['years']
+  ) == len( month_visits )
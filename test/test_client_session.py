@@ -0,0 +1,43 @@
+import datetime
+import pytest
+from dynamo.data import DynamoClient
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_getVisitorSessions( table_name, visitor, year_session, session ):
+  client = DynamoClient( table_name )
+  client.addSession( year_session )
+  client.addSession( session )
+  result = client.getVisitorSessions( visitor )
+  assert [ entity.sessionStart for entity in result['sessions'] ] == [
+    year_session.sessionStart, session.sessionStart
+  ]
+  result = client.getVisitorSessions(
+    visitor, since = datetime.datetime( 2020, 6, 1 )
+  )
+  assert [ entity.sessionStart for entity in result['sessions'] ] == [
+    session.sessionStart
+  ]
+  result = client.getVisitorSessions( visitor, limit = 1, descending = True )
+  assert [ entity.sessionStart for entity in result['sessions'] ] == [
+    session.sessionStart
+  ]
+  result = client.getVisitorSessions(
+    visitor, until = datetime.datetime( 2020, 6, 1 )
+  )
+  assert [ entity.sessionStart for entity in result['sessions'] ] == [
+    year_session.sessionStart
+  ]
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_parameter_getVisitorSessions( table_name, visitor ):
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).getVisitorSessions( {} )
+  assert str( e.value ) == 'Must pass a Visitor object'
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).getVisitorSessions( visitor, limit = 0 )
+  assert str( e.value ) == 'Must request at least one item'
+
+@pytest.mark.usefixtures( 'dynamo_client' )
+def test_table_getVisitorSessions( table_name, visitor ):
+  result = DynamoClient( table_name ).getVisitorSessions( visitor )
+  assert result == { 'error': 'Could not get sessions from table' }
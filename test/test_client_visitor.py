@@ -1,5 +1,8 @@
 import pytest
+from botocore.exceptions import ClientError
+from dynamo.entities import Visitor
 from dynamo.data import DynamoClient
+from dynamo.data._visitor import _cancellationReasons
 from ._location import location
 
 class Test_addVisitor():
@@ -162,6 +165,23 @@ class Test_addNewVisitor():
     )
     assert 'error' in result.keys()
     assert result['error'] == f'Visitor already in table { visitor }'
+    # None of the browsers and visits are added when the visitor is already
+    # in the table.
+    result = client.getVisitorDetails( visitor )
+    assert result['visits'] == [] and result['browsers'] == []
+
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_duplicate_browser_addNewVisitor(
+    self, table_name, visitor, browsers, visits
+  ):
+    client = DynamoClient( table_name )
+    # Browsers with the same key are only written once.
+    result = client.addNewVisitor(
+      visitor, location(), browsers + browsers[:1], visits
+    )
+    assert result['visitor'] == visitor
+    assert len( client.getVisitorDetails( visitor )['browsers'] ) == \
+      len( browsers )
 
   @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
   def test_duplicate_location_addNewVisitor(
@@ -189,6 +209,43 @@ class Test_addNewVisitor():
     assert result['error'] == 'Visitor\'s session is already in table ' + \
       f'{ session }'
 
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_atomic_addNewVisitor(
+    self, table_name, visitor, browsers, visits, session
+  ):
+    client = DynamoClient( table_name )
+    client.addSession( session )
+    client.addNewVisitor( visitor, location(), browsers, visits )
+    # Neither the visitor nor the location are added when the session is
+    # already in the table.
+    result = client.getVisitorDetails( visitor )
+    assert 'visitor' not in result.keys()
+    assert 'location' not in result.keys()
+
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_parameter_addNewVisitor( self, table_name, visitor, visits ):
+    with pytest.raises( ValueError ) as e:
+      DynamoClient( table_name ).addNewVisitor(
+        visitor, location(), [ {} ], visits
+      )
+    assert str( e.value ) == 'Must pass Browser objects'
+
+def test_cancellationReasons():
+  error = ClientError( {
+    'Error': {
+      'Code': 'TransactionCanceledException',
+      'Message': 'Transaction cancelled, please refer cancellation ' + \
+        'reasons for specific reasons [None, ConditionalCheckFailed, None]'
+    }
+  }, 'TransactWriteItems' )
+  assert _cancellationReasons( error ) == [
+    'None', 'ConditionalCheckFailed', 'None'
+  ]
+  error.response['CancellationReasons'] = [
+    { 'Code': 'ConditionalCheckFailed' }, { 'Code': 'None' }
+  ]
+  assert _cancellationReasons( error ) == [ 'ConditionalCheckFailed', 'None' ]
+
 class Test_getVisitorDetails():
   @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
   def test_getVisitorDetails(
@@ -236,6 +293,70 @@ class Test_getVisitorDetails():
     assert 'error' in result.keys()
     assert result['error'] == 'Could not get visitor from table'
 
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_profile_getVisitorDetails(
+    self, table_name, visitor, browsers, visits
+  ):
+    client = DynamoClient( table_name )
+    client.addNewVisitor( visitor, location(), browsers, visits )
+    full = client.getVisitorDetails( visitor )
+    result = client.getVisitorDetails( visitor, 'visits-light' )
+    assert dict( result['visitor'] ) == dict( full['visitor'] )
+    assert dict( result['location'] ) == dict( full['location'] )
+    assert len( result['browsers'] ) == len( full['browsers'] )
+    assert len( result['sessions'] ) == len( full['sessions'] )
+    assert [ dict( visit ) for visit in result['visits'] ] == [
+      { **dict( visit ), 'scrollEvents': {} } for visit in full['visits']
+    ]
+
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_iterVisitorItems( self, table_name, visitor, browsers, visits ):
+    client = DynamoClient( table_name )
+    client.addNewVisitor( visitor, location(), browsers, visits )
+    result = client.getVisitorDetails( visitor )
+    entities = list( client.iterVisitorItems( visitor, prefetch = True ) )
+    assert len( entities ) == len( result['visits'] ) + \
+      len( result['browsers'] ) + len( result['sessions'] ) + 2
+    assert dict( entities[0] ) == dict( result['location'] )
+
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_parameter_iterVisitorItems( self, table_name ):
+    with pytest.raises( ValueError ) as e:
+      DynamoClient( table_name ).iterVisitorItems( {} )
+    assert str( e.value ) == 'Must pass a Visitor object'
+
+class Test_getVisitorsDetails():
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_getVisitorsDetails(
+    self, table_name, visitor, browsers, visits
+  ):
+    client = DynamoClient( table_name )
+    client.addNewVisitor( visitor, location(), browsers, visits )
+    result = client.getVisitorsDetails( [
+      visitor, Visitor( '0.0.0.0' ), visitor
+    ] )
+    assert list( result.keys() ) == [ visitor.id, '0.0.0.0' ]
+    details = client.getVisitorDetails( visitor )
+    assert dict( result[visitor.id]['visitor'] ) == dict( details['visitor'] )
+    assert dict( result[visitor.id]['location'] ) == dict( location() )
+    assert [ dict( session ) for session in result[visitor.id]['sessions'] ] \
+      == [ dict( session ) for session in details['sessions'] ]
+    assert result['0.0.0.0'] == { 'error': 'Visitor not in table' }
+
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_parameter_getVisitorsDetails( self, table_name, visitor ):
+    with pytest.raises( ValueError ) as e:
+      DynamoClient( table_name ).getVisitorsDetails( visitor )
+    assert str( e.value ) == 'Must pass a list'
+    with pytest.raises( ValueError ) as e:
+      DynamoClient( table_name ).getVisitorsDetails( [ {} ] )
+    assert str( e.value ) == 'Must pass Visitor objects'
+
+  @pytest.mark.usefixtures( 'dynamo_client' )
+  def test_table_getVisitorsDetails( self, table_name, visitor ):
+    result = DynamoClient( table_name ).getVisitorsDetails( [ visitor ] )
+    assert result == { 'error': 'Could not get visitors from table' }
+
 class Test_listVisitors():
   @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
   def test_listVisitors( self, table_name, visitor ):
@@ -250,3 +371,19 @@ class Test_listVisitors():
     result = DynamoClient( table_name ).listVisitors()
     assert 'error' in result.keys()
     assert result['error'] == 'Could not get visitors from table'
+
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_iterVisitors( self, table_name, visitor ):
+    client = DynamoClient( table_name )
+    client.addVisitor( visitor )
+    result = client.iterVisitors( prefetch = True )
+    assert not isinstance( result, list )
+    assert [ dict( entity ) for entity in result ] == [ dict( visitor ) ]
+
+  @pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+  def test_index_listVisitors( self, table_name, visitor, browsers, visits ):
+    client = DynamoClient( table_name, typeIndex = 'GSI3' )
+    client.addNewVisitor( visitor, location(), browsers, visits )
+    assert [ dict( entity ) for entity in client.listVisitors() ] == [
+      dict( visitor )
+    ]
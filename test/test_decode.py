@@ -0,0 +1,70 @@
+import pytest
+from dynamo.entities import DECODERS, decodeItem, decodeLightVisit, toItemException # pylint: disable=wrong-import-position
+from dynamo.entities import itemToVisit, itemToLightVisit, itemToVisitor # pylint: disable=wrong-import-position
+from dynamo.entities import itemToSession, itemToLocation, itemToBrowser # pylint: disable=wrong-import-position
+from dynamo.entities import itemToPage, itemToDay, itemToWeek, itemToMonth, itemToYear # pylint: disable=wrong-import-position
+from dynamo.data.rollup import rollupVisits # pylint: disable=wrong-import-position
+from ._location import location
+
+def test_visit( visits ):
+  for visit in visits:
+    item = visit.toItem()
+    assert dict( DECODERS['visit']( item ) ) == dict( itemToVisit( item ) )
+    assert dict( decodeItem( item ) ) == dict( visit )
+    decoded = [ DECODERS['visit']( item ), decodeLightVisit( item ) ]
+    assert decoded[0].id is decoded[1].id is visit.id
+    assert decoded[0].slug is decoded[1].slug is visit.slug
+
+def test_lightVisit( visits ):
+  item = {
+    name: value for name, value in visits[1].toItem().items()
+    if name in ( 'PK', 'SK', 'Slug', 'TimeOnPage', 'NextSlug' )
+  }
+  assert dict( decodeLightVisit( item ) ) == dict( itemToLightVisit( item ) )
+
+def test_visitor( visitor ):
+  visitor.numberSessions = 2
+  item = visitor.toItem()
+  assert dict( decodeItem( item ) ) == dict( itemToVisitor( item ) )
+
+def test_session( session ):
+  item = session.toItem()
+  assert dict( decodeItem( item ) ) == dict( itemToSession( item ) )
+
+def test_location():
+  item = location().toItem()
+  assert dict( decodeItem( item ) ) == dict( itemToLocation( item ) )
+
+def test_browser( browsers ):
+  for browser in browsers:
+    item = browser.toItem()
+    assert dict( decodeItem( item ) ) == dict( itemToBrowser( item ) )
+
+@pytest.mark.parametrize( 'parser', [
+  itemToPage, itemToDay, itemToWeek, itemToMonth, itemToYear
+] )
+def test_rollups( year_visits, parser ):
+  rollups = rollupVisits( year_visits )
+  for rollup in rollups['days'] + rollups['weeks'] + rollups['months'] \
+    + rollups['years'] + [ rollups['page'] ]:
+    item = rollup.toItem()
+    if item['Type']['S'] != parser.__name__[6:].lower():
+      continue
+    decoded = decodeItem( item )
+    parsed = parser( item )
+    assert isinstance( decoded, type( parsed ) )
+    assert dict( decoded ) == dict( parsed )
+    assert decoded.aggregate.numberVisits == parsed.aggregate.numberVisits
+
+def test_rollup_without_aggregate( page ):
+  item = page.toItem()
+  assert dict( decodeItem( item ) ) == dict( itemToPage( item ) )
+
+def test_exception( visits ):
+  item = visits[0].toItem()
+  del item['Title']
+  with pytest.raises( toItemException ) as e:
+    decodeItem( item )
+  assert str( e.value ) == 'Could not parse visit'
+  with pytest.raises( toItemException ):
+    decodeItem( { 'Type': { 'S': 'unknown' } } )
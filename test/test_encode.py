@@ -0,0 +1,28 @@
+import numpy as np
+from dynamo.entities import encodeItem, encodeItems, objectToItemAtr # pylint: disable=wrong-import-position
+from ._location import location
+
+def test_encodeItem( visitor, visits, session, browsers, page ):
+  for entity in [ visitor, *visits, session, location(), *browsers, page ]:
+    assert encodeItem( entity ) == entity.toItem()
+
+def test_encodeItems( visitor, visits, session, browsers, page ):
+  entities = [ visitor, *visits, session, location(), *browsers, page ]
+  assert list( encodeItems( entities ) ) == [
+    entity.toItem() for entity in entities
+  ]
+
+def test_encodeItems_empty():
+  assert list( encodeItems( [] ) ) == []
+
+def test_objectToItemAtr():
+  assert objectToItemAtr( 'a' ) == { 'S': 'a' }
+  assert objectToItemAtr( '' ) == { 'NULL': True }
+  assert objectToItemAtr( None ) == { 'NULL': True }
+  assert objectToItemAtr( 1 ) == { 'N': '1' }
+  assert objectToItemAtr( True ) == { 'N': 'True' }
+  assert objectToItemAtr( np.float64( 1.5 ) ) == { 'N': '1.5' }
+  assert objectToItemAtr( [ 'a', 'b' ] ) == { 'SS': [ 'a', 'b' ] }
+  assert objectToItemAtr( { 'a': { 'x': 1 } } ) == {
+    'M': { 'a': { 'M': { 'x': { 'N': '1' } } } }
+  }
@@ -1,6 +1,6 @@
 import datetime
 import pytest
-from dynamo.entities import Location, requestToLocation, itemToLocation # pylint: disable=wrong-import-position
+from dynamo.entities import Location, requestToLocation, itemToLocation, formatDate # pylint: disable=wrong-import-position
 
 def test_init():
   currentTime = datetime.datetime.now()
@@ -81,6 +81,8 @@ def test_toItem():
   assert location.toItem() == {
     'PK': { 'S': 'VISITOR#171a0329-f8b2-499c-867d-1942384ddd5f' },
     'SK': { 'S': '#LOCATION' },
+    'GSI3PK': { 'S': 'TYPE#location' },
+    'GSI3SK': { 'S': formatDate( currentTime ) },
     'Type': { 'S': 'location' },
     'IP': { 'S': '0.0.0.0' },
     'Country': { 'S': 'US' },
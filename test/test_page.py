@@ -64,6 +64,8 @@ def test_toItem():
     'SK': { 'S': '#PAGE' },
     'GSI1PK': { 'S': 'PAGE#/' },
     'GSI1SK': { 'S': '#PAGE' },
+    'GSI3PK': { 'S': 'TYPE#page' },
+    'GSI3SK': { 'S': '/' },
     'Type': { 'S': 'page' },
     'Title': { 'S': 'Tyler Norlund' },
     'Slug': { 'S': '/' },
@@ -72,3 +72,40 @@
 #   }
 #   client = DynamoClient( table_name )
 #   assert processPages( client, this_event ) == 'No pages to process'
+
+import pytest
+from dynamo.data import DynamoClient
+from dynamo.processing import processPages
+
+def _event( visits, eventName = 'INSERT' ):
+  return { 'Records': [
+    { 'eventName': eventName, 'dynamodb': { 'NewImage': visit.toItem() } }
+    for visit in visits
+  ] }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_incremental_processPages( table_name, month_visits, day_visits ):
+  client = DynamoClient( table_name )
+  assert processPages( client, _event( month_visits ) ) == \
+    'Successfully added 1 pages and updated 0 from 4 records.'
+  assert processPages( client, _event( day_visits ) ) == \
+    'Successfully added 0 pages and updated 1 from 3 records.'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_modify_processPages( table_name, month_visits ):
+  client = DynamoClient( table_name )
+  assert processPages( client, _event( month_visits, 'MODIFY' ) ) == \
+    'No pages to process'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_retry_processPages( table_name, month_visits ):
+  client = DynamoClient( table_name )
+  processPages( client, _event( month_visits ) )
+  # A retried batch does not add its visits again.
+  assert processPages( client, _event( month_visits ) ) == \
+    'Successfully added 1 pages and updated 0 from 4 records.'
+  result = client.incrementPage( month_visits )
+  assert result['page'].aggregate.numberVisits == len( month_visits )
+  assert sum(
+    day.aggregate.numberVisits for day in result['days']
+  ) == len( month_visits )
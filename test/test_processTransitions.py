@@ -0,0 +1,88 @@
+import pytest
+from botocore.exceptions import ClientError
+from dynamo.data import DynamoClient, util
+from dynamo.data.util import MAX_MERGES
+from dynamo.processing import processTransitions
+
+def _event( visits, eventName = 'INSERT' ):
+  return { 'Records': [
+    { 'eventName': eventName, 'dynamodb': { 'NewImage': visit.toItem() } }
+    for visit in visits
+  ] }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_processTransitions( table_name, day_visits ):
+  client = DynamoClient( table_name )
+  assert processTransitions( client, _event( day_visits[:1] ) ) == \
+    'Successfully updated 1 days from 1 records.'
+  assert processTransitions( client, _event( day_visits[1:] ) ) == \
+    'Successfully updated 1 days from 2 records.'
+  transitions = client.getTransitions( '2020-01-03' )['transitions']
+  assert transitions.nextPages( '/' ) == { '/': 0.5, 'www': 0.5 }
+  assert int( transitions.counts.sum() ) == 4
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_retry_processTransitions( table_name, day_visits ):
+  client = DynamoClient( table_name )
+  processTransitions( client, _event( day_visits ) )
+  counts = client.getTransitions( '2020-01-03' )['transitions'].counts
+  # A retried batch does not add its transitions again.
+  assert processTransitions( client, _event( day_visits ) ) == \
+    'Successfully updated 1 days from 3 records.'
+  transitions = client.getTransitions( '2020-01-03' )['transitions']
+  assert ( transitions.counts == counts ).all()
+  assert int( transitions.counts.sum() ) > 0
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_modify_processTransitions( table_name, day_visits ):
+  client = DynamoClient( table_name )
+  assert processTransitions( client, _event( day_visits, 'MODIFY' ) ) == \
+    'No transitions to process'
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_none_getTransitions( table_name ):
+  assert DynamoClient( table_name ).getTransitions( '2020-01-03' ) == {
+    'error': 'Transitions not in table'
+  }
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_addTransitions( table_name, day_visits ):
+  client = DynamoClient( table_name )
+  transitions = client.incrementTransitions( day_visits )['transitions'][0]
+  assert client.addTransitions( transitions ) == {
+    'transitions': transitions
+  }
+
+class ConflictedClient:
+  '''A DynamoDB client whose transitions change before every write.'''
+  def __init__( self, client ):
+    self.client = client
+
+  def put_item( self, **kwargs ):
+    raise ClientError(
+      { 'Error': { 'Code': 'ConditionalCheckFailedException' } }, 'PutItem'
+    )
+
+  def __getattr__( self, name ):
+    return getattr( self.client, name )
+
+@pytest.mark.usefixtures( 'dynamo_client', 'table_init' )
+def test_conflict_incrementTransitions( monkeypatch, table_name, day_visits ):
+  sleeps = []
+  monkeypatch.setattr( util.time, 'sleep', sleeps.append )
+  client = DynamoClient( table_name )
+  client.client = ConflictedClient( client.client )
+  assert client.incrementTransitions( day_visits ) == {
+    'error': 'Could not merge transitions in table'
+  }
+  assert len( sleeps ) == MAX_MERGES - 1
+
+def test_parameter_addTransitions( table_name ):
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).addTransitions( {} )
+  assert str( e.value ) == 'Must pass a Transitions object'
+
+def test_parameter_incrementTransitions( table_name ):
+  with pytest.raises( ValueError ) as e:
+    DynamoClient( table_name ).incrementTransitions( [ 1 ] )
+  assert str( e.value ) == 'Must pass Visit objects'
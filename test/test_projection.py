@@ -0,0 +1,31 @@
+import pytest
+from dynamo.entities import DECODERS, decodeLightVisit
+from dynamo.data.projection import projectionArguments, PROFILES
+
+def test_full_projectionArguments():
+  assert projectionArguments( 'full' ) == (
+    { 'ExpressionAttributeNames': {} }, DECODERS['visit']
+  )
+
+def test_projectionArguments():
+  arguments, decoder = projectionArguments( 'rollup-inputs' )
+  assert decoder == decodeLightVisit
+  assert arguments['ProjectionExpression'] == ', '.join(
+    f'#p{ index }' for index in range( len( PROFILES['rollup-inputs'] ) )
+  )
+  assert set( arguments['ExpressionAttributeNames'].values() ) == \
+    set( PROFILES['rollup-inputs'] )
+  assert 'ScrollEvents' not in PROFILES['visits-light']
+
+def test_names_projectionArguments():
+  arguments, _ = projectionArguments( 'rollup-inputs', { '#pk': 'PK' } )
+  assert arguments['ProjectionExpression'].startswith( '#pk, #p1, ' )
+  assert list( arguments['ExpressionAttributeNames'].values() ).count(
+    'PK'
+  ) == 1
+
+def test_projectionArguments_exception():
+  with pytest.raises( ValueError ) as e:
+    projectionArguments( 'light' )
+  assert str( e.value ) == 'Must pass a projection profile of full, ' + \
+    'visits-light, rollup-inputs'
@@ -0,0 +1,150 @@
+import datetime
+import pytest
+import numpy as np
+from dynamo.data.rollup import visitsToArrays, bucketCodes, bucketRange, rollupVisits # pylint: disable=wrong-import-position
+from dynamo.data.util import pagesToDict # pylint: disable=wrong-import-position
+from dynamo.entities import Visit, itemToPage # pylint: disable=wrong-import-position
+
+def test_bucketCodes_week():
+  dates = [
+    datetime.datetime( 2020, 1, 1 ) + datetime.timedelta( days = day )
+    for day in range( 800 )
+  ]
+  codes, labels = bucketCodes(
+    np.array( dates, dtype = 'datetime64[ms]' ), 'week'
+  )
+  assert [ labels[code] for code in codes ] == [
+    date.strftime( '%Y-%U' ) for date in dates
+  ]
+
+def test_bucketCodes_day_month_year():
+  dates = [
+    datetime.datetime( 2020, 12, 30, 23, 59, 59, 999000 ),
+    datetime.datetime( 2021, 1, 1 ),
+    datetime.datetime( 2021, 2, 1, 12 )
+  ]
+  array = np.array( dates, dtype = 'datetime64[ms]' )
+  for granularity, dateFormat in (
+    ( 'day', '%Y-%m-%d' ), ( 'month', '%Y-%m' ), ( 'year', '%Y' )
+  ):
+    codes, labels = bucketCodes( array, granularity )
+    assert [ labels[code] for code in codes ] == [
+      date.strftime( dateFormat ) for date in dates
+    ]
+
+def test_bucketCodes_exception():
+  with pytest.raises( ValueError ) as e:
+    bucketCodes( np.array( [], dtype = 'datetime64[ms]' ), 'hour' )
+  assert str( e.value ) == 'Unknown granularity hour'
+
+def test_visitsToArrays( year_visits ):
+  arrays = visitsToArrays( year_visits )
+  assert arrays['ids'] == [
+    year_visits[0].id, '171a0329-f8b2-499c-867d-1942384ddd5a'
+  ]
+  assert arrays['visitor'].tolist() == [ 0, 1, 1 ]
+  assert [
+    None if code == -1 else arrays['slugs'][code]
+    for code in arrays['prev']
+  ] == [ None, '/', None ]
+  assert [
+    None if code == -1 else arrays['slugs'][code]
+    for code in arrays['next']
+  ] == [ '/blog', None, '/resume' ]
+  assert arrays['time'][0] == 60.0
+  assert np.isnan( arrays['time'][1] )
+
+def test_rollupVisits( year_visits, month_visits, week_visits, day_visits ):
+  visits = year_visits + month_visits + week_visits + day_visits
+  result = rollupVisits( visits )
+  for granularity, dateFormat in (
+    ( 'days', '%Y-%m-%d' ), ( 'weeks', '%Y-%U' ), ( 'months', '%Y-%m' ),
+    ( 'years', '%Y' )
+  ):
+    assert len( result[granularity] ) == len(
+      { visit.date.strftime( dateFormat ) for visit in visits }
+    )
+  for day in result['days']:
+    day_visits = [
+      visit for visit in visits
+      if visit.date.strftime( '%Y-%m-%d' ) == \
+        f'{ day.year }-{ str( day.month ).zfill( 2 ) }-' + \
+        f'{ str( day.day ).zfill( 2 ) }'
+    ]
+    times = [
+      visit.timeOnPage for visit in day_visits
+      if isinstance( visit.timeOnPage, float )
+    ]
+    assert day.numberVisitors == len( { visit.id for visit in day_visits } )
+    assert day.averageTime == pytest.approx( np.mean( times ) )
+    assert day.percentChurn == pytest.approx(
+      [ visit.nextSlug for visit in day_visits ].count( None ) / \
+        len( day_visits )
+    )
+    assert day.fromPage == pytest.approx(
+      pagesToDict( [ visit.prevSlug for visit in day_visits ] )
+    )
+    assert day.toPage == pytest.approx(
+      pagesToDict( [ visit.nextSlug for visit in day_visits ] )
+    )
+  assert result['page'].numberVisitors == 3
+  assert result['page'].toPage == pytest.approx(
+    pagesToDict( [ visit.nextSlug for visit in visits ] )
+  )
+
+def test_rollupVisits_granularities( day_visits ):
+  result = rollupVisits( day_visits, ( 'day', ) )
+  assert list( result.keys() ) == [ 'days' ]
+
+def test_rollupVisits_no_time( day_visits ):
+  result = rollupVisits( day_visits[1:2], ( 'page', ) )
+  assert result['page'].averageTime is None
+
+def test_rollupVisits_exception():
+  with pytest.raises( ValueError ) as e:
+    rollupVisits( [] )
+  assert str( e.value ) == 'Must pass at least one visit'
+
+def test_bucketRange():
+  dates = [
+    datetime.datetime( 2020, 1, 1 ) + datetime.timedelta( hours = hour )
+    for hour in range( 0, 24 * 800, 7 )
+  ]
+  array = np.array( dates, dtype = 'datetime64[ms]' )
+  for granularity in ( 'day', 'week', 'month', 'year' ):
+    codes, labels = bucketCodes( array, granularity )
+    for date, code in zip( dates, codes ):
+      start, end = bucketRange( granularity, labels[code] )
+      assert start <= date <= end
+    for label in labels:
+      start, end = bucketRange( granularity, label )
+      assert bucketCodes(
+        np.array( [ start, end ], dtype = 'datetime64[ms]' ), granularity
+      )[1] == [ label ]
+
+def test_bucketRange_exception():
+  with pytest.raises( ValueError ) as e:
+    bucketRange( 'page', '2020' )
+  assert str( e.value ) == 'Unknown granularity page'
+
+def test_rollupVisits_capacity( month_visits ):
+  result = rollupVisits( month_visits, ( 'page', ), capacity = 1 )
+  toPage = result['page'].toPage
+  assert len( toPage ) == 2
+  assert 'other' in toPage.keys()
+  assert sum( toPage.values() ) == pytest.approx( 1.0 )
+
+def test_rollupVisits_exact_visitors( day_visits ):
+  visits = [
+    Visit(
+      f'visitor-{ index }', visit.date, visit.user, visit.title, visit.slug,
+      visit.sessionStart, {}, visit.timeOnPage
+    )
+    for index in range( 5000 ) for visit in day_visits[:1]
+  ]
+  result = rollupVisits( visits + visits[:10], ( 'page', 'day' ) )
+  # Every visit is known, so the visitors are counted instead of estimated.
+  assert result['page'].aggregate.numberVisitors() != 5000
+  assert result['page'].numberVisitors == 5000
+  assert result['days'][0].numberVisitors == 5000
+  assert itemToPage( result['page'].toItem() ).numberVisitors == 5000
@@ -0,0 +1,129 @@
+import base64
+import datetime
+import pytest
+from dynamo.entities import Visit, itemToVisit, DECODERS, formatDate, objectToItemAtr # pylint: disable=wrong-import-position
+from dynamo.entities import ScrollTrack, toScrollTrack # pylint: disable=wrong-import-position
+from dynamo.entities import scrollEventsToBytes, bytesToScrollEvents # pylint: disable=wrong-import-position
+from dynamo.entities import scrollEventsToItemAtr, itemAtrToScrollEvents # pylint: disable=wrong-import-position
+
+start = datetime.datetime( 2021, 2, 10, 11, 27, 43, 262000 )
+
+def scrollEvents( number, x = 0 ):
+  '''Returns the scroll events of a visit that scrolls down the page.'''
+  return {
+    formatDate( start + datetime.timedelta( milliseconds = 17 * index ) ): {
+      'x': x, 'y': 25 * index
+    }
+    for index in range( number )
+  }
+
+def test_ScrollTrack():
+  events = scrollEvents( 3 )
+  track = toScrollTrack( events )
+  assert isinstance( track, ScrollTrack )
+  assert track.times.dtype == 'int64' and track.y.dtype == 'int32'
+  assert len( track ) == 3
+  assert list( track ) == list( events )
+  assert track['2021-02-10T11:27:43.279Z'] == { 'x': 0, 'y': 25 }
+  assert '2021-02-10T11:27:43.262Z' in track
+  assert '2021-02-10T11:27:43.2Z' not in track
+  assert '2021-02-10T11:27:44.262Z' not in track
+  assert track.get( 1 ) is None
+  assert dict( track.items() ) == events
+  assert track.values() == list( events.values() )
+  assert track == events and events == track
+  assert track == toScrollTrack( scrollEvents( 3 ) )
+  assert track != scrollEvents( 4 )
+  assert ScrollTrack() == {}
+
+def test_ScrollTrack_exception():
+  with pytest.raises( ValueError ) as e:
+    ScrollTrack( [ 0, 1 ], [ 0 ], [ 0 ] )
+  assert str( e.value ) == 'Scroll events must have a time and both positions'
+
+def test_Visit_scrollEvents():
+  events = scrollEvents( 10 )
+  visit = Visit( 'visitor', start, 0, 'Title', '/', start, events )
+  assert isinstance( visit.scrollEvents, ScrollTrack )
+  assert visit.scrollEvents == events
+  assert isinstance( itemToVisit( visit.toItem() ).scrollEvents, ScrollTrack )
+  assert isinstance(
+    DECODERS['visit']( visit.toItem() ).scrollEvents, ScrollTrack
+  )
+  events = { '2021-02-10T11:27:43.2Z': { 'x': 0, 'y': 0 } }
+  visit = Visit( 'visitor', start, 0, 'Title', '/', start, events )
+  assert visit.scrollEvents is events
+
+def test_scrollEventsToBytes():
+  for number in ( 0, 1, 10, 100, 1000 ):
+    events = scrollEvents( number, -3 )
+    data = scrollEventsToBytes( events, start )
+    assert data[0] == 1
+    assert bytesToScrollEvents( data, start ) == events
+
+def test_scrollEventsToBytes_compressed():
+  data = scrollEventsToBytes( scrollEvents( 1000 ), start )
+  assert data[1] == 1
+  assert len( data ) < len( str( objectToItemAtr( scrollEvents( 1000 ) ) ) )
+
+def test_scrollEventsToBytes_before():
+  events = {
+    '2021-02-10T11:27:43.000Z': { 'x': 0, 'y': 10 },
+    '2021-02-10T11:27:43.262Z': { 'x': 0, 'y': 0 },
+    '2021-02-10T11:27:42.000Z': { 'x': 2 ** 31 - 1, 'y': -( 2 ** 31 ) }
+  }
+  assert bytesToScrollEvents(
+    scrollEventsToBytes( events, start ), start
+  ) == events
+
+def test_scrollEventsToBytes_none():
+  for events in (
+    { '2021-02-10T11:27:43.2Z': { 'x': 0, 'y': 0 } },
+    { '2021-02-30T11:27:43.262Z': { 'x': 0, 'y': 0 } },
+    { '2021-02-10T11:27:43.262Z': { 'x': 0.5, 'y': 0 } },
+    { '2021-02-10T11:27:43.262Z': { 'x': 0, 'y': 2 ** 31 } },
+    { '2021-02-10T11:27:43.262Z': { 'x': 0, 'y': 2 ** 64 } },
+    { '2021-02-10T11:27:43.262Z': { 'x': 0 } },
+    { '2021-02-10T11:27:43.262Z': { 'x': 0, 'z': 0 } },
+    { '2021-02-10T11:27:43.262Z': { 'x': 0, 'y': 0, 'z': 0 } },
+    { '2021-02-10T11:27:43.262Z': 0 },
+    { 1: { 'x': 0, 'y': 0 } }
+  ):
+    assert scrollEventsToBytes( events, start ) is None
+
+def test_bytesToScrollEvents_base64():
+  events = scrollEvents( 10 )
+  data = base64.b64encode( scrollEventsToBytes( events, start ) ).decode()
+  assert bytesToScrollEvents( data, start ) == events
+
+def test_bytesToScrollEvents_exception():
+  data = scrollEventsToBytes( scrollEvents( 10 ), start )
+  with pytest.raises( ValueError ) as e:
+    bytesToScrollEvents( bytes( [ 2 ] ) + data[1:], start )
+  assert str( e.value ) == 'Unknown scroll events version'
+  with pytest.raises( ValueError ) as e:
+    bytesToScrollEvents( data + bytes( [ 0 ] ), start )
+  assert str( e.value ) == 'Scroll events do not match their number'
+  with pytest.raises( ValueError ) as e:
+    bytesToScrollEvents( data + bytes( [ 0x80 ] ), start )
+  assert str( e.value ) == 'Scroll events end in the middle of a number'
+
+def test_scrollEventsToItemAtr():
+  events = scrollEvents( 10 )
+  assert scrollEventsToItemAtr( events, start ) == {
+    'B': scrollEventsToBytes( events, start )
+  }
+  events = { '2021-02-10T11:27:43.2Z': { 'x': 0, 'y': 0 } }
+  assert scrollEventsToItemAtr( events, start ) == objectToItemAtr( events )
+  assert itemAtrToScrollEvents(
+    scrollEventsToItemAtr( events, start ), start
+  ) == events
+
+def test_itemToVisit_legacy():
+  events = scrollEvents( 10 )
+  visit = Visit( 'visitor', start, 0, 'Title', '/', start, events )
+  item = { **visit.toItem(), 'ScrollEvents': objectToItemAtr( events ) }
+  assert itemToVisit( item ).scrollEvents == events
+  assert DECODERS['visit']( item ).scrollEvents == events
+  assert itemToVisit( visit.toItem() ).scrollEvents == events
+  assert DECODERS['visit']( visit.toItem() ).scrollEvents == events
@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+from dynamo.entities import VisitorSketch, bytesToSketch, hashIds, groupSketches # pylint: disable=wrong-import-position
+from dynamo.entities import TopPages, bytesToTopPages # pylint: disable=wrong-import-position
+
+def test_count():
+  for number in ( 0, 1, 10, 1000, 50000 ):
+    sketch = VisitorSketch(
+      [ f'visitor-{ index }' for index in range( number ) ]
+    )
+    assert sketch.count() == pytest.approx( number, rel = 0.05, abs = 1 )
+
+def test_add():
+  sketch = VisitorSketch()
+  sketch.add( 'a' ).add( 'b' ).add( 'a' )
+  assert sketch.count() == 2
+  assert sketch == VisitorSketch( [ 'b', 'a' ] )
+
+def test_merge():
+  first = VisitorSketch( [ f'visitor-{ index }' for index in range( 3000 ) ] )
+  second = VisitorSketch(
+    [ f'visitor-{ index }' for index in range( 2000, 6000 ) ]
+  )
+  assert first.copy().merge( second ) == VisitorSketch(
+    [ f'visitor-{ index }' for index in range( 6000 ) ]
+  )
+  assert first.count() == pytest.approx( 3000, rel = 0.05 )
+
+def test_merge_exception():
+  with pytest.raises( ValueError ) as e:
+    VisitorSketch().merge( VisitorSketch( precision = 10 ) )
+  assert str( e.value ) == 'Sketches must have the same precision'
+
+def test_init_exception():
+  with pytest.raises( ValueError ) as e:
+    VisitorSketch( precision = 20 )
+  assert str( e.value ) == 'Precision must be between 4 and 16'
+
+def test_bytesToSketch():
+  sketch = VisitorSketch( [ 'a', 'b', 'c' ], precision = 10 )
+  data = sketch.toBytes()
+  # Mostly empty registers compress well.
+  assert len( data ) < 100
+  assert bytesToSketch( data ) == sketch
+
+def test_bytesToSketch_exception():
+  with pytest.raises( ValueError ) as e:
+    bytesToSketch(
+      bytes( [ 12 ] ) + VisitorSketch( precision = 10 ).toBytes()[1:]
+    )
+  assert str( e.value ) == 'Sketch registers do not match its precision'
+
+def test_groupSketches():
+  ids = [ 'a', 'b', 'c', 'a' ]
+  sketches = groupSketches( hashIds( ids ), np.array( [ 0, 1, 1, 1 ] ), 2 )
+  assert sketches[0] == VisitorSketch( [ 'a' ] )
+  assert sketches[1] == VisitorSketch( [ 'b', 'c', 'a' ] )
+
+def test_TopPages():
+  pages = TopPages( { '/': 5, '/blog': 3, '/resume': 1 }, capacity = 2 )
+  assert pages == { '/': 5, '/blog': 3 }
+  assert pages.total == 9
+  assert pages.smallest() == 3
+  assert TopPages().smallest() == 0
+  assert pages.ratios() == pytest.approx( {
+    '/': 5 / 9, '/blog': 3 / 9, 'other': 1 / 9
+  } )
+
+def test_add_TopPages():
+  pages = TopPages( capacity = 2 )
+  for page in [ '/', '/', '/blog', '/resume' ]:
+    pages.add( page )
+  # '/resume' replaced '/blog' and took over its count as its error.
+  assert pages == { '/': 2, '/resume': 2 }
+  assert pages.errors == { '/': 0, '/resume': 1 }
+  assert pages.ratios() == pytest.approx( {
+    '/': 0.5, '/resume': 0.25, 'other': 0.25
+  } )
+
+def test_exact_TopPages():
+  pages = TopPages()
+  for page in [ '/', '/blog', '/', 'www' ]:
+    pages.add( page )
+  assert pages.ratios() == { '/': 0.5, '/blog': 0.25, 'www': 0.25 }
+
+def test_merge_TopPages():
+  first = TopPages( { '/': 4, '/blog': 2 }, capacity = 3 )
+  second = TopPages( { '/resume': 3, '/blog': 2 }, capacity = 3 )
+  merged = first.merge( second )
+  assert merged.total == 11
+  # Neither sketch was full, so the merged counts are exact.
+  assert merged == { '/': 4, '/blog': 4, '/resume': 3 }
+  assert merged.errors == { '/': 0, '/blog': 0, '/resume': 0 }
+  full = TopPages( { '/': 4, '/blog': 2, '/cicd': 1 }, capacity = 2 )
+  merged = full.merge( TopPages( { '/resume': 3 }, capacity = 2 ) )
+  # '/resume' could have had up to 2 visits in the full sketch.
+  assert merged == { '/resume': 5, '/': 4 }
+  assert merged.errors == { '/resume': 2, '/': 0 }
+
+def test_init_TopPages_exception():
+  with pytest.raises( ValueError ) as e:
+    TopPages( capacity = 0 )
+  assert str( e.value ) == 'Capacity must be positive'
+
+def test_bytesToTopPages():
+  pages = TopPages( { '/': 5, '/blog': 3, '/resume': 1 }, capacity = 2 )
+  pages.add( '/cicd' )
+  parsed = bytesToTopPages( pages.toBytes() )
+  assert parsed == pages
+  assert parsed.capacity == 2
+  parsed.add( '/cicd' )
+  assert parsed['/cicd'] == 5
@@ -0,0 +1,70 @@
+import pytest
+from dynamo.entities import Transitions, itemToTransitions # pylint: disable=wrong-import-position
+from dynamo.data.rollup import transitionMatrices # pylint: disable=wrong-import-position
+
+def test_init():
+  transitions = Transitions( '2020-01-03', [ 'www', '/' ], [ 0 ], [ 1 ], [ 2 ] )
+  assert transitions.year == 2020
+  assert transitions.month == 1
+  assert transitions.day == 3
+  assert transitions.nextPages( 'www' ) == { '/': 1.0 }
+  assert transitions.nextPages( '/blog' ) == {}
+
+def test_init_exception():
+  with pytest.raises( ValueError ) as e:
+    Transitions( '2020-01' )
+  assert str( e.value ) == 'Must give day as "<year>-<month>-<day>"'
+
+def test_key():
+  assert Transitions( '2020-01-03' ).key() == {
+    'PK': { 'S': 'TRANSITIONS' }, 'SK': { 'S': '#DAY#2020-01-03' }
+  }
+
+def test_transitionMatrices( day_visits ):
+  transitions = transitionMatrices( day_visits )
+  assert len( transitions ) == 1
+  assert transitions[0].date() == '2020-01-03'
+  assert transitions[0].nextPages( '/' ) == { '/': 0.5, 'www': 0.5 }
+  assert transitions[0].previousPages( '/' ) == pytest.approx(
+    { 'www': 2 / 3, '/': 1 / 3 }
+  )
+
+def test_days_transitionMatrices( month_visits ):
+  transitions = transitionMatrices( month_visits )
+  assert [ day.date() for day in transitions ] == [
+    '2020-01-01', '2020-01-03', '2020-01-25', '2020-01-30'
+  ]
+  assert transitions[0].slugs == [ 'www', '/' ]
+
+def test_transitionMatrices_exception():
+  with pytest.raises( ValueError ) as e:
+    transitionMatrices( [] )
+  assert str( e.value ) == 'Must pass at least one visit'
+
+def test_merge( day_visits, week_visits ):
+  merged = transitionMatrices( day_visits )[0].merge(
+    transitionMatrices( week_visits )[0]
+  )
+  expected = transitionMatrices( day_visits + week_visits[:2] )[0]
+  assert {
+    ( merged.slugs[source], merged.slugs[target] ): count
+    for source, target, count in zip(
+      merged.sources, merged.targets, merged.counts
+    )
+  } == {
+    ( expected.slugs[source], expected.slugs[target] ): count
+    for source, target, count in zip(
+      expected.sources, expected.targets, expected.counts
+    )
+  }
+
+def test_itemToTransitions( day_visits ):
+  transitions = transitionMatrices( day_visits )[0]
+  item = transitions.toItem()
+  assert item['TransitionCount'] == { 'N': '4' }
+  assert dict( itemToTransitions( item ) ) == dict( transitions )
+
+def test_itemToTransitions_exception():
+  with pytest.raises( Exception ) as e:
+    itemToTransitions( { 'SK': { 'S': '#DAY#2020-01-03' } } )
+  assert str( e.value ) == 'Could not parse transitions'
@@ -0,0 +1,179 @@
+import datetime
+import threading
+import pytest
+from botocore.exceptions import ClientError
+from dynamo.entities import Visitor # pylint: disable=wrong-import-position
+from dynamo.data import DynamoClient # pylint: disable=wrong-import-position
+from dynamo.data.util import paginate, scanSegments, queryItems, sortKeyRange # pylint: disable=wrong-import-position
+
+class PagedClient:
+  '''A DynamoDB client that returns a number of pages of one item.'''
+  def __init__( self, numberPages, error = False ):
+    self.numberPages = numberPages
+    self.error = error
+    self.requests = []
+    self.started = [ threading.Event() for _ in range( numberPages ) ]
+
+  def query( self, **request ):
+    index = request.get( 'ExclusiveStartKey', { 'index': 0 } )['index']
+    self.requests.append( request )
+    self.started[index].set()
+    if self.error and index == 1:
+      raise ClientError( { 'Error': { 'Code': 'InternalError' } }, 'Query' )
+    result = { 'Items': [ { 'index': index } ] }
+    if index + 1 < self.numberPages:
+      result['LastEvaluatedKey'] = { 'index': index + 1 }
+    return result
+
+def test_paginate():
+  client = PagedClient( 3 )
+  results = list( paginate( client, 'query', { 'TableName': 'table' } ) )
+  assert [ result['Items'] for result in results ] == [
+    [ { 'index': 0 } ], [ { 'index': 1 } ], [ { 'index': 2 } ]
+  ]
+  assert 'ExclusiveStartKey' not in client.requests[0].keys()
+  assert client.requests[2]['ExclusiveStartKey'] == { 'index': 2 }
+
+def test_lazy_paginate():
+  client = PagedClient( 3 )
+  results = paginate( client, 'query', { 'TableName': 'table' } )
+  assert len( client.requests ) == 0
+  next( results )
+  assert len( client.requests ) == 1
+
+def test_prefetch_paginate():
+  client = PagedClient( 3 )
+  results = paginate( client, 'query', { 'TableName': 'table' }, True )
+  assert next( results )['Items'] == [ { 'index': 0 } ]
+  # The next page is requested while the first one is used.
+  assert client.started[1].wait( 5 )
+  assert [ result['Items'] for result in results ] == [
+    [ { 'index': 1 } ], [ { 'index': 2 } ]
+  ]
+
+def test_pageSize_paginate():
+  client = PagedClient( 2 )
+  list( paginate( client, 'query', { 'TableName': 'table' }, pageSize = 10 ) )
+  assert [ request['Limit'] for request in client.requests ] == [ 10, 10 ]
+  with pytest.raises( ValueError ) as e:
+    next( paginate( client, 'query', { 'TableName': 'table' }, pageSize = 0 ) )
+  assert str( e.value ) == 'Must request at least one item'
+
+def test_single_prefetch_paginate():
+  threads = []
+  class SinglePageClient:
+    def query( self, **_ ):
+      threads.append( threading.current_thread() )
+      return { 'Items': [] }
+  results = list(
+    paginate( SinglePageClient(), 'query', { 'TableName': 'table' }, True )
+  )
+  assert len( results ) == 1
+  # A single page is read without starting a thread.
+  assert threads == [ threading.current_thread() ]
+
+def test_stopped_paginate():
+  client = PagedClient( 5 )
+  results = paginate( client, 'query', { 'TableName': 'table' }, True )
+  next( results )
+  results.close()
+  assert len( client.requests ) == 2
+
+def test_error_paginate():
+  client = PagedClient( 3, True )
+  results = paginate( client, 'query', { 'TableName': 'table' }, True )
+  next( results )
+  with pytest.raises( ClientError ):
+    next( results )
+
+class SegmentedClient:
+  '''A DynamoDB client that scans the segments of a list of items two items
+  at a time.'''
+  def __init__( self, items, error = False ):
+    self.items = items
+    self.error = error
+    self.requests = []
+    self._lock = threading.Lock()
+
+  def scan( self, **request ):
+    with self._lock:
+      self.requests.append( request )
+    segment = request.get( 'Segment', 0 )
+    if self.error and segment == 1:
+      raise ClientError( { 'Error': { 'Code': 'InternalError' } }, 'Scan' )
+    items = self.items[segment::request.get( 'TotalSegments', 1 )]
+    start = request.get( 'ExclusiveStartKey', { 'index': 0 } )['index']
+    result = { 'Items': items[start:start + 2] }
+    if start + 2 < len( items ):
+      result['LastEvaluatedKey'] = { 'index': start + 2 }
+    return result
+
+def test_scanSegments():
+  client = SegmentedClient( [ { 'index': index } for index in range( 25 ) ] )
+  items = [
+    item
+    for result in scanSegments( client, { 'TableName': 'table' }, 4 )
+    for item in result['Items']
+  ]
+  assert sorted( item['index'] for item in items ) == list( range( 25 ) )
+  assert { request['TotalSegments'] for request in client.requests } == { 4 }
+  assert { request['Segment'] for request in client.requests } == \
+    { 0, 1, 2, 3 }
+
+def test_single_scanSegments():
+  client = SegmentedClient( [ { 'index': index } for index in range( 5 ) ] )
+  results = list( scanSegments( client, { 'TableName': 'table' } ) )
+  assert len( results ) == 3
+  assert 'Segment' not in client.requests[0].keys()
+
+def test_stopped_scanSegments():
+  client = SegmentedClient( [ { 'index': index } for index in range( 200 ) ] )
+  results = scanSegments( client, { 'TableName': 'table' }, 4 )
+  next( results )
+  results.close()
+  # The segments stop once the consumer has stopped iterating.
+  assert len( client.requests ) < 100
+
+def test_error_scanSegments():
+  client = SegmentedClient(
+    [ { 'index': index } for index in range( 25 ) ], True
+  )
+  with pytest.raises( ClientError ):
+    list( scanSegments( client, { 'TableName': 'table' }, 4 ) )
+
+def test_parameter_scanSegments():
+  with pytest.raises( ValueError ) as e:
+    scanSegments( SegmentedClient( [] ), { 'TableName': 'table' }, 0 )
+  assert str( e.value ) == 'Must use at least one segment'
+
+def test_segments_listVisitors():
+  client = DynamoClient( 'table' )
+  client.client = SegmentedClient( [
+    Visitor( f'visitor-{ index }', index ).toItem() for index in range( 9 )
+  ] )
+  result = client.listVisitors( segments = 3 )
+  assert sorted( visitor.numberSessions for visitor in result ) == \
+    list( range( 9 ) )
+  assert client.client.requests[0]['FilterExpression'] == '#type = :type'
+  assert client.client.requests[0]['ExpressionAttributeValues'] == {
+    ':type': { 'S': 'visitor' }
+  }
+
+def test_queryItems():
+  client = PagedClient( 5 )
+  assert len( queryItems( client, { 'TableName': 'table' } ) ) == 5
+  client = PagedClient( 5 )
+  assert len( queryItems( client, { 'TableName': 'table' }, 2 ) ) == 2
+  assert len( client.requests ) == 2
+  assert client.requests[0]['Limit'] == 2
+
+def test_sortKeyRange():
+  assert sortKeyRange( 'SESSION#' ) == {
+    ':start': { 'S': 'SESSION#' }, ':end': { 'S': 'SESSION#~' }
+  }
+  assert sortKeyRange(
+    'VISIT#', datetime.datetime( 2020, 1, 1 ), datetime.datetime( 2020, 1, 2 )
+  ) == {
+    ':start': { 'S': 'VISIT#2020-01-01T00:00:00.000Z' },
+    ':end': { 'S': 'VISIT#2020-01-02T00:00:00.000Z' }
+  }
@@ -1,7 +1,8 @@
 import datetime
 import pytest
+import numpy as np
 
-from dynamo.entities import Visit, itemToVisit, objectToItemAtr # pylint: disable=wrong-import-position
+from dynamo.entities import Visit, itemToVisit, itemToLightVisit, scrollEventsToItemAtr # pylint: disable=wrong-import-position
 
 # The unique visitor ID
 visitor_id = '79cf921c-c01c-4f05-a875-86e560802930'
@@ -287,7 +288,7 @@ def test_toItem():
     'GSI2SK': { 'S': f'VISIT#{ visit_date }' },
     'Type': { 'S': 'visit' },
     'User': { 'N': '0' },
-    'ScrollEvents':  objectToItemAtr( scroll_events ),
+    'ScrollEvents':  scrollEventsToItemAtr( scroll_events, visit.date ),
     'Title': { 'S': page_title },
     'Slug': { 'S': page_slug },
     'PreviousTitle': { 'NULL': True },
@@ -322,6 +323,23 @@ def test_dict():
   assert visit['nextSlug'] is None
   assert visit['timeOnPage'] is None
 
+def test_slots():
+  visit = Visit(
+    visitor_id, visit_date, user_number, page_title, page_slug,
+    session_start, scroll_events, prevSlug = ''.join( [ '/', 'blog' ] )
+  )
+  assert not hasattr( visit, '__dict__' )
+  with pytest.raises( AttributeError ):
+    setattr( visit, 'ip', '0.0.0.0' )
+  copy = Visit(
+    ''.join( visitor_id ), visit_date, user_number, page_title,
+    np.str_( page_slug ), session_start, scroll_events,
+    prevSlug = ''.join( [ '/', 'blog' ] )
+  )
+  assert copy.id is visit.id
+  assert copy.slug is visit.slug
+  assert copy.prevSlug is visit.prevSlug
+
 def test_itemToVisit():
   visit = Visit(
     visitor_id, visit_date, user_number, page_title, page_slug,
@@ -345,3 +363,35 @@ def test_itemToVisit_exception():
   with pytest.raises( Exception ) as e:
     assert itemToVisit( {} )
   assert str( e.value ) == "Could not parse visit"
+
+def test_itemToLightVisit():
+  visit = Visit(
+    visitor_id, visit_date, user_number, page_title, page_slug,
+    session_start, scroll_events, time_on_page, prev_title, prev_slug
+  )
+  newVisit = itemToLightVisit( visit.toItem() )
+  assert dict( newVisit ) == { **dict( visit ), 'scrollEvents': {} }
+
+def test_projected_itemToLightVisit():
+  visit = Visit(
+    visitor_id, visit_date, user_number, page_title, page_slug,
+    session_start, scroll_events, time_on_page, prev_title, prev_slug
+  )
+  item = visit.toItem()
+  newVisit = itemToLightVisit( {
+    name: item[name]
+    for name in ( 'PK', 'SK', 'Slug', 'PreviousSlug', 'TimeOnPage' )
+  } )
+  assert newVisit.id == visit.id
+  assert newVisit.date == visit.date
+  assert newVisit.user == 0
+  assert newVisit.title is None
+  assert newVisit.sessionStart is None
+  assert newVisit.prevSlug == visit.prevSlug
+  assert newVisit.nextSlug is None
+  assert newVisit.timeOnPage == visit.timeOnPage
+
+def test_itemToLightVisit_exception():
+  with pytest.raises( Exception ) as e:
+    assert itemToLightVisit( {} )
+  assert str( e.value ) == "Could not parse visit"
@@ -24,11 +24,19 @@ def test_pk():
   visitor = Visitor( visitor_id, 1 )
   assert visitor.pk() == { 'S': f'VISITOR#{ visitor_id }' }
 
+def test_gsi3():
+  visitor = Visitor( visitor_id, 1 )
+  assert visitor.gsi3() == {
+    'GSI3PK': { 'S': 'TYPE#visitor' }, 'GSI3SK': { 'S': visitor_id }
+  }
+
 def test_toItem():
   visitor = Visitor( visitor_id, 1 )
   assert visitor.toItem() == {
     'PK': { 'S': f'VISITOR#{ visitor_id }' },
     'SK': { 'S': '#VISITOR' },
+    'GSI3PK': { 'S': 'TYPE#visitor' },
+    'GSI3SK': { 'S': visitor_id },
     'Type': { 'S': 'visitor' },
     'NumberSessions': { 'N': '1' }
   }